@@ -20,14 +20,73 @@ class Settings(BaseSettings):
     DEST_PG_DB: str
     DEST_PG_USER: str
     DEST_PG_PASSWORD: str
+    DB_POOL_SIZE: int = 10  # Conexiones permanentes del pool
+    DB_MAX_OVERFLOW: int = 20  # Conexiones extra por encima de DB_POOL_SIZE
+    DB_POOL_TIMEOUT: int = 30  # Segundos de espera por una conexión libre
+    DB_POOL_RECYCLE: int = 1800  # Segundos antes de reciclar una conexión inactiva
+    DB_POOL_PRE_PING: bool = True
 
     # FastAPI
     FASTAPI_HOST: str = "0.0.0.0"
     FASTAPI_PORT: int = 8000
+    GZIP_MINIMUM_SIZE: int = 1024  # Bytes a partir de los cuales se comprime
+    GZIP_COMPRESS_LEVEL: int = 5
 
     # Spark
     SPARK_APP_NAME: str = "SparkBigData"
     SPARK_MASTER: str = "local[*]"
+    ETL_EXTRACTOR: str = "rest"  # rest (driver) | spark (PostgREST desde los executors) | jdbc
+    SUPABASE_SPARK_PARTITIONS: int = 8  # Tareas de extracción con ETL_EXTRACTOR=spark
+
+    # Origen por JDBC: Postgres de Supabase (ETL_EXTRACTOR=jdbc)
+    SOURCE_PG_HOST: str = ""
+    SOURCE_PG_PORT: int = 5432
+    SOURCE_PG_DB: str = "postgres"
+    SOURCE_PG_USER: str = "postgres"
+    SOURCE_PG_PASSWORD: str = ""
+    SOURCE_PG_SSLMODE: str = "require"
+    SOURCE_JDBC_PARTITIONS: int = 8  # Lecturas en paralelo por rango de id
+    SOURCE_JDBC_FETCH_SIZE: int = 10000  # Filas por round-trip del cursor
+
+    # Scheduler del ETL (intervalo adaptativo según backlog en Supabase)
+    ETL_INTERVAL_MINUTES: float = 30
+    ETL_MIN_INTERVAL_MINUTES: float = 5
+    ETL_MAX_INTERVAL_MINUTES: float = 120
+    ETL_BACKLOG_HIGH: int = 50000  # Con este backlog o más se usa el intervalo mínimo
+    ETL_TRIGGER_FILE: str = str(BASE_DIR / "etl_run_now")  # Si existe, se ejecuta el ETL ya
+
+    # Modo continuo (micro-lotes)
+    MICROBATCH_POLL_SECONDS: float = 5  # Espera entre consultas cuando no hay datos nuevos
+    MICROBATCH_PAGE_SIZE: int = 5000  # Filas por request a Supabase
+    MICROBATCH_MAX_ROWS: int = 20000  # Filas máximas en memoria antes de confirmar
+    MICROBATCH_MAX_WAIT_SECONDS: float = 5  # Espera máxima de un lote antes de confirmar
+
+    # Backfill histórico en paralelo (scripts/backfill.py)
+    BACKFILL_WORKERS: int = 4  # Procesos que extraen/transforman/cargan rangos
+    BACKFILL_RANGE_SIZE: int = 200000  # Ids por rango (cada rango es un checkpoint)
+    BACKFILL_SHADOW_TABLE: str = "locations_backfill"  # Se reemplaza por locations al terminar
+
+    # Ingesta directa (POST /ingest)
+    INGEST_FLUSH_ROWS: int = 5000  # Filas en buffer que disparan un COPY
+    INGEST_FLUSH_SECONDS: float = 0.5  # Espera máxima de una fila en el buffer
+    INGEST_MAX_BUFFER_ROWS: int = 50000  # Con el buffer lleno se responde 503
+    INGEST_MAX_REQUEST_ROWS: int = 10000
+
+    # Vector tiles (MVT)
+    TILE_CACHE_DIR: str = str(BASE_DIR / "tile_cache")
+    TILE_CACHE_MAX_ITEMS: int = 2048  # Tiles en el LRU en memoria
+    TILE_PREGENERATE_ZOOMS: str = "10,11,12"  # Zooms generados tras cada ETL
+
+    # Caché de resultados (versionada por watermark del ETL)
+    RESULT_CACHE_MAX_ITEMS: int = 512
+    RESULT_CACHE_WATERMARK_TTL: float = 5.0  # Segundos entre lecturas del watermark
+    RESULT_CACHE_POLL_SECONDS: float = 10.0  # Intervalo del poller que calienta la caché
+
+    # Exportación columnar (Arrow IPC / Parquet)
+    EXPORT_DIR: str = str(BASE_DIR / "exports")
+    EXPORT_BATCH_SIZE: int = 50000  # Filas por RecordBatch / row group
+    EXPORT_BACKGROUND_ROWS: int = 1000000  # Desde esta estimación se exporta en segundo plano
+    EXPORT_JOB_TTL_SECONDS: int = 86400  # Tiempo que se conservan el archivo y el estado de un trabajo terminado
 
     # Computed properties
     @property
@@ -38,6 +97,11 @@ class Settings(BaseSettings):
     def postgres_jdbc_url(self) -> str:
         return f"jdbc:postgresql://{self.DEST_PG_HOST}:{self.DEST_PG_PORT}/{self.DEST_PG_DB}"
 
+    @property
+    def source_jdbc_url(self) -> str:
+        return (f"jdbc:postgresql://{self.SOURCE_PG_HOST}:{self.SOURCE_PG_PORT}/{self.SOURCE_PG_DB}"
+                f"?sslmode={self.SOURCE_PG_SSLMODE}")
+
     class Config:
         env_file = str(BASE_DIR / ".env")
         env_file_encoding = 'utf-8'
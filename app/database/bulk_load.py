@@ -0,0 +1,95 @@
+# app/database/bulk_load.py
+"""
+Carga masiva a PostgreSQL con COPY
+
+Los lotes se copian a una tabla temporal y desde ahí se insertan en la tabla
+final con ON CONFLICT DO NOTHING, así reintentar un lote no duplica filas.
+"""
+from sqlalchemy.orm import Session
+from typing import List
+import csv
+import io
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def _to_csv(df: pd.DataFrame) -> io.StringIO:
+    """Serializa el DataFrame como CSV para COPY (NULL = campo vacío sin comillas)"""
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep="", quoting=csv.QUOTE_MINIMAL,
+              date_format="%Y-%m-%d %H:%M:%S.%f")
+    buffer.seek(0)
+    return buffer
+
+
+def copy_into(db: Session, table: str, df: pd.DataFrame, columns: List[str],
+              casts: dict = None, conflict_target: str = "id") -> int:
+    """
+    Inserta un DataFrame en una tabla usando COPY sobre la conexión de la sesión
+
+    No hace commit: la carga queda en la transacción del llamador.
+
+    Args:
+        db: Sesión de base de datos
+        table: Tabla destino
+        df: Filas a insertar (columnas en el orden de columns)
+        columns: Columnas de la tabla destino
+        casts: columna -> expresión SQL sobre la tabla temporal (ej. geometrías)
+        conflict_target: Columnas del ON CONFLICT DO NOTHING
+
+    Returns:
+        Cantidad de filas insertadas (sin contar conflictos)
+    """
+    if df.empty:
+        return 0
+
+    casts = casts or {}
+    staging = f"_stage_{table}"
+    column_list = ", ".join(columns)
+    select_list = ", ".join(casts.get(column, column) for column in columns)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        # Tabla temporal (vive lo mismo que la conexión del pool); las columnas
+        # que se castean al insertar se reciben como texto
+        cursor.execute("SELECT to_regclass(%s)", (f"pg_temp.{staging}",))
+        if cursor.fetchone()[0] is None:
+            cursor.execute(
+                f"CREATE TEMP TABLE {staging} "
+                f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+            for column in casts:
+                cursor.execute(f"ALTER TABLE {staging} ALTER COLUMN {column} TYPE text")
+
+        cursor.copy_expert(
+            f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '')",
+            _to_csv(df[columns])
+        )
+
+        cursor.execute(f"""
+            INSERT INTO {table} ({column_list})
+            SELECT {select_list} FROM {staging}
+            ON CONFLICT ({conflict_target}) DO NOTHING
+        """)
+        inserted = cursor.rowcount
+        cursor.execute(f"TRUNCATE {staging}")
+        return inserted
+    finally:
+        cursor.close()
+
+
+def copy_locations(db: Session, df: pd.DataFrame, columns: List[str],
+                   table: str = "locations") -> int:
+    """
+    Inserta filas transformadas en locations (location_geom llega como EWKT)
+
+    table permite cargar en una tabla con la misma estructura (ej. la tabla
+    sombra del backfill).
+    """
+    return copy_into(
+        db, table, df, columns,
+        casts={"location_geom": "ST_GeomFromEWKT(location_geom)"}
+    )
@@ -1,23 +1,140 @@
 # app/database/postgres_db.py
 from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.elements import TextClause
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from contextlib import contextmanager
+from typing import Dict
+import threading
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool que mide cuánto espera cada checkout por una conexión libre
+
+    Sirve para ajustar DB_POOL_SIZE / DB_MAX_OVERFLOW: si la espera crece,
+    el pool es chico para la concurrencia de la API.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+    def recreate(self):
+        # Las estadísticas se conservan al recrear el pool (p. ej. engine.dispose())
+        pool = super().recreate()
+        pool.checkouts, pool.timeouts = self.checkouts, self.timeouts
+        pool.wait_total, pool.wait_max = self.wait_total, self.wait_max
+        return pool
+
+
 engine = create_engine(
     settings.postgres_url,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    poolclass=TimedQueuePool,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+# Sentencias preparadas por conexión: nombre -> (parámetros (nombre, tipo), SQL)
+# El punto se arma con ST_SetSRID(ST_MakePoint(lon, lat), 4326) a partir de
+# parámetros enlazados, así PostgreSQL reutiliza el plan en cada llamada.
+# Las que se mapean a un modelo con .columns(*Model.__table__.columns) listan
+# las columnas en el mismo orden que el modelo: el mapeo es por posición.
+PREPARED_STATEMENTS = {
+    'point_district_province': ((('lon', 'float8'), ('lat', 'float8')), """
+        SELECT d.id AS district_id, d.district_number, d.district_name,
+               pr.id AS province_id, pr.province_name
+        FROM (SELECT ST_SetSRID(ST_MakePoint($1, $2), 4326) AS geom) p
+        LEFT JOIN LATERAL (
+            SELECT id, district_number, district_name
+            FROM districts
+            WHERE ST_Contains(geometry, p.geom)
+            LIMIT 1
+        ) d ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT id, province_name
+            FROM provinces
+            WHERE ST_Contains(geometry, p.geom)
+            LIMIT 1
+        ) pr ON TRUE
+    """),
+    'district_by_point': ((('lon', 'float8'), ('lat', 'float8')), """
+        SELECT id, district_number, district_name, geometry,
+               area_km2, perimeter_km, created_at, updated_at
+        FROM districts
+        WHERE ST_Contains(geometry, ST_SetSRID(ST_MakePoint($1, $2), 4326))
+        LIMIT 1
+    """),
+    'province_by_point': ((('lon', 'float8'), ('lat', 'float8')), """
+        SELECT id, province_name, municipality, department, geometry,
+               area_km2, perimeter_km, created_at, updated_at
+        FROM provinces
+        WHERE ST_Contains(geometry, ST_SetSRID(ST_MakePoint($1, $2), 4326))
+        LIMIT 1
+    """),
+}
+
+
+def prepared(db, name: str) -> TextClause:
+    """
+    Retorna el EXECUTE de una sentencia de PREPARED_STATEMENTS
+
+    La primera vez que se usa en una conexión del pool ejecuta el PREPARE; se
+    recuerda en connection.info, que vive lo mismo que la conexión física.
+
+    Args:
+        db: Sesión de base de datos
+        name: Nombre de la sentencia en PREPARED_STATEMENTS
+
+    Returns:
+        text("EXECUTE name(:param, ...)") para usar con db.execute(..., params)
+    """
+    params, sql = PREPARED_STATEMENTS[name]
+    connection = db.connection()
+    prepared_names = connection.connection.info.setdefault('prepared_statements', set())
+
+    if name not in prepared_names:
+        types = ", ".join(param_type for _, param_type in params)
+        connection.exec_driver_sql(f"PREPARE {name} ({types}) AS {sql}")
+        prepared_names.add(name)
+
+    arguments = ", ".join(f":{param_name}" for param_name, _ in params)
+    return text(f"EXECUTE {name} ({arguments})")
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -26,6 +143,53 @@ def get_db():
         db.close()
 
 
+@contextmanager
+def pooled_connection():
+    """
+    Conexión DBAPI (psycopg2) tomada del pool del engine
+
+    Para código que usa cursores de psycopg2 directamente (execute_values,
+    RealDictCursor). Hace commit al salir sin errores, rollback si hay una
+    excepción, y siempre devuelve la conexión al pool en vez de cerrarla.
+    """
+    conn = engine.raw_connection()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def get_pool_stats() -> Dict:
+    """
+    Uso y tiempos de espera del pool de conexiones
+
+    Returns:
+        dict con configuración, conexiones en uso y espera de checkout
+    """
+    pool = engine.pool
+    checkouts = getattr(pool, 'checkouts', 0)
+    wait_total = getattr(pool, 'wait_total', 0.0)
+
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "timeout_seconds": settings.DB_POOL_TIMEOUT,
+        "recycle_seconds": settings.DB_POOL_RECYCLE,
+        "pre_ping": settings.DB_POOL_PRE_PING,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "checkouts": checkouts,
+        "timeouts": getattr(pool, 'timeouts', 0),
+        "wait_avg_ms": round(wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+        "wait_max_ms": round(getattr(pool, 'wait_max', 0.0) * 1000, 3),
+    }
+
+
 def init_db():
     """Inicializa la base de datos y habilita PostGIS"""
     try:
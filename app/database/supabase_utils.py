@@ -20,6 +20,14 @@ class SupabaseClient:
             "Content-Type": "application/json",
             "Accept": "application/json",
         }
+        # Contadores para la telemetría del ETL (ver reset_counters)
+        self.bytes_fetched = 0
+        self.retries = 0
+
+    def reset_counters(self):
+        """Reinicia los contadores de bytes leídos y reintentos"""
+        self.bytes_fetched = 0
+        self.retries = 0
 
     def fetch_all(self, limit: int = None, offset: int = 0) -> List[Dict]:
         """
@@ -38,6 +46,7 @@ class SupabaseClient:
         try:
             resp = requests.get(url, headers=self.headers, params=params, timeout=60)
             resp.raise_for_status()
+            self.bytes_fetched += len(resp.content)
             data = resp.json()
             logger.info(f"Fetched {len(data)} records from Supabase (offset: {offset})")
             return data
@@ -84,12 +93,14 @@ class SupabaseClient:
             self,
             start_date: Optional[str] = None,
             end_date: Optional[str] = None,
-            last_id: Optional[int] = None
+            last_id: Optional[int] = None,
+            max_id: Optional[int] = None
     ) -> List[Dict]:
         """
         Fetch todos los registros con paginación basada en cursor (ID)
         Usa ID en lugar de offset para evitar problemas con grandes volúmenes
         Si last_id se proporciona, solo trae registros con ID > last_id
+        Si max_id se proporciona, solo trae registros con ID <= max_id
         """
         global data
         all_data = []
@@ -120,15 +131,28 @@ class SupabaseClient:
                 else:
                     params["timestamp"] = f"lte.{end_date}"
 
+            # Rango de ids cerrado: PostgREST no admite dos filtros sobre la
+            # misma columna como parámetros separados, se combinan en and=(...)
+            if max_id is not None:
+                if current_last_id >= max_id:
+                    break
+                conditions = [f"id.gt.{current_last_id}", f"id.lte.{max_id}"]
+                if "and" in params:
+                    conditions.append(params["and"][1:-1])
+                params["and"] = f"({','.join(conditions)})"
+                del params["id"]
+
             # Reintentar en caso de errores
             for retry in range(max_retries):
                 try:
                     resp = requests.get(url, headers=self.headers, params=params, timeout=120)
                     resp.raise_for_status()
+                    self.bytes_fetched += len(resp.content)
                     data = resp.json()
                     break
                 except requests.exceptions.HTTPError as e:
                     if e.response.status_code == 500 and retry < max_retries - 1:
+                        self.retries += 1
                         logger.warning(f"Error 500 en batch {batch_num + 1}, reintento {retry + 1}")
                         import time
                         time.sleep(2 ** retry)  # Backoff exponencial
@@ -137,6 +161,7 @@ class SupabaseClient:
                         raise
                 except Exception as e:
                     if retry < max_retries - 1:
+                        self.retries += 1
                         logger.warning(f"Error en batch {batch_num + 1}, reintento {retry + 1}: {e}")
                         import time
                         time.sleep(2 ** retry)
@@ -163,6 +188,43 @@ class SupabaseClient:
         logger.info(f"Total records fetched: {len(all_data)}")
         return all_data
 
+    def fetch_batch(self, last_id: int, limit: int, timeout: int = 30) -> List[Dict]:
+        """
+        Trae una sola página de registros con id > last_id (keyset por ID)
+
+        Pensado para polling frecuente: la memoria queda acotada a limit filas.
+        """
+        url = f"{self.base_url}/rest/v1/{self.table}"
+        params = {
+            "select": "*",
+            "id": f"gt.{last_id}",
+            "order": "id.asc",
+            "limit": str(limit)
+        }
+
+        try:
+            resp = requests.get(url, headers=self.headers, params=params, timeout=timeout)
+            resp.raise_for_status()
+            self.bytes_fetched += len(resp.content)
+            return resp.json()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching batch after id {last_id}: {e}")
+            raise
+
+    def get_max_id(self, timeout: int = 30) -> int:
+        """Retorna el mayor id de la tabla origen (0 si está vacía)"""
+        url = f"{self.base_url}/rest/v1/{self.table}"
+        params = {"select": "id", "order": "id.desc", "limit": "1"}
+
+        try:
+            resp = requests.get(url, headers=self.headers, params=params, timeout=timeout)
+            resp.raise_for_status()
+            data = resp.json()
+            return data[0]['id'] if data else 0
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching max id from Supabase: {e}")
+            raise
+
     def insert_records(self, table: str, records: List[Dict]) -> List[Dict]:
         """
         Inserta registros en una tabla de Supabase
@@ -179,17 +241,27 @@ class SupabaseClient:
             logger.error(f"Error inserting to Supabase: {e}")
             raise
 
-    def count_records(self, filters: Optional[Dict] = None) -> int:
+    def count_records(
+            self,
+            filters: Optional[Dict] = None,
+            operator_filters: Optional[Dict[str, str]] = None
+    ) -> int:
         """
         Cuenta registros en la tabla
+
+        Args:
+            filters: Igualdades columna -> valor (se envían como eq.valor)
+            operator_filters: Filtros PostgREST ya armados, ej. {"id": "gt.1000"}
         """
         url = f"{self.base_url}/rest/v1/{self.table}"
         headers = {**self.headers, "Prefer": "count=exact"}
-        params = {"select": "*"}
+        params = {"select": "id"}
 
         if filters:
             for key, value in filters.items():
                 params[key] = f"eq.{value}"
+        if operator_filters:
+            params.update(operator_filters)
 
         try:
             resp = requests.head(url, headers=headers, params=params, timeout=30)
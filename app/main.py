@@ -1,13 +1,41 @@
 # api/main.py
-import os
 from fastapi import FastAPI, HTTPException
+from fastapi.middleware.gzip import GZipMiddleware
 from dotenv import load_dotenv
-import psycopg2
 from psycopg2.extras import RealDictCursor
+import asyncio
 
 load_dotenv()
 
-app = FastAPI()
+from app.config import settings
+from app.database.postgres_db import pooled_connection, get_pool_stats
+from app.services.cache_service import poll_watermark, get_cache_stats
+from app.services.ingest_service import ingest_buffer
+from app.utils.responses import ORJSONResponse
+
+app = FastAPI(default_response_class=ORJSONResponse)
+
+# Comprimir respuestas grandes (GeoJSON, estadísticas, listas de ubicaciones)
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.GZIP_MINIMUM_SIZE,
+    compresslevel=settings.GZIP_COMPRESS_LEVEL
+)
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    # Calienta la caché de resultados cada vez que un ETL publica un watermark nuevo
+    app.state.cache_poller = asyncio.create_task(poll_watermark())
+    # Buffer de POST /ingest (flush por tamaño o tiempo)
+    ingest_buffer.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    app.state.cache_poller.cancel()
+    await ingest_buffer.stop()
+
 
 # Importar y registrar routers
 try:
@@ -22,32 +50,90 @@ try:
 except Exception as e:
     print(f"Warning: Could not load province routes: {e}")
 
-DB_HOST = os.getenv("DEST_PG_HOST")
-DB_PORT = int(os.getenv("DEST_PG_PORT", "5432"))
-DB_NAME = os.getenv("DEST_PG_DB")
-DB_USER = os.getenv("DEST_PG_USER")
-DB_PASS = os.getenv("DEST_PG_PASSWORD")
+try:
+    from app.routes.tile_routes import router as tile_router
+    app.include_router(tile_router)
+except Exception as e:
+    print(f"Warning: Could not load tile routes: {e}")
 
-def get_conn():
-    return psycopg2.connect(host=DB_HOST, port=DB_PORT, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
+try:
+    from app.routes.heatmap_routes import router as heatmap_router
+    app.include_router(heatmap_router)
+except Exception as e:
+    print(f"Warning: Could not load heatmap routes: {e}")
+
+try:
+    from app.routes.device_routes import router as device_router
+    app.include_router(device_router)
+except Exception as e:
+    print(f"Warning: Could not load device routes: {e}")
+
+try:
+    from app.routes.stats_routes import router as stats_router
+    app.include_router(stats_router)
+except Exception as e:
+    print(f"Warning: Could not load stats routes: {e}")
+
+try:
+    from app.routes.export_routes import router as export_router
+    app.include_router(export_router)
+except Exception as e:
+    print(f"Warning: Could not load export routes: {e}")
+
+try:
+    from app.routes.timeseries_routes import router as timeseries_router
+    app.include_router(timeseries_router)
+except Exception as e:
+    print(f"Warning: Could not load timeseries routes: {e}")
+
+try:
+    from app.routes.ingest_routes import router as ingest_router
+    app.include_router(ingest_router)
+except Exception as e:
+    print(f"Warning: Could not load ingest routes: {e}")
+
+try:
+    from app.routes.metrics_routes import router as metrics_router
+    app.include_router(metrics_router)
+except Exception as e:
+    print(f"Warning: Could not load metrics routes: {e}")
 
 @app.get("/results")
 def get_results(limit: int = 100):
     """
-    Retorna filas recientes de devices_summary_by_device_day.
+    Retorna filas recientes del rollup diario por dispositivo (device_daily_stats).
     """
     try:
-        conn = get_conn()
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("""
-            SELECT device_id, device_name, date, points_count, avg_speed, max_speed, avg_battery
-            FROM public.devices_summary_by_device_day
-            ORDER BY date DESC
-            LIMIT %s
-        """, (limit,))
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
+        with pooled_connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute("""
+                SELECT device_id, device_name, date,
+                       point_count AS points_count,
+                       speed_sum / NULLIF(speed_count, 0) AS avg_speed,
+                       max_speed,
+                       battery_sum / NULLIF(battery_count, 0) AS avg_battery
+                FROM public.device_daily_stats
+                ORDER BY date DESC
+                LIMIT %s
+            """, (limit,))
+            rows = cur.fetchall()
+            cur.close()
         return rows
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/db/pool")
+def get_db_pool():
+    """
+    Uso del pool de conexiones (para ajustar DB_POOL_SIZE / DB_MAX_OVERFLOW).
+    """
+    return get_pool_stats()
+
+
+@app.get("/cache/stats")
+def get_result_cache_stats():
+    """
+    Tamaño, aciertos y watermark de la caché de resultados.
+    """
+    return get_cache_stats()
@@ -1,5 +1,5 @@
 # app/models/db_models.py
-from sqlalchemy import Column, Integer, Float, String, DateTime, JSON, Index, BigInteger, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, DateTime, Date, JSON, Index, BigInteger, ForeignKey, Sequence
 from sqlalchemy.orm import relationship
 from geoalchemy2 import Geometry
 from app.database.postgres_db import Base
@@ -195,6 +195,15 @@ class Location(Base):
         Index('idx_grid', 'lat_grid', 'lon_grid'),
         Index('idx_district_name', 'district_name'),
         Index('idx_province_name', 'province_name'),
+        # Índices cubrientes para estadísticas por distrito/provincia
+        Index(
+            'idx_location_district_stats', 'district_id', 'id',
+            postgresql_include=['device_id', 'battery', 'signal', 'speed']
+        ),
+        Index(
+            'idx_location_province_stats', 'province_id', 'id',
+            postgresql_include=['device_id', 'battery', 'signal', 'speed']
+        ),
     )
 
 
@@ -231,6 +240,40 @@ class GridAnalysis(Base):
     )
 
 
+class GridAnalysisDetail(Base):
+    """
+    Detalle combinable de grid_analysis para el heatmap
+
+    Una fila por celda base (0.01°), generación de red, operador y dispositivo.
+    Guarda sumas y conteos para poder sumar cada lote del ETL y reagrupar en
+    celdas más grandes o filtrar por red/operador sin leer locations.
+    """
+    __tablename__ = "grid_analysis_detail"
+
+    lat_grid = Column(Float, primary_key=True)
+    lon_grid = Column(Float, primary_key=True)
+    network_generation = Column(String(20), primary_key=True)
+    sim_operator = Column(String(100), primary_key=True)
+    device_id = Column(String(100), primary_key=True)
+
+    # Geometría de la celda base
+    cell_geom = Column(Geometry('POLYGON', srid=4326))
+
+    # Agregados combinables
+    point_count = Column(BigInteger, nullable=False, default=0)
+    battery_sum = Column(Float, default=0)
+    battery_count = Column(BigInteger, default=0)
+    signal_sum = Column(Float, default=0)
+    signal_count = Column(BigInteger, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_grid_detail_cell_gist', 'cell_geom', postgresql_using='gist'),
+        Index('idx_grid_detail_network_operator', 'network_generation', 'sim_operator'),
+    )
+
+
 class District(Base):
     """
     Tabla de distritos de Santa Cruz de la Sierra
@@ -289,3 +332,189 @@ class Province(Base):
         Index('idx_province_name', 'province_name'),
     )
 
+
+# ==================== ROLLUPS DE ESTADÍSTICAS ====================
+
+class DistrictDailyStats(Base):
+    """
+    Agregados diarios por distrito (sumas y conteos combinables)
+    Se actualizan incrementalmente en cada lote del ETL
+    """
+    __tablename__ = "district_daily_stats"
+
+    district_id = Column(Integer, ForeignKey('districts.id', ondelete='CASCADE'), primary_key=True)
+    date = Column(Date, primary_key=True)
+
+    point_count = Column(BigInteger, nullable=False, default=0)
+    battery_sum = Column(Float, default=0)
+    battery_count = Column(BigInteger, default=0)
+    signal_sum = Column(Float, default=0)
+    signal_count = Column(BigInteger, default=0)
+    speed_sum = Column(Float, default=0)
+    speed_count = Column(BigInteger, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DistrictHourlyStats(Base):
+    """
+    Agregados por hora, distrito, generación de red y operador
+    Base de las series de tiempo; se actualizan incrementalmente en cada lote del ETL
+    """
+    __tablename__ = "district_hourly_stats"
+
+    district_id = Column(Integer, ForeignKey('districts.id', ondelete='CASCADE'), primary_key=True)
+    hour = Column(DateTime, primary_key=True)
+    network_generation = Column(String(20), primary_key=True)
+    sim_operator = Column(String(100), primary_key=True)
+
+    point_count = Column(BigInteger, nullable=False, default=0)
+    battery_sum = Column(Float, default=0)
+    battery_count = Column(BigInteger, default=0)
+    signal_sum = Column(Float, default=0)
+    signal_count = Column(BigInteger, default=0)
+    speed_sum = Column(Float, default=0)
+    speed_count = Column(BigInteger, default=0)
+
+    __table_args__ = (
+        Index('idx_district_hourly_hour', 'hour'),
+    )
+
+
+class DistrictDailyDevice(Base):
+    """Dispositivos distintos vistos por distrito y día (para unique_devices)"""
+    __tablename__ = "district_daily_devices"
+
+    district_id = Column(Integer, ForeignKey('districts.id', ondelete='CASCADE'), primary_key=True)
+    date = Column(Date, primary_key=True)
+    device_id = Column(String(100), primary_key=True)
+
+
+class ProvinceDailyStats(Base):
+    """
+    Agregados diarios por provincia (sumas y conteos combinables)
+    Se actualizan incrementalmente en cada lote del ETL
+    """
+    __tablename__ = "province_daily_stats"
+
+    province_id = Column(Integer, ForeignKey('provinces.id', ondelete='CASCADE'), primary_key=True)
+    date = Column(Date, primary_key=True)
+
+    point_count = Column(BigInteger, nullable=False, default=0)
+    battery_sum = Column(Float, default=0)
+    battery_count = Column(BigInteger, default=0)
+    signal_sum = Column(Float, default=0)
+    signal_count = Column(BigInteger, default=0)
+    speed_sum = Column(Float, default=0)
+    speed_count = Column(BigInteger, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ProvinceDailyDevice(Base):
+    """Dispositivos distintos vistos por provincia y día (para unique_devices)"""
+    __tablename__ = "province_daily_devices"
+
+    province_id = Column(Integer, ForeignKey('provinces.id', ondelete='CASCADE'), primary_key=True)
+    date = Column(Date, primary_key=True)
+    device_id = Column(String(100), primary_key=True)
+
+
+class DeviceDailyStats(Base):
+    """
+    Agregados diarios por dispositivo (sumas, conteos, máximos y extremos de tiempo)
+    Se actualizan incrementalmente en cada lote del ETL
+    """
+    __tablename__ = "device_daily_stats"
+
+    device_id = Column(String(100), primary_key=True)
+    date = Column(Date, primary_key=True)
+    device_name = Column(String(100))
+
+    point_count = Column(BigInteger, nullable=False, default=0)
+    battery_sum = Column(Float, default=0)
+    battery_count = Column(BigInteger, default=0)
+    signal_sum = Column(Float, default=0)
+    signal_count = Column(BigInteger, default=0)
+    speed_sum = Column(Float, default=0)
+    speed_count = Column(BigInteger, default=0)
+    max_speed = Column(Float)
+
+    first_seen = Column(DateTime)
+    last_seen = Column(DateTime)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_device_daily_date', 'date'),
+    )
+
+
+class DeviceDailyBreakdown(Base):
+    """Histograma diario por dispositivo de generación de red y operador"""
+    __tablename__ = "device_daily_breakdown"
+
+    device_id = Column(String(100), primary_key=True)
+    date = Column(Date, primary_key=True)
+    network_generation = Column(String(20), primary_key=True)
+    sim_operator = Column(String(100), primary_key=True)
+
+    point_count = Column(BigInteger, nullable=False, default=0)
+
+
+class DeviceDailyCell(Base):
+    """Puntos por día de cada dispositivo en cada celda base (0.01°) de la grilla"""
+    __tablename__ = "device_daily_cells"
+
+    device_id = Column(String(100), primary_key=True)
+    date = Column(Date, primary_key=True)
+    lat_grid = Column(Float, primary_key=True)
+    lon_grid = Column(Float, primary_key=True)
+
+    point_count = Column(BigInteger, nullable=False, default=0)
+
+
+class GlobalDailyStats(Base):
+    """
+    Agregados diarios de todo el dataset (sumas, conteos y extremos de tiempo)
+    Se actualizan incrementalmente en cada lote del ETL
+    """
+    __tablename__ = "global_daily_stats"
+
+    date = Column(Date, primary_key=True)
+
+    point_count = Column(BigInteger, nullable=False, default=0)
+    battery_sum = Column(Float, default=0)
+    battery_count = Column(BigInteger, default=0)
+    signal_sum = Column(Float, default=0)
+    signal_count = Column(BigInteger, default=0)
+    speed_sum = Column(Float, default=0)
+    speed_count = Column(BigInteger, default=0)
+    altitude_sum = Column(Float, default=0)
+    altitude_count = Column(BigInteger, default=0)
+
+    first_timestamp = Column(DateTime)
+    last_timestamp = Column(DateTime)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class GlobalDailyDistribution(Base):
+    """
+    Histograma diario por dimensión categórica
+    (period, altitude_range, battery_level, network_generation, sim_operator)
+    """
+    __tablename__ = "global_daily_distribution"
+
+    date = Column(Date, primary_key=True)
+    dimension = Column(String(30), primary_key=True)
+    value = Column(String(100), primary_key=True)
+
+    point_count = Column(BigInteger, nullable=False, default=0)
+
+
+# IDs de puntos recibidos por POST /ingest: negativos para no chocar con los
+# ids de Supabase ni mover el keyset del ETL incremental
+INGEST_ID_SEQUENCE = Sequence(
+    'ingest_location_id_seq', start=-1, increment=-1, maxvalue=-1, metadata=Base.metadata
+)
@@ -1,7 +1,7 @@
 """
 Modelo para control de ejecuciones ETL
 """
-from sqlalchemy import Column, Integer, String, DateTime, BigInteger
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, Float, ForeignKey
 from app.database.postgres_db import Base
 from datetime import datetime
 
@@ -18,3 +18,37 @@ class ETLControl(Base):
     execution_time_seconds = Column(Integer)
     error_message = Column(String(500))
 
+    # Telemetría de la ejecución (detalle por etapa en etl_stage_metrics)
+    rows_per_second = Column(Float)
+    bytes_fetched = Column(BigInteger)  # Bytes de respuesta leídos de Supabase
+    supabase_retries = Column(Integer)
+    peak_memory_mb = Column(Float)  # Pico de memoria residente del driver Python
+
+
+
+class ETLStageMetric(Base):
+    """Duración y volumen de cada etapa de una ejecución ETL"""
+    __tablename__ = "etl_stage_metrics"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    etl_control_id = Column(Integer, ForeignKey('etl_control.id', ondelete='CASCADE'), nullable=False, index=True)
+    stage = Column(String(20), nullable=False)  # extract, normalize, transform, grid, stats, load, assign, rollups, control
+    started_at = Column(DateTime, nullable=False)
+    seconds = Column(Float, nullable=False)
+    records = Column(BigInteger)
+    rows_per_second = Column(Float)
+
+
+class BackfillCheckpoint(Base):
+    """Checkpoint por rango de ids de un backfill histórico en paralelo"""
+    __tablename__ = "backfill_checkpoints"
+
+    run_id = Column(String(40), primary_key=True)
+    range_start = Column(BigInteger, primary_key=True)  # ids > range_start
+    range_end = Column(BigInteger, nullable=False)  # ids <= range_end
+    status = Column(String(20), nullable=False, default='PENDING')  # PENDING, RUNNING, SUCCESS, FAILED
+    records_fetched = Column(Integer, default=0)
+    records_loaded = Column(Integer, default=0)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    error_message = Column(String(500))
@@ -1,7 +1,7 @@
 # app/models/schemas.py
 from pydantic import BaseModel, Field, validator
 from typing import Optional, Dict, List
-from datetime import datetime
+from datetime import date, datetime
 
 
 class LocationBase(BaseModel):
@@ -129,6 +129,9 @@ class GeneralStats(BaseModel):
     avg_speed: float
     network_distribution: List[NetworkDistribution]
     operator_distribution: List[OperatorDistribution]
+    period_distribution: Dict[str, int] = {}
+    altitude_distribution: Dict[str, int] = {}
+    battery_distribution: Dict[str, int] = {}
     date_range: Dict[str, str]
 
 
@@ -140,4 +143,30 @@ class HeatmapRequest(BaseModel):
     min_lon: Optional[float] = Field(None, ge=-180, le=180)
     max_lon: Optional[float] = Field(None, ge=-180, le=180)
     network_type: Optional[str] = None
-    operator: Optional[str] = None
\ No newline at end of file
+    operator: Optional[str] = None
+
+
+class TimeseriesRequest(BaseModel):
+    """Schema para request de series de tiempo"""
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    bucket: str = Field(default="hour", pattern="^(hour|day|week)$")
+    district_number: Optional[int] = None
+    network_type: Optional[str] = None
+    operator: Optional[str] = None
+    split_by: Optional[str] = Field(default=None, pattern="^(network_generation|sim_operator)$")
+
+
+class ExportFilters(BaseModel):
+    """Schema para filtros de exportación de ubicaciones"""
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    district_number: Optional[int] = None
+    operator: Optional[str] = None
+    network_type: Optional[str] = None
+
+
+class PointBatchRequest(BaseModel):
+    """Schema para buscar distrito y provincia de muchos puntos a la vez"""
+    latitudes: List[float]
+    longitudes: List[float]
@@ -0,0 +1,37 @@
+"""
+Rutas para dispositivos
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.database.postgres_db import get_db
+from app.models.schemas import DeviceStatsResponse
+from app.services.device_service import DeviceService
+from datetime import date
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/devices", tags=["Devices"])
+
+
+@router.get("/{device_id}/stats", response_model=DeviceStatsResponse)
+async def get_device_stats(
+    device_id: str,
+    start_date: Optional[date] = Query(None, description="Fecha inicial (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Fecha final (YYYY-MM-DD)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtiene estadísticas de un dispositivo desde el rollup diario
+    """
+    try:
+        stats = DeviceService.get_device_stats(db, device_id, start_date, end_date)
+    except Exception as e:
+        logger.error(f"Error getting device statistics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not stats:
+        raise HTTPException(status_code=404, detail=f"Device {device_id} not found")
+
+    return stats
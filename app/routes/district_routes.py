@@ -1,12 +1,24 @@
 """
 Rutas para gestión de distritos
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from app.database.postgres_db import get_db
-from app.services.district_service import DistrictService
+from fastapi.responses import StreamingResponse
+from app.services.district_service import DistrictService, LOCATION_COLUMNS
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.responses import ORJSONResponse, etag_matches
+from app.utils.streaming import (
+    ndjson_stream, arrow_ipc_stream, NDJSON_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE
+)
+from app.models.schemas import PointBatchRequest
+from app.services.location_service import get_district_and_province_for_points
+from pydantic import ValidationError
 from typing import List, Dict, Optional
+from array import array
+import json
 import logging
+import sys
 
 logger = logging.getLogger(__name__)
 
@@ -19,30 +31,34 @@ async def get_all_districts(db: Session = Depends(get_db)):
     Obtiene todos los distritos
     """
     try:
-        districts = DistrictService.get_all_districts(db)
-        return [
-            {
-                "id": d.id,
-                "district_number": d.district_number,
-                "district_name": d.district_name,
-                "area_km2": d.area_km2,
-                "perimeter_km": d.perimeter_km,
-                "created_at": d.created_at.isoformat() if d.created_at else None,
-            }
-            for d in districts
-        ]
+        return DistrictService.list_districts(db)
     except Exception as e:
         logger.error(f"Error getting districts: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/geojson")
-async def get_districts_geojson(db: Session = Depends(get_db)):
+async def get_districts_geojson(
+    request: Request,
+    tolerance: Optional[float] = Query(None, ge=0, description="Tolerancia de simplificación (grados)"),
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="Nivel de zoom del mapa"),
+    db: Session = Depends(get_db)
+):
     """
     Obtiene todos los distritos en formato GeoJSON
+
+    Con tolerance o zoom se devuelve una versión simplificada precalculada.
+    Responde 304 si el cliente envía un If-None-Match con el ETag vigente.
     """
     try:
-        return DistrictService.get_districts_geojson(db)
+        level = DistrictService.resolve_geojson_tolerance(tolerance, zoom)
+        etag, body = DistrictService.get_districts_geojson_cached(db, level)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=body, media_type="application/geo+json", headers=headers)
     except Exception as e:
         logger.error(f"Error getting districts GeoJSON: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -103,7 +119,7 @@ async def get_all_districts_statistics(db: Session = Depends(get_db)):
     Obtiene estadísticas de todos los distritos
     """
     try:
-        return DistrictService.get_all_districts_statistics(db)
+        return ORJSONResponse(DistrictService.get_all_districts_statistics(db))
     except Exception as e:
         logger.error(f"Error getting all districts statistics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -134,41 +150,143 @@ async def find_district_by_point(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+MAX_BATCH_POINTS = 100000
+
+
+def _parse_point_batch(content_type: str, body: bytes):
+    """
+    Lee los puntos del cuerpo del request
+
+    - application/json: {"latitudes": [...], "longitudes": [...]}
+    - application/octet-stream: pares (lat, lon) float64 little-endian
+
+    Raises:
+        ValueError / ValidationError: cuerpo mal formado o coordenadas fuera
+        de rango (incluye NaN e infinitos)
+    """
+    if content_type.startswith("application/octet-stream"):
+        if len(body) % 16 != 0:
+            raise ValueError("Binary body must contain (lat, lon) float64 pairs")
+        values = array("d")
+        values.frombytes(body)
+        if sys.byteorder != "little":
+            values.byteswap()
+        latitudes, longitudes = list(values[0::2]), list(values[1::2])
+    else:
+        # model_validate rechaza con ValidationError un JSON que no es objeto
+        payload = PointBatchRequest.model_validate(json.loads(body or b"{}"))
+        if len(payload.latitudes) != len(payload.longitudes):
+            raise ValueError("latitudes and longitudes must have the same length")
+        latitudes, longitudes = payload.latitudes, payload.longitudes
+
+    _check_coordinates(latitudes, longitudes)
+    return latitudes, longitudes
+
+
+def _check_coordinates(latitudes: List[float], longitudes: List[float]):
+    """Las comparaciones con NaN son falsas, así que también quedan afuera"""
+    for index, (lat, lon) in enumerate(zip(latitudes, longitudes)):
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError(f"Point {index} ({lat}, {lon}) is out of range")
+
+
+@router.post("/point/batch")
+async def find_districts_by_points(request: Request, db: Session = Depends(get_db)):
+    """
+    Encuentra distrito y provincia de muchos puntos en una sola consulta
+
+    Acepta JSON con arreglos latitudes/longitudes o binario (float64 lat, lon).
+    Responde en formato columnar, en el mismo orden que la entrada.
+    """
+    try:
+        latitudes, longitudes = _parse_point_batch(
+            request.headers.get("content-type", "application/json"),
+            await request.body()
+        )
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if len(latitudes) > MAX_BATCH_POINTS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_POINTS} points per request")
+
+    try:
+        result = get_district_and_province_for_points(db, latitudes, longitudes)
+        return {"count": len(latitudes), **result}
+    except Exception as e:
+        logger.error(f"Error finding districts by points: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{district_number}/locations")
 async def get_locations_in_district(
     district_number: int,
     limit: int = Query(100, ge=1, le=1000),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Token next_cursor de la página anterior"),
     db: Session = Depends(get_db)
 ):
     """
-    Obtiene las ubicaciones dentro de un distrito
+    Obtiene las ubicaciones dentro de un distrito (paginación por cursor)
     """
+    try:
+        after_id = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         locations = DistrictService.get_locations_in_district(
-            db, district_number, limit, offset
+            db, district_number, limit, after_id
         )
+        next_cursor = encode_cursor(locations[-1].id) if len(locations) == limit else None
 
-        return {
+        # Filas con tipos simples: orjson serializa datetime sin jsonable_encoder
+        return ORJSONResponse({
             "district_number": district_number,
             "count": len(locations),
             "limit": limit,
-            "offset": offset,
-            "locations": [
-                {
-                    "id": loc.id,
-                    "latitude": loc.latitude,
-                    "longitude": loc.longitude,
-                    "device_id": loc.device_id,
-                    "timestamp": loc.timestamp.isoformat() if loc.timestamp else None,
-                    "signal": loc.signal,
-                    "battery": loc.battery,
-                    "network_generation": loc.network_generation,
-                }
-                for loc in locations
-            ]
-        }
+            "cursor": cursor,
+            "next_cursor": next_cursor,
+            "locations": [loc._asdict() for loc in locations]
+        })
     except Exception as e:
         logger.error(f"Error getting locations in district: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+def _location_arrow_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.int64()),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("device_id", pa.string()),
+        ("timestamp", pa.timestamp("us")),
+        ("signal", pa.float64()),
+        ("battery", pa.float64()),
+        ("network_generation", pa.string()),
+    ])
+
+
+@router.get("/{district_number}/locations/export")
+async def export_locations_in_district(
+    district_number: int,
+    format: str = Query("ndjson", pattern="^(ndjson|arrow)$"),
+    db: Session = Depends(get_db)
+):
+    """
+    Exporta todas las ubicaciones de un distrito en streaming (NDJSON o Arrow IPC)
+    """
+    district = DistrictService.get_district_by_number(db, district_number)
+    if not district:
+        raise HTTPException(status_code=404, detail=f"District {district_number} not found")
+
+    batches = DistrictService.iter_locations_in_district(district.id)
+
+    if format == "arrow":
+        return StreamingResponse(
+            arrow_ipc_stream(batches, _location_arrow_schema()),
+            media_type=ARROW_STREAM_MEDIA_TYPE
+        )
+
+    columns = [column.key for column in LOCATION_COLUMNS]
+    return StreamingResponse(ndjson_stream(batches, columns), media_type=NDJSON_MEDIA_TYPE)
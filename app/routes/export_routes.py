@@ -0,0 +1,87 @@
+"""
+Rutas para exportación columnar de ubicaciones
+"""
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database.postgres_db import get_db
+from app.models.schemas import ExportFilters
+from app.services.export_service import (
+    EXPORT_FORMATS, resolve_district_id, estimate_export_rows, stream_export,
+    create_export_job, run_export_job, get_export_job
+)
+from app.utils.responses import ORJSONResponse
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+
+def _public_job(job: dict) -> dict:
+    """Estado del trabajo sin la ruta interna del archivo"""
+    return {key: value for key, value in job.items() if key not in ("path", "district_id")}
+
+
+@router.get("/locations")
+async def export_locations(
+    background_tasks: BackgroundTasks,
+    filters: ExportFilters = Depends(),
+    format: str = Query("parquet", pattern="^(arrow|parquet)$"),
+    background: bool = Query(False, description="Forzar exportación en segundo plano"),
+    db: Session = Depends(get_db)
+):
+    """
+    Exporta ubicaciones filtradas en Arrow IPC o Parquet
+
+    Si la estimación de filas supera EXPORT_BACKGROUND_ROWS (o background=true)
+    responde 202 con un trabajo; si no, el archivo se envía en streaming.
+    """
+    try:
+        district_id = resolve_district_id(db, filters)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    estimated_rows = estimate_export_rows(db, filters, district_id)
+
+    if background or estimated_rows >= settings.EXPORT_BACKGROUND_ROWS:
+        job = create_export_job(filters, format, district_id)
+        background_tasks.add_task(run_export_job, job["job_id"])
+        return ORJSONResponse(
+            {**_public_job(job), "estimated_rows": estimated_rows},
+            status_code=202
+        )
+
+    _, media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        stream_export(filters, format, district_id),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="locations.{extension}"'}
+    )
+
+
+@router.get("/jobs/{job_id}")
+async def get_export_job_status(job_id: str):
+    """
+    Estado de un trabajo de exportación
+    """
+    job = get_export_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Export job {job_id} not found")
+    return _public_job(job)
+
+
+@router.get("/jobs/{job_id}/download")
+async def download_export(job_id: str):
+    """
+    Descarga el archivo de un trabajo terminado
+    """
+    job = get_export_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Export job {job_id} not found")
+    if job["status"] != "SUCCESS":
+        raise HTTPException(status_code=409, detail=f"Export job is {job['status']}")
+
+    _, media_type, extension = EXPORT_FORMATS[job["format"]]
+    return FileResponse(job["path"], media_type=media_type, filename=f"locations.{extension}")
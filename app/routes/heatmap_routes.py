@@ -0,0 +1,44 @@
+"""
+Rutas para el heatmap por grilla
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.database.postgres_db import get_db
+from app.models.schemas import HeatmapRequest, GridCellResponse
+from app.services.heatmap_service import get_heatmap, get_heatmap_cells
+from typing import List
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/heatmap", tags=["Heatmap"])
+
+
+@router.get("/")
+async def get_heatmap_grid(
+    params: HeatmapRequest = Depends(),
+    db: Session = Depends(get_db)
+):
+    """
+    Heatmap compacto: {"grid_size", "columns", "cells": [[lat, lon, ...], ...]}
+    """
+    try:
+        return get_heatmap(db, params)
+    except Exception as e:
+        logger.error(f"Error getting heatmap: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cells", response_model=List[GridCellResponse])
+async def get_heatmap_grid_cells(
+    params: HeatmapRequest = Depends(),
+    db: Session = Depends(get_db)
+):
+    """
+    Heatmap con distribución de red y operador por celda
+    """
+    try:
+        return get_heatmap_cells(db, params)
+    except Exception as e:
+        logger.error(f"Error getting heatmap cells: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,55 @@
+"""
+Rutas para ingesta directa de ubicaciones
+"""
+from fastapi import APIRouter, HTTPException, Request
+from app.config import settings
+from app.services.ingest_service import ingest_buffer, validate_locations, BufferFullError
+from app.utils.responses import ORJSONResponse
+import orjson
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/ingest", tags=["Ingest"])
+
+
+@router.post("")
+async def ingest_locations(request: Request):
+    """
+    Recibe un lote de ubicaciones (lista de objetos LocationCreate, o
+    {"locations": [...]}) y responde cuando el lote quedó confirmado en la base
+
+    - 422 si alguna fila es inválida (no se carga ninguna)
+    - 413 si el lote supera INGEST_MAX_REQUEST_ROWS
+    - 503 con Retry-After si el buffer de ingesta está lleno
+    """
+    try:
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+
+    records = payload.get("locations") if isinstance(payload, dict) else payload
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise HTTPException(status_code=400, detail="Body must be a list of location objects")
+    if not records:
+        return {"accepted": 0, "id_range": None}
+    if len(records) > settings.INGEST_MAX_REQUEST_ROWS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.INGEST_MAX_REQUEST_ROWS} locations per request"
+        )
+
+    df, errors = validate_locations(records)
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+    try:
+        return await ingest_buffer.submit(df)
+    except BufferFullError as e:
+        retry_after = max(1, round(settings.INGEST_FLUSH_SECONDS * 2))
+        return ORJSONResponse(
+            {"detail": str(e)}, status_code=503, headers={"Retry-After": str(retry_after)}
+        )
+    except Exception as e:
+        logger.error(f"Error ingesting locations: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
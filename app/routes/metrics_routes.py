@@ -0,0 +1,21 @@
+"""
+Ruta de métricas para Prometheus
+"""
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from app.database.postgres_db import get_db
+from app.services.metrics_service import render_metrics, PROMETHEUS_MEDIA_TYPE
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics(db: Session = Depends(get_db)):
+    """
+    Telemetría del ETL por etapa, pool de conexiones y caché (formato Prometheus)
+    """
+    return PlainTextResponse(render_metrics(db), media_type=PROMETHEUS_MEDIA_TYPE)
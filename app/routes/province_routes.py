@@ -11,16 +11,7 @@ router = APIRouter(prefix="/provinces", tags=["Provinces"])
 
 @router.get("/")
 async def get_all_provinces(db: Session = Depends(get_db)):
-    provinces = ProvinceService.get_all_provinces(db)
-    return [
-        {
-            "id": p.id,
-            "province_name": p.province_name,
-            "municipality": p.municipality,
-            "area_km2": p.area_km2,
-        }
-        for p in provinces
-    ]
+    return ProvinceService.list_provinces(db)
 
 
 @router.get("/{province_id}")
@@ -0,0 +1,31 @@
+"""
+Rutas para estadísticas generales
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.database.postgres_db import get_db
+from app.models.schemas import GeneralStats
+from app.services.stats_service import get_general_stats
+from datetime import date
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/stats", tags=["Statistics"])
+
+
+@router.get("/general", response_model=GeneralStats)
+async def get_general_statistics(
+    start_date: Optional[date] = Query(None, description="Fecha inicial (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Fecha final (YYYY-MM-DD)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Estadísticas generales desde los rollups diarios, con rango de fechas opcional
+    """
+    try:
+        return get_general_stats(db, start_date, end_date)
+    except Exception as e:
+        logger.error(f"Error getting general statistics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
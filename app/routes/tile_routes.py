@@ -0,0 +1,52 @@
+"""
+Rutas para tiles vectoriales (Mapbox Vector Tiles)
+"""
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+from app.database.postgres_db import get_db
+from app.services.tile_service import get_tile, TILE_LAYERS
+from app.utils.responses import etag_matches
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/tiles", tags=["Tiles"])
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+@router.get("/{layer}/{z}/{x}/{y}.mvt")
+async def get_vector_tile(
+    layer: str,
+    z: int,
+    x: int,
+    y: int,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Obtiene un tile MVT de la capa locations, grid o districts
+
+    Responde 304 si el cliente envía un If-None-Match con el ETag vigente.
+    """
+    if layer not in TILE_LAYERS:
+        raise HTTPException(status_code=404, detail=f"Layer '{layer}' not found")
+    if z < 0 or z > 22:
+        raise HTTPException(status_code=400, detail="Zoom must be between 0 and 22")
+
+    try:
+        tile, watermark = get_tile(db, layer, z, x, y)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting tile {layer}/{z}/{x}/{y}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    etag = f'"{layer}-{watermark}-{z}-{x}-{y}"'
+    headers = {"ETag": etag}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if not tile:
+        return Response(status_code=204, headers=headers)
+
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE, headers=headers)
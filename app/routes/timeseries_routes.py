@@ -0,0 +1,28 @@
+"""
+Rutas para series de tiempo
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.database.postgres_db import get_db
+from app.models.schemas import TimeseriesRequest
+from app.services.timeseries_service import get_timeseries
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/timeseries", tags=["Timeseries"])
+
+
+@router.get("/")
+async def get_points_timeseries(
+    params: TimeseriesRequest = Depends(),
+    db: Session = Depends(get_db)
+):
+    """
+    Puntos y promedios por hora/día/semana: {"bucket", "columns", "series": {...}}
+    """
+    try:
+        return get_timeseries(db, params)
+    except Exception as e:
+        logger.error(f"Error getting timeseries: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
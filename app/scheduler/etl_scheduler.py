@@ -1,16 +1,24 @@
 """
 Scheduler para ejecutar ETL automáticamente cada cierto tiempo
+
+Antes de cada ejecución consulta en Supabase cuántos registros nuevos hay
+(id > último id procesado); si no hay ninguno no se inicia Spark. El
+intervalo se acorta cuando hay mucho backlog y se alarga cuando no hay datos.
 """
 import asyncio
-import schedule
-import time
-from datetime import datetime
-import sys
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Dict, Optional
+import signal
+import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from app.config import settings
+from app.database.postgres_db import SessionLocal
+from app.database.supabase_utils import get_supabase_client
 from app.services.etl_service import ETLService
+from app.services.watermark_service import get_last_processed_id
 import logging
 
 logging.basicConfig(
@@ -19,6 +27,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Cada cuántos segundos se revisa el archivo de disparo mientras se espera
+TRIGGER_POLL_SECONDS = 5
+
 
 async def run_incremental_etl():
     """Ejecuta el ETL incremental"""
@@ -26,6 +37,7 @@ async def run_incremental_etl():
     logger.info(f"SCHEDULED ETL EXECUTION - {datetime.now()}")
     logger.info("="*70)
 
+    etl_service = None
     try:
         etl_service = ETLService()
         result = await etl_service.run_full_etl(incremental=True)
@@ -33,68 +45,184 @@ async def run_incremental_etl():
         logger.info(f"ETL Result: {result['status']}")
         logger.info(f"Records processed: {result.get('records_processed', 0)}")
         logger.info(f"Execution time: {result.get('execution_time', 0)}s")
+        return result
 
     except Exception as e:
         logger.error(f"Error in scheduled ETL: {e}")
         import traceback
         traceback.print_exc()
+        return {"status": "error", "message": str(e)}
     finally:
         # Cerrar Spark
-        try:
-            etl_service.spark.stop()
-            logger.info("Spark stopped")
-        except:
-            pass
+        if etl_service:
+            try:
+                etl_service.spark.stop()
+                logger.info("Spark stopped")
+            except Exception:
+                pass
+
+
+def probe_backlog() -> int:
+    """
+    Cuenta en Supabase los registros con id mayor al último procesado
+
+    Es un HEAD con count=exact sobre el índice de id; no descarga filas.
+    """
+    db = SessionLocal()
+    try:
+        last_id = get_last_processed_id(db)
+    finally:
+        db.close()
+
+    return get_supabase_client().count_records(operator_filters={"id": f"gt.{last_id}"})
 
 
-def job():
-    """Función que ejecuta el ETL de forma síncrona"""
-    asyncio.run(run_incremental_etl())
+class ETLScheduler:
+    """
+    Scheduler asyncio del ETL incremental
 
+    Un asyncio.Lock impide ejecuciones superpuestas. El ETL se espera en el
+    mismo loop (sin crear uno nuevo por tick); un trigger() o SIGUSR1 que
+    llegue mientras corre queda registrado y se atiende al terminar.
+    """
 
-def start_scheduler(interval_minutes: int = 30):
+    def __init__(
+        self,
+        interval_minutes: Optional[float] = None,
+        min_interval_minutes: Optional[float] = None,
+        max_interval_minutes: Optional[float] = None,
+        backlog_high: Optional[int] = None,
+        trigger_file: Optional[str] = None
+    ):
+        self.base_interval = interval_minutes or settings.ETL_INTERVAL_MINUTES
+        self.min_interval = min_interval_minutes or settings.ETL_MIN_INTERVAL_MINUTES
+        self.max_interval = max(max_interval_minutes or settings.ETL_MAX_INTERVAL_MINUTES, self.base_interval)
+        self.backlog_high = backlog_high or settings.ETL_BACKLOG_HIGH
+        self.trigger_file = Path(trigger_file or settings.ETL_TRIGGER_FILE)
+        self.interval = self.base_interval
+        self._lock = asyncio.Lock()
+        self._wake: Optional[asyncio.Event] = None
+
+    def next_interval(self, backlog: Optional[int]) -> float:
+        """
+        Minutos hasta el próximo tick según el backlog observado
+
+        Sin backlog se duplica el intervalo (hasta el máximo); con backlog alto
+        se usa el mínimo; en otro caso se vuelve al intervalo base.
+        """
+        if backlog is None:
+            return self.base_interval
+        if backlog == 0:
+            return min(self.interval * 2, self.max_interval)
+        if backlog >= self.backlog_high:
+            return self.min_interval
+        return self.base_interval
+
+    async def run_once(self, force: bool = False) -> Dict:
+        """
+        Ejecuta un tick: probe de backlog y, si hay datos (o force), el ETL
+
+        Returns:
+            dict con status (skipped/busy/success/error/...) y backlog
+        """
+        if self._lock.locked():
+            logger.info("ETL already running, tick skipped")
+            return {"status": "busy", "backlog": None}
+
+        async with self._lock:
+            try:
+                backlog = await asyncio.to_thread(probe_backlog)
+            except Exception as e:
+                logger.error(f"Error probing Supabase backlog: {e}")
+                backlog = None
+
+            if backlog == 0 and not force:
+                logger.info("No new records in Supabase, skipping ETL")
+                return {"status": "skipped", "backlog": 0}
+
+            if backlog is not None:
+                logger.info(f"Backlog: {backlog:,} new records")
+
+            result = await run_incremental_etl()
+            return {**result, "backlog": backlog}
+
+    def trigger(self):
+        """Pide una ejecución inmediata (sin esperar el intervalo)"""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _wait(self, minutes: float) -> bool:
+        """
+        Espera hasta el próximo tick o hasta un disparo manual
+
+        Returns:
+            True si la espera terminó por trigger() o por el archivo de disparo
+        """
+        deadline = datetime.now() + timedelta(minutes=minutes)
+        while datetime.now() < deadline:
+            if self.trigger_file.exists():
+                self.trigger_file.unlink(missing_ok=True)
+                return True
+            timeout = min(TRIGGER_POLL_SECONDS, (deadline - datetime.now()).total_seconds())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(timeout, 0))
+                self._wake.clear()
+                return True
+            except asyncio.TimeoutError:
+                pass
+        return False
+
+    async def run_forever(self):
+        """Loop principal: tick, ajuste de intervalo y espera"""
+        self._wake = asyncio.Event()
+
+        # En Unix, `kill -USR1 <pid>` dispara una ejecución inmediata
+        if hasattr(signal, "SIGUSR1"):
+            try:
+                asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self.trigger)
+            except NotImplementedError:
+                pass
+
+        force = False
+        while True:
+            result = await self.run_once(force=force)
+            self.interval = self.next_interval(result.get("backlog"))
+            logger.info(f"Next ETL check in {self.interval:g} minutes "
+                        f"({datetime.now() + timedelta(minutes=self.interval):%H:%M:%S})")
+            force = await self._wait(self.interval)
+            if force:
+                logger.info("Manual ETL trigger received")
+
+
+def request_run_now(trigger_file: Optional[str] = None):
+    """Crea el archivo de disparo para que un scheduler en marcha ejecute el ETL ya"""
+    path = Path(trigger_file or settings.ETL_TRIGGER_FILE)
+    path.touch()
+    logger.info(f"ETL run requested ({path})")
+
+
+def start_scheduler(interval_minutes: Optional[float] = None):
     """
     Inicia el scheduler para ejecutar ETL automáticamente
 
     Args:
-        interval_minutes: Intervalo en minutos entre ejecuciones
+        interval_minutes: Intervalo base en minutos entre ejecuciones
     """
+    scheduler = ETLScheduler(interval_minutes=interval_minutes)
+
     logger.info("="*70)
     logger.info("ETL SCHEDULER STARTED")
     logger.info("="*70)
-    logger.info(f"Interval: Every {interval_minutes} minutes")
+    logger.info(f"Interval: {scheduler.base_interval:g} minutes "
+                f"(adaptive {scheduler.min_interval:g}-{scheduler.max_interval:g})")
     logger.info(f"Mode: Incremental (only new data)")
+    logger.info(f"Run now: create {scheduler.trigger_file}")
     logger.info("="*70)
 
-    # Programar la tarea
-    schedule.every(interval_minutes).minutes.do(job)
-
-    # Ejecutar inmediatamente al inicio (opcional)
-    logger.info("\nRunning initial ETL...")
-    job()
-
-    # Loop principal
-    logger.info(f"\nScheduler running. Press Ctrl+C to stop.")
-    logger.info(f"Next run: {schedule.next_run()}\n")
-
-    while True:
-        try:
-            schedule.run_pending()
-            time.sleep(60)  # Verificar cada minuto
-
-            # Mostrar próxima ejecución
-            next_run = schedule.next_run()
-            if next_run:
-                time_until = (next_run - datetime.now()).total_seconds()
-                if time_until > 0 and time_until % 300 == 0:  # Cada 5 minutos
-                    logger.info(f"Next ETL run in {int(time_until/60)} minutes")
-
-        except KeyboardInterrupt:
-            logger.info("\n\nScheduler stopped by user")
-            break
-        except Exception as e:
-            logger.error(f"Error in scheduler loop: {e}")
-            time.sleep(60)
+    try:
+        asyncio.run(scheduler.run_forever())
+    except KeyboardInterrupt:
+        logger.info("\n\nScheduler stopped by user")
 
 
 if __name__ == "__main__":
@@ -103,12 +231,19 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='ETL Scheduler')
     parser.add_argument(
         '--interval',
-        type=int,
-        default=30,
-        help='Interval in minutes between ETL runs (default: 30)'
+        type=float,
+        default=None,
+        help=f'Base interval in minutes between ETL runs (default: {settings.ETL_INTERVAL_MINUTES:g})'
+    )
+    parser.add_argument(
+        '--run-now',
+        action='store_true',
+        help='Ask a running scheduler to run the ETL immediately and exit'
     )
 
     args = parser.parse_args()
 
-    start_scheduler(interval_minutes=args.interval)
-
+    if args.run_now:
+        request_run_now()
+    else:
+        start_scheduler(interval_minutes=args.interval)
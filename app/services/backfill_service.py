@@ -0,0 +1,358 @@
+"""
+Backfill histórico en paralelo con checkpoints por rango de ids
+
+El espacio de ids de Supabase se divide en rangos (range_start, range_end]
+que un pool de procesos extrae, transforma (pandas, sin Spark) y carga con
+COPY en una tabla sombra. Cada rango confirma su carga junto con su
+checkpoint, así un backfill interrumpido se retoma sin repetir rangos.
+
+locations sigue atendiendo lecturas mientras tanto; al terminar se crean los
+índices en la sombra y se intercambian las tablas en una sola transacción.
+"""
+from app.config import settings
+from app.database.bulk_load import copy_locations
+from app.database.postgres_db import SessionLocal, engine
+from app.database.supabase_utils import get_supabase_client
+from app.models.etl_control import ETLControl, BackfillCheckpoint
+from app.services.location_service import bulk_assign_geographic_location
+from app.services.rollup_service import rebuild_all_rollups
+from app.services.watermark_service import get_last_processed_id
+from app.spark.local_transformations import transform_records, LOCATION_LOAD_COLUMNS
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import re
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sufijo de los índices mientras viven en la tabla sombra
+_SHADOW_INDEX_SUFFIX = "_bf"
+
+_INDEX_DEF = re.compile(r"^(CREATE (?:UNIQUE )?INDEX) \S+ ON \S+ ")
+
+
+def plan_ranges(max_id: int, range_size: int) -> List[Tuple[int, int]]:
+    """
+    Divide los ids (0, max_id] en rangos (inicio, fin] de range_size ids
+
+    Returns:
+        Lista de tuplas (range_start, range_end)
+    """
+    return [
+        (start, min(start + range_size, max_id))
+        for start in range(0, max_id, range_size)
+    ]
+
+
+def create_shadow_table(db: Session, shadow: str, truncate: bool = False):
+    """
+    Crea la tabla sombra con la estructura de locations y solo la PK
+
+    Los índices secundarios se crean al final (build_shadow_indexes): cargar
+    sin ellos es bastante más rápido.
+
+    Args:
+        db: Sesión de base de datos
+        shadow: Nombre de la tabla sombra
+        truncate: Vaciarla si ya existe (run nuevo: las filas de un run
+            abandonado ganarían el ON CONFLICT DO NOTHING de la carga)
+    """
+    db.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {shadow}
+        (LIKE locations INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+    """))
+    exists = db.execute(text("""
+        SELECT 1 FROM pg_index WHERE indrelid = to_regclass(:shadow) AND indisprimary
+    """), {"shadow": shadow}).first()
+    if not exists:
+        db.execute(text(f"ALTER TABLE {shadow} ADD CONSTRAINT {shadow}_pkey PRIMARY KEY (id)"))
+    if truncate:
+        db.execute(text(f"TRUNCATE {shadow}"))
+    db.commit()
+
+
+def _secondary_indexes(db: Session, table: str) -> List[Tuple[str, str]]:
+    """(nombre, definición) de los índices no-PK de una tabla"""
+    rows = db.execute(text("""
+        SELECT c.relname, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = to_regclass(:table) AND NOT i.indisprimary
+    """), {"table": table}).all()
+    return [(name, definition) for name, definition in rows]
+
+
+def _shadow_index_name(name: str) -> str:
+    """Nombre temporal del índice en la sombra (máx. 63 caracteres en PostgreSQL)"""
+    return name[:63 - len(_SHADOW_INDEX_SUFFIX)] + _SHADOW_INDEX_SUFFIX
+
+
+def build_shadow_indexes(db: Session, shadow: str) -> int:
+    """
+    Crea en la sombra los mismos índices secundarios que tiene locations
+
+    Se crean con un sufijo temporal (los nombres de índice son únicos por
+    schema) y se renombran a los originales en swap_shadow_table.
+
+    Returns:
+        Cantidad de índices creados
+    """
+    indexes = _secondary_indexes(db, "locations")
+    for name, definition in indexes:
+        shadow_name = _shadow_index_name(name)
+        started = time.monotonic()
+        db.execute(text(f"DROP INDEX IF EXISTS {shadow_name}"))
+        db.execute(text(_INDEX_DEF.sub(rf"\1 {shadow_name} ON {shadow} ", definition)))
+        db.commit()
+        logger.info(f"  ✓ Index {name} built on {shadow} ({time.monotonic() - started:.1f}s)")
+    return len(indexes)
+
+
+def swap_shadow_table(db: Session, shadow: str, max_id: int) -> int:
+    """
+    Reemplaza locations por la tabla sombra en una sola transacción
+
+    Antes del intercambio se copian a la sombra las filas que no vienen del
+    backfill: ids negativos (POST /ingest) y ids > max_id (ETL incremental
+    o ingesta continua que corrieron mientras tanto). También se recrean las
+    foreign keys de locations.
+
+    Returns:
+        Cantidad de filas copiadas desde la locations anterior
+    """
+    try:
+        old_indexes = [name for name, _ in _secondary_indexes(db, "locations")]
+        pkey = db.execute(text("""
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = 'locations'::regclass AND contype = 'p'
+        """)).scalar()
+        foreign_keys = db.execute(text("""
+            SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = 'locations'::regclass AND contype = 'f'
+        """)).all()
+
+        # Bloquea escrituras y lecturas solo durante el intercambio
+        db.execute(text("LOCK TABLE locations IN ACCESS EXCLUSIVE MODE"))
+
+        carried = db.execute(text(f"""
+            INSERT INTO {shadow}
+            SELECT * FROM locations WHERE id < 0 OR id > :max_id
+            ON CONFLICT (id) DO NOTHING
+        """), {"max_id": max_id}).rowcount
+
+        # locations.id es BIGSERIAL: la sombra copió el default nextval() pero la
+        # secuencia pertenece a locations.id y el DROP fallaría (o se la llevaría)
+        sequence = db.execute(text("SELECT pg_get_serial_sequence('locations', 'id')")).scalar()
+        if sequence:
+            db.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {shadow}.id"))
+
+        db.execute(text("DROP TABLE locations"))
+        db.execute(text(f"ALTER TABLE {shadow} RENAME TO locations"))
+        if pkey:
+            db.execute(text(f"ALTER INDEX {shadow}_pkey RENAME TO {pkey}"))
+        for name in old_indexes:
+            db.execute(text(f"ALTER INDEX IF EXISTS {_shadow_index_name(name)} RENAME TO {name}"))
+        for name, definition in foreign_keys:
+            # NOT VALID: las filas ya se asignaron contra las mismas tablas
+            db.execute(text(f"ALTER TABLE locations ADD CONSTRAINT {name} {definition} NOT VALID"))
+
+        db.commit()
+        logger.info(f"✓ {shadow} swapped in as locations ({carried:,} newer rows carried over)")
+        return carried
+
+    except Exception as e:
+        logger.error(f"Error swapping {shadow} into locations: {e}")
+        db.rollback()
+        raise
+
+
+def _init_worker():
+    """
+    Inicializador de cada proceso del pool
+
+    Con fork el proceso hereda las conexiones del pool del padre; se
+    descartan (sin cerrarlas) para que el worker abra las suyas.
+    """
+    engine.dispose(close=False)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(processName)s] %(message)s')
+
+
+def backfill_range(run_id: str, range_start: int, range_end: int, shadow: str) -> Dict:
+    """
+    Extrae, transforma y carga un rango de ids en la tabla sombra
+
+    La carga, la asignación de distrito/provincia y el checkpoint SUCCESS se
+    confirman en la misma transacción.
+
+    Args:
+        run_id: Id del backfill
+        range_start: Se cargan ids > range_start
+        range_end: Se cargan ids <= range_end
+        shadow: Tabla destino
+
+    Returns:
+        dict con el rango, filas leídas/cargadas y duración
+    """
+    start = time.monotonic()
+    db = SessionLocal()
+    checkpoint = db.get(BackfillCheckpoint, (run_id, range_start))
+    try:
+        checkpoint.status = 'RUNNING'
+        checkpoint.started_at = datetime.utcnow()
+        db.commit()
+
+        records = get_supabase_client().fetch_all_paginated(last_id=range_start, max_id=range_end)
+        df = transform_records(records)
+        loaded = copy_locations(db, df, LOCATION_LOAD_COLUMNS, table=shadow)
+        bulk_assign_geographic_location(db, from_id=range_start, to_id=range_end,
+                                        commit=False, table=shadow)
+
+        checkpoint.status = 'SUCCESS'
+        checkpoint.records_fetched = len(records)
+        checkpoint.records_loaded = loaded
+        checkpoint.finished_at = datetime.utcnow()
+        checkpoint.error_message = None
+        db.commit()
+
+        return {
+            "range_start": range_start,
+            "range_end": range_end,
+            "fetched": len(records),
+            "loaded": loaded,
+            "seconds": round(time.monotonic() - start, 1),
+        }
+
+    except Exception as e:
+        db.rollback()
+        checkpoint = db.get(BackfillCheckpoint, (run_id, range_start))
+        checkpoint.status = 'FAILED'
+        checkpoint.finished_at = datetime.utcnow()
+        checkpoint.error_message = str(e)[:500]
+        db.commit()
+        raise
+    finally:
+        db.close()
+
+
+def _load_or_plan_checkpoints(db: Session, run_id: str, range_size: int) -> List[BackfillCheckpoint]:
+    """Retorna los checkpoints del run; si no existen, planifica los rangos"""
+    checkpoints = db.query(BackfillCheckpoint).filter(
+        BackfillCheckpoint.run_id == run_id
+    ).order_by(BackfillCheckpoint.range_start).all()
+    if checkpoints:
+        return checkpoints
+
+    max_id = get_supabase_client().get_max_id()
+    checkpoints = [
+        BackfillCheckpoint(run_id=run_id, range_start=range_start, range_end=range_end,
+                           status='PENDING', records_fetched=0, records_loaded=0)
+        for range_start, range_end in plan_ranges(max_id, range_size)
+    ]
+    db.add_all(checkpoints)
+    db.commit()
+    return checkpoints
+
+
+def run_backfill(
+    workers: Optional[int] = None,
+    range_size: Optional[int] = None,
+    run_id: Optional[str] = None,
+    shadow: Optional[str] = None
+) -> Dict:
+    """
+    Ejecuta (o retoma) un backfill histórico completo
+
+    Args:
+        workers: Procesos en paralelo (default: BACKFILL_WORKERS)
+        range_size: Ids por rango, solo al planificar un run nuevo
+        run_id: Id de un run anterior para retomarlo (se saltean los rangos SUCCESS)
+        shadow: Tabla sombra (default: BACKFILL_SHADOW_TABLE)
+
+    Returns:
+        dict con status (success/incomplete), run_id, rangos y filas cargadas
+    """
+    start = time.monotonic()
+    workers = workers or settings.BACKFILL_WORKERS
+    range_size = range_size or settings.BACKFILL_RANGE_SIZE
+    shadow = shadow or settings.BACKFILL_SHADOW_TABLE
+    run_id = run_id or datetime.utcnow().strftime("%Y%m%d%H%M%S")
+
+    db = SessionLocal()
+    try:
+        resuming = db.query(BackfillCheckpoint.run_id).filter(
+            BackfillCheckpoint.run_id == run_id
+        ).first() is not None
+        create_shadow_table(db, shadow, truncate=not resuming)
+        checkpoints = _load_or_plan_checkpoints(db, run_id, range_size)
+        max_id = max((c.range_end for c in checkpoints), default=0)
+        pending = [(c.range_start, c.range_end) for c in checkpoints if c.status != 'SUCCESS']
+
+        logger.info(f"Backfill {run_id}: ids (0, {max_id:,}] in {len(checkpoints)} ranges, "
+                    f"{len(pending)} pending, {workers} workers -> {shadow}")
+
+        failed = []
+        if pending:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                futures = {
+                    pool.submit(backfill_range, run_id, range_start, range_end, shadow): (range_start, range_end)
+                    for range_start, range_end in pending
+                }
+                for done, future in enumerate(as_completed(futures), start=1):
+                    range_start, range_end = futures[future]
+                    try:
+                        report = future.result()
+                        logger.info(f"  [{done}/{len(pending)}] ids ({range_start:,}, {range_end:,}]: "
+                                    f"{report['loaded']:,} rows in {report['seconds']}s")
+                    except Exception as e:
+                        failed.append((range_start, range_end))
+                        logger.error(f"  [{done}/{len(pending)}] ids ({range_start:,}, {range_end:,}] failed: {e}")
+
+        if failed:
+            logger.warning(f"Backfill {run_id} incomplete: {len(failed)} ranges failed. "
+                           f"Resume with: python scripts/backfill.py --resume {run_id}")
+            return {"status": "incomplete", "run_id": run_id, "failed_ranges": failed,
+                    "execution_time": round(time.monotonic() - start, 1)}
+
+        records_loaded = db.query(
+            func.coalesce(func.sum(BackfillCheckpoint.records_loaded), 0)
+        ).filter(BackfillCheckpoint.run_id == run_id).scalar()
+
+        logger.info("Building indexes on shadow table...")
+        build_shadow_indexes(db, shadow)
+        swap_shadow_table(db, shadow, max_id)
+
+        logger.info("Rebuilding rollups...")
+        rollups = rebuild_all_rollups(db)
+
+        # El watermark no retrocede si el incremental cargó ids > max_id mientras tanto
+        db.add(ETLControl(
+            execution_date=datetime.utcnow(),
+            last_processed_id=max(max_id, get_last_processed_id(db)),
+            records_processed=records_loaded,
+            status='SUCCESS',
+            execution_time_seconds=int(time.monotonic() - start)
+        ))
+        db.commit()
+
+        result = {
+            "status": "success",
+            "run_id": run_id,
+            "ranges": len(checkpoints),
+            "max_id": max_id,
+            "records_loaded": records_loaded,
+            "rollups": rollups,
+            "execution_time": round(time.monotonic() - start, 1),
+        }
+        logger.info(f"✓ Backfill {run_id} completed: {records_loaded:,} rows in {result['execution_time']}s")
+        return result
+
+    except Exception as e:
+        logger.error(f"Error in backfill {run_id}: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,195 @@
+"""
+Caché de resultados de consultas de lectura, versionada por el watermark del ETL
+
+Los datos solo cambian cuando un ETL registra una ejecución exitosa, así que
+cada resultado se guarda con el watermark vigente en su clave: un ETL nuevo
+invalida todo sin borrar entradas una por una. Un poller en segundo plano
+detecta el watermark nuevo y vuelve a calcular (calienta) las consultas
+registradas, de modo que los dashboards casi no consultan PostgreSQL.
+"""
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database.postgres_db import SessionLocal
+from app.services.watermark_service import get_etl_watermark, ETL_STATUSES
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+import asyncio
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """LRU en memoria con límite de entradas; claves (nombre, args, watermark)"""
+
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Tuple, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def drop_stale(self, watermark: int):
+        """Descarta las entradas calculadas con watermarks anteriores"""
+        with self._lock:
+            for key in [k for k in self._entries if k[-1] != watermark]:
+                del self._entries[key]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"items": len(self._entries), "max_items": self.max_items,
+                    "hits": self.hits, "misses": self.misses}
+
+
+_result_cache = ResultCache(settings.RESULT_CACHE_MAX_ITEMS)
+
+# Último watermark leído y cuándo (evita un SELECT por request)
+_watermark: Optional[int] = None
+_watermark_checked_at = 0.0
+_watermark_lock = threading.Lock()
+
+# Watermark de ETL con el que se calentó la caché por última vez
+_warmed_etl_watermark: Optional[int] = None
+
+# Consultas cacheadas: nombre -> (función, proveedor de argumentos para calentar)
+_registry: Dict[str, Tuple[Callable, Optional[Callable[[Session], Iterable[Tuple]]]]] = {}
+
+
+def current_watermark(db: Session, max_age: Optional[float] = None) -> int:
+    """
+    Watermark del ETL, releído como mucho cada RESULT_CACHE_WATERMARK_TTL segundos
+
+    Args:
+        db: Sesión de base de datos
+        max_age: Antigüedad máxima aceptada en segundos (0 = leer siempre)
+
+    Returns:
+        id de la última ejecución exitosa del ETL
+    """
+    global _watermark, _watermark_checked_at
+
+    if max_age is None:
+        max_age = settings.RESULT_CACHE_WATERMARK_TTL
+
+    with _watermark_lock:
+        if _watermark is not None and time.monotonic() - _watermark_checked_at < max_age:
+            return _watermark
+
+    watermark = get_etl_watermark(db)
+    with _watermark_lock:
+        _watermark = watermark
+        _watermark_checked_at = time.monotonic()
+    return watermark
+
+
+def cached(name: str, warm_args: Optional[Callable[[Session], Iterable[Tuple]]] = None):
+    """
+    Decorador para funciones de servicio f(db, *args) con resultado cacheable
+
+    Los resultados vacíos no se guardan (los servicios devuelven {} o [] ante
+    errores). warm_args(db) indica con qué argumentos calentar la consulta
+    tras un ETL; si se omite se calienta sin argumentos.
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(db: Session, *args):
+            key = (name, args, current_watermark(db))
+            hit, value = _result_cache.get(key)
+            if hit:
+                return value
+
+            value = func(db, *args)
+            if value:
+                _result_cache.put(key, value)
+            return value
+
+        _registry[name] = (wrapper, warm_args)
+        return wrapper
+
+    return decorator
+
+
+def warm_cache(db: Session) -> int:
+    """
+    Calcula todas las consultas registradas con el watermark vigente
+
+    Returns:
+        Cantidad de resultados calculados
+    """
+    warmed = 0
+    for name, (func, warm_args) in _registry.items():
+        try:
+            for args in (warm_args(db) if warm_args else [()]):
+                func(db, *args)
+                warmed += 1
+        except Exception as e:
+            logger.error(f"Error warming cached query '{name}': {e}")
+    return warmed
+
+
+def refresh_cache() -> Optional[int]:
+    """
+    Relee el watermark; si cambió descarta lo viejo y calienta la caché
+
+    Solo se calienta cuando hay un ETL nuevo: los lotes de /ingest cambian el
+    watermark hasta cada INGEST_FLUSH_SECONDS y tras ellos las consultas se
+    recalculan recién cuando alguien las pide.
+
+    Returns:
+        El watermark nuevo, o None si no cambió
+    """
+    global _warmed_etl_watermark
+
+    db = SessionLocal()
+    try:
+        previous = _watermark
+        watermark = current_watermark(db, max_age=0)
+        if watermark == previous:
+            return None
+
+        _result_cache.drop_stale(watermark)
+
+        etl_watermark = get_etl_watermark(db, ETL_STATUSES)
+        if etl_watermark == _warmed_etl_watermark:
+            return watermark
+        _warmed_etl_watermark = etl_watermark
+
+        warmed = warm_cache(db)
+        logger.info(f"✓ Result cache warmed for watermark {watermark} ({warmed} queries)")
+        return watermark
+    finally:
+        db.close()
+
+
+async def poll_watermark():
+    """Tarea de fondo: revisa el watermark cada RESULT_CACHE_POLL_SECONDS"""
+    while True:
+        try:
+            await asyncio.to_thread(refresh_cache)
+        except Exception as e:
+            logger.error(f"Error refreshing result cache: {e}")
+        await asyncio.sleep(settings.RESULT_CACHE_POLL_SECONDS)
+
+
+def get_cache_stats() -> Dict:
+    """Tamaño, aciertos y watermark vigente de la caché de resultados"""
+    return {**_result_cache.stats(), "watermark": _watermark}
@@ -0,0 +1,117 @@
+"""
+Servicio para estadísticas por dispositivo
+
+Lee solo de los rollups device_daily_stats, device_daily_breakdown y
+device_daily_cells; nunca recorre locations.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from app.models.db_models import DeviceDailyStats, DeviceDailyBreakdown, DeviceDailyCell
+from app.services.rollup_service import BASE_GRID_SIZE
+from datetime import date
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _average(total, count) -> Optional[float]:
+    return round(total / count, 2) if count else None
+
+
+class DeviceService:
+    """Servicio para operaciones con dispositivos"""
+
+    @staticmethod
+    def get_device_stats(
+        db: Session,
+        device_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Optional[Dict]:
+        """
+        Obtiene estadísticas de un dispositivo (formato DeviceStatsResponse)
+
+        Args:
+            db: Sesión de base de datos
+            device_id: ID del dispositivo
+            start_date: Fecha inicial inclusiva (opcional)
+            end_date: Fecha final inclusiva (opcional)
+
+        Returns:
+            Diccionario con estadísticas o None si el dispositivo no tiene datos
+        """
+        try:
+            date_filters = [DeviceDailyStats.device_id == device_id]
+            breakdown_filters = [DeviceDailyBreakdown.device_id == device_id]
+            cell_filters = [DeviceDailyCell.device_id == device_id]
+            if start_date:
+                date_filters.append(DeviceDailyStats.date >= start_date)
+                breakdown_filters.append(DeviceDailyBreakdown.date >= start_date)
+                cell_filters.append(DeviceDailyCell.date >= start_date)
+            if end_date:
+                date_filters.append(DeviceDailyStats.date <= end_date)
+                breakdown_filters.append(DeviceDailyBreakdown.date <= end_date)
+                cell_filters.append(DeviceDailyCell.date <= end_date)
+
+            totals = db.query(
+                func.sum(DeviceDailyStats.point_count).label('total_records'),
+                func.min(DeviceDailyStats.first_seen).label('first_seen'),
+                func.max(DeviceDailyStats.last_seen).label('last_seen'),
+                func.sum(DeviceDailyStats.battery_sum).label('battery_sum'),
+                func.sum(DeviceDailyStats.battery_count).label('battery_count'),
+                func.sum(DeviceDailyStats.signal_sum).label('signal_sum'),
+                func.sum(DeviceDailyStats.signal_count).label('signal_count'),
+                func.sum(DeviceDailyStats.speed_sum).label('speed_sum'),
+                func.sum(DeviceDailyStats.speed_count).label('speed_count'),
+            ).filter(*date_filters).one()
+
+            if not totals.total_records:
+                return None
+
+            device_name = db.query(DeviceDailyStats.device_name).filter(
+                *date_filters, DeviceDailyStats.device_name.isnot(None)
+            ).order_by(DeviceDailyStats.date.desc()).limit(1).scalar()
+
+            breakdown = db.query(
+                DeviceDailyBreakdown.network_generation,
+                DeviceDailyBreakdown.sim_operator,
+                func.sum(DeviceDailyBreakdown.point_count),
+            ).filter(*breakdown_filters).group_by(
+                DeviceDailyBreakdown.network_generation,
+                DeviceDailyBreakdown.sim_operator,
+            ).all()
+
+            network_distribution: Dict[str, int] = {}
+            operator_distribution: Dict[str, int] = {}
+            for network, operator, count in breakdown:
+                network_distribution[network] = network_distribution.get(network, 0) + int(count)
+                operator_distribution[operator] = operator_distribution.get(operator, 0) + int(count)
+
+            # Celda de grilla con más puntos en el mismo rango de fechas
+            top_cell = db.query(
+                DeviceDailyCell.lat_grid,
+                DeviceDailyCell.lon_grid,
+            ).filter(*cell_filters).group_by(
+                DeviceDailyCell.lat_grid,
+                DeviceDailyCell.lon_grid,
+            ).order_by(func.sum(DeviceDailyCell.point_count).desc()).first()
+
+            return {
+                "device_id": device_id,
+                "device_name": device_name,
+                "total_records": int(totals.total_records),
+                "first_seen": totals.first_seen,
+                "last_seen": totals.last_seen,
+                "avg_battery": _average(totals.battery_sum, totals.battery_count),
+                "avg_signal": _average(totals.signal_sum, totals.signal_count),
+                "avg_speed": _average(totals.speed_sum, totals.speed_count),
+                "most_common_lat": round(top_cell.lat_grid + BASE_GRID_SIZE / 2, 6) if top_cell else None,
+                "most_common_lon": round(top_cell.lon_grid + BASE_GRID_SIZE / 2, 6) if top_cell else None,
+                "network_distribution": network_distribution,
+                "operator_distribution": operator_distribution,
+            }
+
+        except Exception as e:
+            logger.error(f"Error getting device statistics: {e}")
+            raise
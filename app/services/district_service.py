@@ -2,15 +2,39 @@
 Servicio para gestión de distritos
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import text, func
-from app.models.db_models import District, Location
+from sqlalchemy import text, func, select
+from app.database.postgres_db import engine, prepared
+from app.models.db_models import District, Location, DistrictDailyStats, DistrictDailyDevice
+from app.services.cache_service import cached
 from geoalchemy2.functions import ST_AsGeoJSON, ST_Contains, ST_Intersects, ST_Distance
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Iterator
+import hashlib
 import json
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Tolerancias (grados) precalculadas con ST_SimplifyPreserveTopology; 0 = completa
+GEOJSON_TOLERANCES = (0.0, 0.0001, 0.0005, 0.001, 0.005)
+
+# Caché en proceso del GeoJSON serializado: tolerancia -> (etag, bytes)
+_geojson_cache: Dict[float, Tuple[str, bytes]] = {}
+_geojson_version: Optional[str] = None
+_geojson_lock = threading.Lock()
+
+# Columnas que exponen los endpoints de ubicaciones por distrito
+LOCATION_COLUMNS = (
+    Location.id,
+    Location.latitude,
+    Location.longitude,
+    Location.device_id,
+    Location.timestamp,
+    Location.signal,
+    Location.battery,
+    Location.network_generation,
+)
+
 
 class DistrictService:
     """Servicio para operaciones con distritos"""
@@ -20,6 +44,24 @@ class DistrictService:
         """Obtiene todos los distritos"""
         return db.query(District).order_by(District.district_number).all()
 
+    @staticmethod
+    @cached('districts')
+    def list_districts(db: Session) -> List[Dict]:
+        """
+        Lista de distritos serializada (cacheada por watermark)
+        """
+        return [
+            {
+                "id": d.id,
+                "district_number": d.district_number,
+                "district_name": d.district_name,
+                "area_km2": d.area_km2,
+                "perimeter_km": d.perimeter_km,
+                "created_at": d.created_at.isoformat() if d.created_at else None,
+            }
+            for d in DistrictService.get_all_districts(db)
+        ]
+
     @staticmethod
     def get_district_by_number(db: Session, district_number: int) -> Optional[District]:
         """Obtiene un distrito por su número"""
@@ -31,46 +73,112 @@ class DistrictService:
         return db.query(District).filter(District.id == district_id).first()
 
     @staticmethod
-    def get_districts_geojson(db: Session) -> Dict:
+    def get_districts_version(db: Session) -> str:
         """
-        Retorna todos los distritos en formato GeoJSON
+        Versión de la tabla districts (cantidad + último updated_at)
+        Cambia cada vez que se inserta, borra o actualiza un distrito
+        """
+        count, last_update = db.query(
+            func.count(District.id),
+            func.max(District.updated_at)
+        ).one()
+        return f"{count}:{last_update.isoformat() if last_update else ''}"
+
+    @staticmethod
+    def resolve_geojson_tolerance(
+        tolerance: Optional[float] = None,
+        zoom: Optional[int] = None
+    ) -> float:
+        """
+        Elige la tolerancia precalculada más cercana (sin pasarse) a la pedida
+
+        Args:
+            tolerance: Tolerancia de simplificación en grados
+            zoom: Nivel de zoom del mapa; se traduce a grados por píxel
+
+        Returns:
+            Una de GEOJSON_TOLERANCES (0.0 = geometría completa)
+        """
+        if tolerance is None and zoom is not None:
+            tolerance = 360.0 / (256 * 2 ** zoom)
+        if not tolerance:
+            return 0.0
+        return max(t for t in GEOJSON_TOLERANCES if t <= tolerance)
+
+    @staticmethod
+    def _build_geojson(db: Session, tolerance: float) -> bytes:
+        """
+        Arma el FeatureCollection completo en PostgreSQL y lo devuelve serializado
+        """
+        if tolerance > 0:
+            geometry = "ST_AsGeoJSON(ST_SimplifyPreserveTopology(geometry, :tolerance), 6)"
+        else:
+            geometry = "ST_AsGeoJSON(geometry)"
+
+        body = db.execute(text(f"""
+            SELECT json_build_object(
+                'type', 'FeatureCollection',
+                'features', COALESCE(json_agg(json_build_object(
+                    'type', 'Feature',
+                    'properties', json_build_object(
+                        'id', id,
+                        'district_number', district_number,
+                        'district_name', district_name,
+                        'area_km2', area_km2,
+                        'perimeter_km', perimeter_km
+                    ),
+                    'geometry', {geometry}::json
+                ) ORDER BY district_number), '[]'::json)
+            )::text
+            FROM districts
+        """), {"tolerance": tolerance}).scalar()
+
+        return body.encode('utf-8')
+
+    @staticmethod
+    def get_districts_geojson_cached(db: Session, tolerance: float = 0.0) -> Tuple[str, bytes]:
+        """
+        Retorna el GeoJSON de distritos ya serializado y su ETag
+
+        Todas las tolerancias de GEOJSON_TOLERANCES se precalculan juntas y se
+        guardan en memoria hasta que cambie la versión de la tabla districts.
+
+        Args:
+            db: Sesión de base de datos
+            tolerance: Una de GEOJSON_TOLERANCES (ver resolve_geojson_tolerance)
+
+        Returns:
+            (etag, bytes del FeatureCollection)
         """
+        global _geojson_version
+
         try:
-            districts = db.query(
-                District.id,
-                District.district_number,
-                District.district_name,
-                District.area_km2,
-                District.perimeter_km,
-                ST_AsGeoJSON(District.geometry).label('geometry')
-            ).all()
+            version = DistrictService.get_districts_version(db)
 
-            features = []
-            for district in districts:
-                feature = {
-                    "type": "Feature",
-                    "properties": {
-                        "id": district.id,
-                        "district_number": district.district_number,
-                        "district_name": district.district_name,
-                        "area_km2": district.area_km2,
-                        "perimeter_km": district.perimeter_km
-                    },
-                    "geometry": json.loads(district.geometry)
-                }
-                features.append(feature)
-
-            geojson = {
-                "type": "FeatureCollection",
-                "features": features
-            }
+            with _geojson_lock:
+                if version != _geojson_version:
+                    logger.info(f"Districts GeoJSON cache refreshed (version {version})")
+                    _geojson_cache.clear()
+                    for level in GEOJSON_TOLERANCES:
+                        body = DistrictService._build_geojson(db, level)
+                        etag = '"' + hashlib.sha1(f"{version}|{level}".encode()).hexdigest() + '"'
+                        _geojson_cache[level] = (etag, body)
+                    _geojson_version = version
 
-            return geojson
+                return _geojson_cache[tolerance]
 
         except Exception as e:
             logger.error(f"Error getting districts GeoJSON: {e}")
             raise
 
+    @staticmethod
+    def get_districts_geojson(db: Session) -> Dict:
+        """
+        Retorna todos los distritos en formato GeoJSON
+        """
+        _, body = DistrictService.get_districts_geojson_cached(db)
+        return json.loads(body)
+
     @staticmethod
     def get_district_by_point(db: Session, latitude: float, longitude: float) -> Optional[District]:
         """
@@ -85,10 +193,10 @@ class DistrictService:
             Distrito que contiene el punto o None
         """
         try:
-            point_wkt = f'POINT({longitude} {latitude})'
+            statement = prepared(db, 'district_by_point').columns(*District.__table__.columns)
 
-            district = db.query(District).filter(
-                ST_Contains(District.geometry, text(f"ST_GeomFromText('{point_wkt}', 4326)"))
+            district = db.query(District).from_statement(statement).params(
+                lon=longitude, lat=latitude
             ).first()
 
             return district
@@ -102,6 +210,8 @@ class DistrictService:
         """
         Cuenta las ubicaciones dentro de un distrito específico
 
+        Lee del rollup district_daily_stats que mantiene el ETL.
+
         Args:
             db: Sesión de base de datos
             district_number: Número del distrito
@@ -110,58 +220,147 @@ class DistrictService:
             Cantidad de ubicaciones en el distrito
         """
         try:
-            district = DistrictService.get_district_by_number(db, district_number)
-            if not district:
-                return 0
-
-            count = db.query(func.count(Location.id)).filter(
-                ST_Contains(district.geometry, Location.location_geom)
+            count = db.query(func.sum(DistrictDailyStats.point_count)).join(
+                District, DistrictDailyStats.district_id == District.id
+            ).filter(
+                District.district_number == district_number
             ).scalar()
 
-            return count or 0
+            return int(count or 0)
 
         except Exception as e:
             logger.error(f"Error counting locations in district: {e}")
             return 0
 
+    @staticmethod
+    def _locations_query(district_id: int, after_id: Optional[int] = None):
+        """
+        SELECT solo con las columnas de LOCATION_COLUMNS de un distrito,
+        ordenado por id (rango sobre el índice (district_id, id))
+        """
+        stmt = select(*LOCATION_COLUMNS).where(Location.district_id == district_id)
+        if after_id is not None:
+            stmt = stmt.where(Location.id > after_id)
+        return stmt.order_by(Location.id)
+
     @staticmethod
     def get_locations_in_district(
         db: Session,
         district_number: int,
         limit: int = 1000,
-        offset: int = 0
-    ) -> List[Location]:
+        after_id: Optional[int] = None
+    ) -> List:
         """
-        Obtiene las ubicaciones dentro de un distrito
+        Obtiene una página de ubicaciones dentro de un distrito
+
+        Usa paginación por keyset: se piden las filas con id > after_id, así
+        el costo de una página no depende de qué tan profunda sea.
 
         Args:
             db: Sesión de base de datos
             district_number: Número del distrito
             limit: Límite de resultados
-            offset: Offset para paginación
+            after_id: Último id de la página anterior (None = primera página)
 
         Returns:
-            Lista de ubicaciones en el distrito
+            Lista de filas con las columnas de LOCATION_COLUMNS
         """
         try:
             district = DistrictService.get_district_by_number(db, district_number)
             if not district:
                 return []
 
-            locations = db.query(Location).filter(
-                ST_Contains(district.geometry, Location.location_geom)
-            ).limit(limit).offset(offset).all()
-
-            return locations
+            stmt = DistrictService._locations_query(district.id, after_id).limit(limit)
+            return db.execute(stmt).all()
 
         except Exception as e:
             logger.error(f"Error getting locations in district: {e}")
             return []
 
     @staticmethod
+    def iter_locations_in_district(district_id: int, batch_size: int = 10000) -> Iterator[List]:
+        """
+        Recorre todas las ubicaciones de un distrito en lotes con un cursor del servidor
+
+        Abre su propia conexión para poder usarse dentro de un StreamingResponse;
+        la memoria usada queda acotada a un lote.
+
+        Args:
+            district_id: ID (no número) del distrito
+            batch_size: Filas por lote
+
+        Yields:
+            Listas de filas con las columnas de LOCATION_COLUMNS
+        """
+        with engine.connect() as conn:
+            result = conn.execution_options(
+                stream_results=True, yield_per=batch_size
+            ).execute(DistrictService._locations_query(district_id))
+
+            for partition in result.partitions():
+                yield partition
+
+    @staticmethod
+    def _statistics_query(db: Session):
+        """
+        Consulta agregada de estadísticas por distrito
+
+        Lee de los rollups district_daily_stats / district_daily_devices, por lo
+        que su costo depende de distritos × días y no del tamaño de locations.
+        El LEFT JOIN mantiene los distritos sin puntos.
+        """
+        totals = db.query(
+            DistrictDailyStats.district_id.label('district_id'),
+            func.sum(DistrictDailyStats.point_count).label('total_locations'),
+            (func.sum(DistrictDailyStats.battery_sum)
+             / func.nullif(func.sum(DistrictDailyStats.battery_count), 0)).label('avg_battery'),
+            (func.sum(DistrictDailyStats.signal_sum)
+             / func.nullif(func.sum(DistrictDailyStats.signal_count), 0)).label('avg_signal'),
+            (func.sum(DistrictDailyStats.speed_sum)
+             / func.nullif(func.sum(DistrictDailyStats.speed_count), 0)).label('avg_speed'),
+        ).group_by(DistrictDailyStats.district_id).subquery()
+
+        devices = db.query(
+            DistrictDailyDevice.district_id.label('district_id'),
+            func.count(func.distinct(DistrictDailyDevice.device_id)).label('unique_devices'),
+        ).group_by(DistrictDailyDevice.district_id).subquery()
+
+        return db.query(
+            District.district_number,
+            District.district_name,
+            District.area_km2,
+            District.perimeter_km,
+            totals.c.total_locations,
+            devices.c.unique_devices,
+            totals.c.avg_battery,
+            totals.c.avg_signal,
+            totals.c.avg_speed,
+        ).outerjoin(
+            totals, totals.c.district_id == District.id
+        ).outerjoin(
+            devices, devices.c.district_id == District.id
+        )
+
+    @staticmethod
+    def _format_statistics(stats) -> Dict:
+        """Convierte una fila de estadísticas en diccionario de respuesta"""
+        return {
+            "district_number": stats.district_number,
+            "district_name": stats.district_name,
+            "area_km2": stats.area_km2,
+            "perimeter_km": stats.perimeter_km,
+            "total_locations": int(stats.total_locations or 0),
+            "unique_devices": stats.unique_devices or 0,
+            "avg_battery": round(stats.avg_battery, 2) if stats.avg_battery else None,
+            "avg_signal": round(stats.avg_signal, 2) if stats.avg_signal else None,
+            "avg_speed": round(stats.avg_speed, 2) if stats.avg_speed else None,
+        }
+
+    @staticmethod
+    @cached('district_statistics', warm_args=lambda db: db.query(District.district_number).all())
     def get_district_statistics(db: Session, district_number: int) -> Dict:
         """
-        Obtiene estadísticas de un distrito
+        Obtiene estadísticas de un distrito (cacheada por watermark)
 
         Args:
             db: Sesión de base de datos
@@ -171,56 +370,36 @@ class DistrictService:
             Diccionario con estadísticas del distrito
         """
         try:
-            district = DistrictService.get_district_by_number(db, district_number)
-            if not district:
-                return {}
-
-            # Consulta de estadísticas
-            stats = db.query(
-                func.count(Location.id).label('total_locations'),
-                func.count(func.distinct(Location.device_id)).label('unique_devices'),
-                func.avg(Location.battery).label('avg_battery'),
-                func.avg(Location.signal).label('avg_signal'),
-                func.avg(Location.speed).label('avg_speed'),
-            ).filter(
-                ST_Contains(district.geometry, Location.location_geom)
+            stats = DistrictService._statistics_query(db).filter(
+                District.district_number == district_number
             ).first()
 
-            return {
-                "district_number": district.district_number,
-                "district_name": district.district_name,
-                "area_km2": district.area_km2,
-                "perimeter_km": district.perimeter_km,
-                "total_locations": stats.total_locations or 0,
-                "unique_devices": stats.unique_devices or 0,
-                "avg_battery": round(stats.avg_battery, 2) if stats.avg_battery else None,
-                "avg_signal": round(stats.avg_signal, 2) if stats.avg_signal else None,
-                "avg_speed": round(stats.avg_speed, 2) if stats.avg_speed else None,
-            }
+            if not stats:
+                return {}
+
+            return DistrictService._format_statistics(stats)
 
         except Exception as e:
             logger.error(f"Error getting district statistics: {e}")
             return {}
 
     @staticmethod
+    @cached('district_statistics_all')
     def get_all_districts_statistics(db: Session) -> List[Dict]:
         """
-        Obtiene estadísticas de todos los distritos
+        Obtiene estadísticas de todos los distritos en una sola consulta
+        sobre los rollups (cacheada por watermark)
 
         Returns:
             Lista de diccionarios con estadísticas por distrito
         """
         try:
-            districts = DistrictService.get_all_districts(db)
-            statistics = []
-
-            for district in districts:
-                stats = DistrictService.get_district_statistics(db, district.district_number)
-                statistics.append(stats)
+            rows = DistrictService._statistics_query(db).order_by(
+                District.district_number
+            ).all()
 
-            return statistics
+            return [DistrictService._format_statistics(stats) for stats in rows]
 
         except Exception as e:
             logger.error(f"Error getting all districts statistics: {e}")
             return []
-
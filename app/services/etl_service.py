@@ -1,8 +1,11 @@
 # app/services/etl_service.py
+from pyspark import StorageLevel
 from pyspark.sql import SparkSession
+from pyspark.sql.functions import count, max as spark_max
 from app.config import settings
 from app.database.supabase_utils import get_supabase_client
 from app.spark.transformations import transform_locations, aggregate_by_grid, get_statistics
+from app.utils.telemetry import ETLTelemetry
 import logging
 import time
 from typing import Optional, Dict
@@ -18,6 +21,7 @@ class ETLService:
     def __init__(self):
         self.supabase = get_supabase_client()
         self.spark = self._init_spark()
+        self.telemetry = ETLTelemetry()
 
     def _init_spark(self) -> SparkSession:
         """Inicializa sesión de Spark"""
@@ -87,6 +91,41 @@ class ETLService:
             logger.error(f"✗ Error extracting: {e}")
             raise
 
+    def extract_distributed(
+            self,
+            start_date: Optional[str] = None,
+            end_date: Optional[str] = None,
+            last_id: Optional[int] = None
+    ):
+        """
+        Extrae a un DataFrame sin pasar las filas por el driver
+
+        Se persiste en los executors: transform_locations ejecuta varias
+        acciones y sin caché cada una volvería a leer el origen.
+        """
+        try:
+            logger.info("=" * 70)
+            logger.info(f"EXTRACTING FROM SUPABASE (extractor: {settings.ETL_EXTRACTOR})")
+            logger.info("=" * 70)
+
+            if last_id:
+                logger.info(f"Incremental load from ID > {last_id}")
+
+            if settings.ETL_EXTRACTOR == "spark":
+                from app.spark.supabase_source import read_supabase
+                df = read_supabase(self.spark, last_id=last_id, start_date=start_date, end_date=end_date)
+            elif settings.ETL_EXTRACTOR == "jdbc":
+                from app.spark.supabase_source import read_supabase_jdbc
+                df = read_supabase_jdbc(self.spark, last_id=last_id, start_date=start_date, end_date=end_date)
+            else:
+                raise ValueError(f"Unknown ETL_EXTRACTOR: {settings.ETL_EXTRACTOR}")
+
+            return df.persist(StorageLevel.MEMORY_AND_DISK)
+
+        except Exception as e:
+            logger.error(f"✗ Error extracting: {e}")
+            raise
+
     def transform_with_spark(self, data: list) -> tuple:
         """Transforma datos con Spark"""
         try:
@@ -100,45 +139,63 @@ class ETLService:
 
             # Normalizar tipos de datos para evitar conflictos DoubleType/LongType
             logger.info("Normalizing data types...")
-            normalized_data = []
-            for record in data:
-                normalized_record = record.copy()
-                # Convertir campos numéricos a tipos consistentes
-                if 'latitude' in normalized_record and normalized_record['latitude'] is not None:
-                    normalized_record['latitude'] = float(normalized_record['latitude'])
-                if 'longitude' in normalized_record and normalized_record['longitude'] is not None:
-                    normalized_record['longitude'] = float(normalized_record['longitude'])
-                if 'altitude' in normalized_record and normalized_record['altitude'] is not None:
-                    normalized_record['altitude'] = float(normalized_record['altitude'])
-                if 'speed' in normalized_record and normalized_record['speed'] is not None:
-                    normalized_record['speed'] = float(normalized_record['speed'])
-                if 'battery' in normalized_record and normalized_record['battery'] is not None:
-                    normalized_record['battery'] = int(normalized_record['battery'])
-                if 'signal' in normalized_record and normalized_record['signal'] is not None:
-                    normalized_record['signal'] = int(normalized_record['signal'])
-                if 'id' in normalized_record and normalized_record['id'] is not None:
-                    normalized_record['id'] = int(normalized_record['id'])
-                normalized_data.append(normalized_record)
-
-            # Crear DataFrame
-            df = self.spark.createDataFrame(normalized_data)
-            logger.info(f"Input records: {df.count():,}")
+            with self.telemetry.stage("normalize", records=len(data)):
+                df = self._normalize_to_dataframe(data)
+
+            return self.transform_dataframe(df)
+
+        except Exception as e:
+            logger.error(f"✗ Error transforming: {e}")
+            raise
 
+    def _normalize_to_dataframe(self, data: list):
+        """Normaliza tipos de la lista de dicts y crea el DataFrame de Spark"""
+        normalized_data = []
+        for record in data:
+            normalized_record = record.copy()
+            # Convertir campos numéricos a tipos consistentes
+            if 'latitude' in normalized_record and normalized_record['latitude'] is not None:
+                normalized_record['latitude'] = float(normalized_record['latitude'])
+            if 'longitude' in normalized_record and normalized_record['longitude'] is not None:
+                normalized_record['longitude'] = float(normalized_record['longitude'])
+            if 'altitude' in normalized_record and normalized_record['altitude'] is not None:
+                normalized_record['altitude'] = float(normalized_record['altitude'])
+            if 'speed' in normalized_record and normalized_record['speed'] is not None:
+                normalized_record['speed'] = float(normalized_record['speed'])
+            if 'battery' in normalized_record and normalized_record['battery'] is not None:
+                normalized_record['battery'] = int(normalized_record['battery'])
+            if 'signal' in normalized_record and normalized_record['signal'] is not None:
+                normalized_record['signal'] = int(normalized_record['signal'])
+            if 'id' in normalized_record and normalized_record['id'] is not None:
+                normalized_record['id'] = int(normalized_record['id'])
+            normalized_data.append(normalized_record)
+
+        # Crear DataFrame
+        df = self.spark.createDataFrame(normalized_data)
+        logger.info(f"Input records: {df.count():,}")
+        return df
+
+    def transform_dataframe(self, df) -> tuple:
+        """Transforma un DataFrame crudo (esquema de Supabase) con Spark"""
+        try:
             # Transformar
-            df_transformed = transform_locations(df)
+            with self.telemetry.stage("transform"):
+                df_transformed = transform_locations(df)
 
-            # Mostrar muestra
-            logger.info("\nSample transformed data:")
-            df_transformed.select(
-                "id", "latitude", "longitude", "period",
-                "altitude_range", "battery_level", "network_generation"
-            ).show(5, truncate=False)
+                # Mostrar muestra
+                logger.info("\nSample transformed data:")
+                df_transformed.select(
+                    "id", "latitude", "longitude", "period",
+                    "altitude_range", "battery_level", "network_generation"
+                ).show(5, truncate=False)
 
-            # Agregar por grilla
+            # Agregar por grilla (perezoso: el costo se mide al cargar grid_analysis)
             df_grid = aggregate_by_grid(df_transformed, grid_size=0.01)
 
             # Calcular estadísticas
-            statistics = get_statistics(df_transformed)
+            with self.telemetry.stage("stats") as stage:
+                statistics = get_statistics(df_transformed)
+                stage["records"] = statistics['total_points']
 
             logger.info("\n" + "=" * 70)
             logger.info("STATISTICS")
@@ -199,6 +256,9 @@ class ETLService:
     ) -> Dict:
         """Ejecuta ETL completo con modo incremental"""
         start_time = time.time()
+        self.telemetry = ETLTelemetry()
+        self.supabase.reset_counters()
+        last_id = None
 
         try:
             logger.info("\n" + "=" * 70)
@@ -206,33 +266,48 @@ class ETLService:
             logger.info("=" * 70)
 
             # Obtener último ID procesado si es incremental
-            last_id = None
             if incremental:
                 from app.database.postgres_db import SessionLocal
-                from app.models.etl_control import ETLControl
+                from app.services.watermark_service import get_last_processed_id
                 db = SessionLocal()
                 try:
-                    last_run = db.query(ETLControl).filter(
-                        ETLControl.status == 'SUCCESS'
-                    ).order_by(ETLControl.execution_date.desc()).first()
+                    last_id = get_last_processed_id(db) or None
 
-                    if last_run:
-                        last_id = last_run.last_processed_id
+                    if last_id:
                         logger.info(f"Last processed ID: {last_id}")
                     else:
                         logger.info("No previous run found, loading all data")
                 finally:
                     db.close()
 
-            # 1. Extract
-            raw_data = await self.extract_from_supabase(start_date, end_date, last_id)
-
-            if not raw_data:
-                logger.info("No new data to process")
-                return {"status": "warning", "message": "No new data"}
-
-            # 2. Transform
-            df_transformed, df_grid, statistics = self.transform_with_spark(raw_data)
+            # 1. Extract + 2. Transform
+            df_source = None
+            if settings.ETL_EXTRACTOR == "rest":
+                with self.telemetry.stage("extract") as stage:
+                    raw_data = await self.extract_from_supabase(start_date, end_date, last_id)
+                    stage["records"] = len(raw_data)
+
+                if not raw_data:
+                    logger.info("No new data to process")
+                    return {"status": "warning", "message": "No new data"}
+
+                records_fetched = len(raw_data)
+                max_id = max([r['id'] for r in raw_data])
+                df_transformed, df_grid, statistics = self.transform_with_spark(raw_data)
+            else:
+                with self.telemetry.stage("extract") as stage:
+                    df_source = self.extract_distributed(start_date, end_date, last_id)
+                    summary = df_source.agg(count("id").alias("n"), spark_max("id").alias("max_id")).first()
+                    records_fetched = stage["records"] = summary["n"]
+
+                if not records_fetched:
+                    df_source.unpersist()
+                    logger.info("No new data to process")
+                    return {"status": "warning", "message": "No new data"}
+
+                max_id = summary["max_id"]
+                logger.info(f"✓ Extracted {records_fetched:,} records")
+                df_transformed, df_grid, statistics = self.transform_dataframe(df_source)
 
             if df_transformed is None:
                 raise Exception("Transformation failed")
@@ -254,51 +329,87 @@ class ETLService:
             if 'processed_at' not in df_transformed.columns:
                 df_transformed = df_transformed.withColumn('processed_at', current_timestamp())
 
+            from app.database.postgres_db import SessionLocal
+
+            # Un intento anterior que falló después de cargar deja filas del
+            # rango sin registrar: se borran para que el append no choque con la PK
+            if incremental:
+                from sqlalchemy import text
+                db = SessionLocal()
+                try:
+                    leftover = db.execute(text("""
+                        DELETE FROM locations WHERE id > :from_id AND id <= :to_id
+                    """), {"from_id": last_id or 0, "to_id": max_id}).rowcount
+                    db.commit()
+                    if leftover:
+                        logger.info(f"Removed {leftover:,} rows left by a failed run")
+                finally:
+                    db.close()
+
             # Cargar tabla principal
-            records_loaded = self.load_to_postgres(
-                df_transformed,
-                "locations",
-                mode=mode
-            )
+            with self.telemetry.stage("load") as stage:
+                records_loaded = stage["records"] = self.load_to_postgres(
+                    df_transformed,
+                    "locations",
+                    mode=mode
+                )
 
             # Cargar grilla (siempre overwrite porque es agregación)
-            records_grid = self.load_to_postgres(df_grid, "grid_analysis", mode="overwrite")
+            with self.telemetry.stage("grid") as stage:
+                records_grid = stage["records"] = self.load_to_postgres(df_grid, "grid_analysis", mode="overwrite")
 
             # 4. Asignar distrito y provincia a cada punto
             logger.info("\n" + "=" * 70)
             logger.info("ASIGNANDO UBICACIÓN GEOGRÁFICA")
             logger.info("=" * 70)
 
-            from app.database.postgres_db import SessionLocal
             from app.services.location_service import bulk_assign_geographic_location
 
+            from app.services.rollup_service import update_all_rollups, rebuild_all_rollups
+
+            # Asignación, rollups y fila de control en una sola transacción (como
+            # los micro-lotes): si algo falla la corrida queda FAILED y el rango
+            # (last_id, max_id] se vuelve a procesar en la próxima
             db = SessionLocal()
             try:
-                rows_updated = bulk_assign_geographic_location(db)
+                # En modo incremental solo se recorre el lote recién cargado; el
+                # límite inferior 0 deja afuera los ids negativos de /ingest, que
+                # write_batch ya sumó a los rollups
+                with self.telemetry.stage("assign") as stage:
+                    if incremental:
+                        rows_updated = bulk_assign_geographic_location(
+                            db, from_id=last_id or 0, to_id=max_id, commit=False
+                        )
+                    else:
+                        rows_updated = bulk_assign_geographic_location(db, commit=False)
+                    stage["records"] = rows_updated
                 logger.info(f"✓ {rows_updated:,} puntos asignados a distrito y provincia")
+
+                # Actualizar rollups de estadísticas con el lote recién asignado
+                with self.telemetry.stage("rollups", records=records_loaded):
+                    if incremental:
+                        update_all_rollups(db, from_id=last_id or 0, to_id=max_id, commit=False)
+                    else:
+                        rebuild_all_rollups(db, commit=False)
+
+                # 5. Registrar ejecución exitosa (con telemetría por etapa)
+                self._add_control(db, 'SUCCESS', max_id, records_loaded)
+                db.commit()
+                logger.info(f"✓ ETL control registered (last_id: {max_id})")
             except Exception as e:
+                db.rollback()
                 logger.error(f"✗ Error asignando ubicaciones: {e}")
+                raise
             finally:
                 db.close()
 
-            # 5. Registrar ejecución exitosa
-            max_id = max([r['id'] for r in raw_data])
+            # 6. Pregenerar tiles vectoriales con el nuevo watermark
+            from app.services.tile_service import pregenerate_tiles
             db = SessionLocal()
             try:
-                from app.models.etl_control import ETLControl
-                from datetime import datetime
-                control = ETLControl(
-                    execution_date=datetime.utcnow(),
-                    last_processed_id=max_id,
-                    records_processed=records_loaded,
-                    status='SUCCESS',
-                    execution_time_seconds=int(time.time() - start_time)
-                )
-                db.add(control)
-                db.commit()
-                logger.info(f"✓ ETL control registered (last_id: {max_id})")
+                pregenerate_tiles(db)
             except Exception as e:
-                logger.error(f"Error registering control: {e}")
+                logger.error(f"Error pregenerating tiles: {e}")
             finally:
                 db.close()
 
@@ -312,27 +423,101 @@ class ETLService:
             logger.info(f"Records: {records_loaded:,}")
             logger.info(f"Grid cells: {records_grid:,}")
             logger.info(f"Last ID: {max_id}")
+            logger.info(f"Stages: {self.telemetry.summary()}")
             logger.info("=" * 70 + "\n")
 
+            if df_source is not None:
+                df_source.unpersist()
+
             return {
                 "status": "success",
-                "records_processed": len(raw_data),
+                "records_processed": records_fetched,
                 "records_inserted": records_loaded,
                 "grid_cells": records_grid,
                 "execution_time": round(execution_time, 2),
                 "last_id": max_id,
+                "stages": self.telemetry.summary(),
                 "statistics": statistics
             }
 
         except Exception as e:
             execution_time = time.time() - start_time
             logger.error(f"\n✗ ETL FAILED: {e}")
+            self._register_run('FAILED', last_id or 0, 0, error_message=str(e))
             return {
                 "status": "error",
                 "message": str(e),
                 "execution_time": round(execution_time, 2)
             }
 
+    def _register_run(
+            self,
+            status: str,
+            last_processed_id: int,
+            records: int,
+            error_message: Optional[str] = None
+    ) -> Optional[int]:
+        """
+        Registra la ejecución en etl_control junto con sus etapas (etl_stage_metrics)
+
+        Returns:
+            id de la fila de etl_control, o None si no se pudo registrar
+        """
+        from app.database.postgres_db import SessionLocal
+
+        db = SessionLocal()
+        try:
+            control = self._add_control(db, status, last_processed_id, records, error_message)
+            db.commit()
+            return control.id
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error registering control: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _add_control(
+            self,
+            db,
+            status: str,
+            last_processed_id: int,
+            records: int,
+            error_message: Optional[str] = None
+    ):
+        """
+        Agrega la fila de etl_control y sus etapas a la sesión, sin commit
+
+        Returns:
+            La fila ETLControl (con id asignado)
+        """
+        from app.models.etl_control import ETLControl, ETLStageMetric
+        from datetime import datetime
+
+        with self.telemetry.stage("control"):
+            elapsed = self.telemetry.elapsed()
+            control = ETLControl(
+                execution_date=datetime.utcnow(),
+                last_processed_id=last_processed_id,
+                records_processed=records,
+                status=status,
+                execution_time_seconds=int(elapsed),
+                error_message=error_message[:500] if error_message else None,
+                rows_per_second=round(records / elapsed, 1) if records and elapsed > 0 else None,
+                bytes_fetched=self.supabase.bytes_fetched,
+                supabase_retries=self.supabase.retries,
+                peak_memory_mb=self.telemetry.peak_memory_mb()
+            )
+            db.add(control)
+            db.flush()
+
+        db.add_all([
+            ETLStageMetric(etl_control_id=control.id, **entry)
+            for entry in self.telemetry.stages
+        ])
+        db.flush()
+        return control
+
     def cleanup(self):
         """Limpia recursos"""
         if self.spark:
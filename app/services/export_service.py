@@ -0,0 +1,266 @@
+"""
+Servicio para exportar ubicaciones en formatos columnares (Arrow IPC / Parquet)
+
+Las filas se leen con un cursor del servidor y se convierten lote por lote a
+RecordBatches, sin armar listas con todo el resultado. Los rangos grandes se
+exportan en segundo plano a un archivo en EXPORT_DIR; los trabajos terminados
+y sus archivos se borran pasado EXPORT_JOB_TTL_SECONDS.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from app.config import settings
+from app.database.postgres_db import engine
+from app.models.db_models import Location, District, DistrictDailyStats, GlobalDailyStats
+from app.models.schemas import ExportFilters
+from app.utils.streaming import (
+    arrow_ipc_stream, parquet_stream, ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE
+)
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import threading
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = (
+    Location.id,
+    Location.device_id,
+    Location.timestamp,
+    Location.latitude,
+    Location.longitude,
+    Location.altitude,
+    Location.speed,
+    Location.battery,
+    Location.signal,
+    Location.network_generation,
+    Location.sim_operator,
+    Location.district_id,
+    Location.province_id,
+)
+
+# formato -> (función de streaming, media type, extensión de archivo)
+EXPORT_FORMATS = {
+    'arrow': (arrow_ipc_stream, ARROW_STREAM_MEDIA_TYPE, 'arrows'),
+    'parquet': (parquet_stream, PARQUET_MEDIA_TYPE, 'parquet'),
+}
+
+# Trabajos de exportación en segundo plano: job_id -> estado
+_jobs: Dict[str, Dict] = {}
+_jobs_lock = threading.Lock()
+
+
+def export_arrow_schema():
+    """Schema Arrow de EXPORT_COLUMNS"""
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.int64()),
+        ("device_id", pa.string()),
+        ("timestamp", pa.timestamp("us")),
+        ("latitude", pa.float64()),
+        ("longitude", pa.float64()),
+        ("altitude", pa.float64()),
+        ("speed", pa.float64()),
+        ("battery", pa.float64()),
+        ("signal", pa.float64()),
+        ("network_generation", pa.string()),
+        ("sim_operator", pa.string()),
+        ("district_id", pa.int32()),
+        ("province_id", pa.int32()),
+    ])
+
+
+def _export_query(filters: ExportFilters, district_id: Optional[int] = None):
+    """SELECT de EXPORT_COLUMNS con los filtros, ordenado por id"""
+    stmt = select(*EXPORT_COLUMNS)
+    if filters.start_date:
+        stmt = stmt.where(Location.timestamp >= filters.start_date)
+    if filters.end_date:
+        stmt = stmt.where(Location.timestamp < filters.end_date + timedelta(days=1))
+    if district_id is not None:
+        stmt = stmt.where(Location.district_id == district_id)
+    if filters.operator:
+        stmt = stmt.where(Location.sim_operator == filters.operator)
+    if filters.network_type:
+        stmt = stmt.where(Location.network_generation == filters.network_type)
+    return stmt.order_by(Location.id)
+
+
+def resolve_district_id(db: Session, filters: ExportFilters) -> Optional[int]:
+    """
+    ID del distrito pedido en los filtros
+
+    Raises:
+        ValueError: si district_number no existe
+    """
+    if filters.district_number is None:
+        return None
+    district_id = db.query(District.id).filter(
+        District.district_number == filters.district_number
+    ).scalar()
+    if district_id is None:
+        raise ValueError(f"District {filters.district_number} not found")
+    return district_id
+
+
+def estimate_export_rows(db: Session, filters: ExportFilters, district_id: Optional[int] = None) -> int:
+    """
+    Cota superior de filas a exportar, leída de los rollups diarios
+
+    No considera operador ni red, así que puede sobreestimar.
+    """
+    if district_id is not None:
+        query = db.query(func.sum(DistrictDailyStats.point_count)).filter(
+            DistrictDailyStats.district_id == district_id
+        )
+        date_column = DistrictDailyStats.date
+    else:
+        query = db.query(func.sum(GlobalDailyStats.point_count))
+        date_column = GlobalDailyStats.date
+
+    if filters.start_date:
+        query = query.filter(date_column >= filters.start_date)
+    if filters.end_date:
+        query = query.filter(date_column <= filters.end_date)
+
+    return int(query.scalar() or 0)
+
+
+def iter_export_batches(filters: ExportFilters, district_id: Optional[int] = None) -> Iterator[List]:
+    """
+    Recorre las filas a exportar en lotes con un cursor del servidor
+
+    Abre su propia conexión para poder usarse dentro de un StreamingResponse
+    o de un trabajo en segundo plano.
+
+    Yields:
+        Listas de filas con las columnas de EXPORT_COLUMNS
+    """
+    with engine.connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, yield_per=settings.EXPORT_BATCH_SIZE
+        ).execute(_export_query(filters, district_id))
+
+        for partition in result.partitions():
+            yield partition
+
+
+def stream_export(filters: ExportFilters, format: str, district_id: Optional[int] = None) -> Iterator[bytes]:
+    """Bytes del archivo exportado (Arrow IPC o Parquet), generados por lote"""
+    stream, _, _ = EXPORT_FORMATS[format]
+    return stream(iter_export_batches(filters, district_id), export_arrow_schema())
+
+
+def purge_expired_jobs() -> int:
+    """
+    Borra los trabajos terminados hace más de EXPORT_JOB_TTL_SECONDS y sus archivos
+
+    También borra archivos de EXPORT_DIR sin trabajo registrado (p. ej. de
+    antes de un reinicio) con la misma antigüedad.
+
+    Returns:
+        Cantidad de archivos borrados
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.EXPORT_JOB_TTL_SECONDS)
+
+    with _jobs_lock:
+        expired = [
+            job_id for job_id, job in _jobs.items()
+            if job["finished_at"] and datetime.fromisoformat(job["finished_at"]) < cutoff
+        ]
+        expired_paths = [Path(_jobs.pop(job_id)["path"]) for job_id in expired]
+        active_paths = {job["path"] for job in _jobs.values()}
+
+    removed = 0
+    for path in expired_paths:
+        if path.exists():
+            path.unlink(missing_ok=True)
+            removed += 1
+
+    export_dir = Path(settings.EXPORT_DIR)
+    if not export_dir.is_dir():
+        return removed
+
+    for path in export_dir.iterdir():
+        if not path.is_file() or str(path) in active_paths:
+            continue
+        if datetime.utcfromtimestamp(path.stat().st_mtime) < cutoff:
+            path.unlink(missing_ok=True)
+            removed += 1
+
+    if removed:
+        logger.info(f"Purged {removed} expired export files ({len(expired)} jobs)")
+    return removed
+
+
+def create_export_job(filters: ExportFilters, format: str, district_id: Optional[int] = None) -> Dict:
+    """
+    Registra un trabajo de exportación en segundo plano
+
+    Antes de registrarlo purga los trabajos vencidos (ver purge_expired_jobs).
+
+    Returns:
+        Estado inicial del trabajo (ejecutarlo con run_export_job)
+    """
+    try:
+        purge_expired_jobs()
+    except Exception as e:
+        logger.error(f"Error purging expired exports: {e}")
+
+    job_id = uuid.uuid4().hex
+    _, _, extension = EXPORT_FORMATS[format]
+    job = {
+        "job_id": job_id,
+        "status": "PENDING",
+        "format": format,
+        "filters": filters.model_dump(mode="json"),
+        "district_id": district_id,
+        "path": str(Path(settings.EXPORT_DIR) / f"{job_id}.{extension}"),
+        "bytes_written": 0,
+        "created_at": datetime.utcnow().isoformat(),
+        "finished_at": None,
+        "error": None,
+    }
+    with _jobs_lock:
+        _jobs[job_id] = job
+    return dict(job)
+
+
+def run_export_job(job_id: str):
+    """Escribe el archivo del trabajo; pensado para BackgroundTasks"""
+    with _jobs_lock:
+        job = _jobs[job_id]
+        job["status"] = "RUNNING"
+
+    path = Path(job["path"])
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        filters = ExportFilters(**job["filters"])
+
+        with open(tmp_path, "wb") as f:
+            for chunk in stream_export(filters, job["format"], job["district_id"]):
+                f.write(chunk)
+                job["bytes_written"] += len(chunk)
+        tmp_path.replace(path)
+
+        status, error = "SUCCESS", None
+        logger.info(f"✓ Export {job_id} finished ({job['bytes_written']:,} bytes)")
+
+    except Exception as e:
+        logger.error(f"Error running export {job_id}: {e}")
+        tmp_path.unlink(missing_ok=True)
+        status, error = "FAILED", str(e)
+
+    with _jobs_lock:
+        job.update(status=status, error=error, finished_at=datetime.utcnow().isoformat())
+
+
+def get_export_job(job_id: str) -> Optional[Dict]:
+    """Estado de un trabajo de exportación (None si no existe)"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
@@ -0,0 +1,151 @@
+"""
+Servicio para el heatmap por grilla
+
+Lee solo grid_analysis_detail (agregado por el ETL); nunca recorre locations.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from app.models.schemas import HeatmapRequest
+from app.services.rollup_service import BASE_GRID_SIZE
+from typing import Dict, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+HEATMAP_COLUMNS = ["lat_grid", "lon_grid", "point_count", "unique_devices", "avg_battery", "avg_signal"]
+
+
+def _build_filters(request: HeatmapRequest) -> Tuple[str, Dict]:
+    """Arma el WHERE con bbox (índice GiST de cell_geom) y filtros de red/operador"""
+    conditions = []
+    params = {}
+
+    if None not in (request.min_lat, request.max_lat, request.min_lon, request.max_lon):
+        conditions.append(
+            "cell_geom && ST_MakeEnvelope(:min_lon, :min_lat, :max_lon, :max_lat, 4326)"
+        )
+        params.update(
+            min_lat=request.min_lat, max_lat=request.max_lat,
+            min_lon=request.min_lon, max_lon=request.max_lon,
+        )
+    if request.network_type:
+        conditions.append("network_generation = :network_type")
+        params["network_type"] = request.network_type
+    if request.operator:
+        conditions.append("sim_operator = :operator")
+        params["operator"] = request.operator
+
+    return (" AND ".join(conditions) if conditions else "TRUE"), params
+
+
+def resolve_grid_factor(grid_size: float) -> int:
+    """
+    Cantidad de celdas base por lado de la celda pedida
+
+    El rollup está a BASE_GRID_SIZE, así que grid_size se redondea a un
+    múltiplo de esa celda (mínimo 1).
+    """
+    return max(1, round(grid_size / BASE_GRID_SIZE))
+
+
+def get_heatmap(db: Session, request: HeatmapRequest) -> Dict:
+    """
+    Heatmap compacto: columnas + filas como listas
+
+    Args:
+        db: Sesión de base de datos
+        request: Filtros de bbox, tamaño de celda, red y operador
+
+    Returns:
+        dict con grid_size efectivo, nombres de columnas y celdas
+    """
+    try:
+        factor = resolve_grid_factor(request.grid_size)
+        where, params = _build_filters(request)
+        params.update(base=BASE_GRID_SIZE, factor=factor)
+
+        # Índice entero de celda para evitar errores de redondeo al reagrupar
+        rows = db.execute(text(f"""
+            SELECT
+                FLOOR(ROUND(lat_grid / :base) / :factor) * :factor * :base AS lat_grid,
+                FLOOR(ROUND(lon_grid / :base) / :factor) * :factor * :base AS lon_grid,
+                SUM(point_count) AS point_count,
+                COUNT(DISTINCT device_id) AS unique_devices,
+                ROUND((SUM(battery_sum) / NULLIF(SUM(battery_count), 0))::numeric, 2) AS avg_battery,
+                ROUND((SUM(signal_sum) / NULLIF(SUM(signal_count), 0))::numeric, 2) AS avg_signal
+            FROM grid_analysis_detail
+            WHERE {where}
+            GROUP BY 1, 2
+            ORDER BY 1, 2
+        """), params).fetchall()
+
+        return {
+            "grid_size": round(factor * BASE_GRID_SIZE, 6),
+            "columns": HEATMAP_COLUMNS,
+            "cells": [
+                [
+                    round(float(row.lat_grid), 6),
+                    round(float(row.lon_grid), 6),
+                    int(row.point_count),
+                    row.unique_devices,
+                    float(row.avg_battery) if row.avg_battery is not None else None,
+                    float(row.avg_signal) if row.avg_signal is not None else None,
+                ]
+                for row in rows
+            ],
+        }
+
+    except Exception as e:
+        logger.error(f"Error getting heatmap: {e}")
+        raise
+
+
+def get_heatmap_cells(db: Session, request: HeatmapRequest) -> List[Dict]:
+    """
+    Heatmap detallado con distribuciones de red y operador por celda
+    (formato GridCellResponse)
+    """
+    try:
+        heatmap = get_heatmap(db, request)
+        factor = resolve_grid_factor(request.grid_size)
+        where, params = _build_filters(request)
+        params.update(base=BASE_GRID_SIZE, factor=factor)
+
+        rows = db.execute(text(f"""
+            SELECT
+                FLOOR(ROUND(lat_grid / :base) / :factor) * :factor * :base AS lat_grid,
+                FLOOR(ROUND(lon_grid / :base) / :factor) * :factor * :base AS lon_grid,
+                network_generation,
+                sim_operator,
+                SUM(point_count) AS point_count
+            FROM grid_analysis_detail
+            WHERE {where}
+            GROUP BY 1, 2, 3, 4
+        """), params).fetchall()
+
+        distributions: Dict[Tuple[float, float], Tuple[Dict, Dict]] = {}
+        for row in rows:
+            key = (round(float(row.lat_grid), 6), round(float(row.lon_grid), 6))
+            networks, operators = distributions.setdefault(key, ({}, {}))
+            networks[row.network_generation] = networks.get(row.network_generation, 0) + int(row.point_count)
+            operators[row.sim_operator] = operators.get(row.sim_operator, 0) + int(row.point_count)
+
+        cells = []
+        for lat, lon, point_count, unique_devices, avg_battery, avg_signal in heatmap["cells"]:
+            networks, operators = distributions.get((lat, lon), ({}, {}))
+            cells.append({
+                "lat_grid": lat,
+                "lon_grid": lon,
+                "point_count": point_count,
+                "unique_devices": unique_devices,
+                "avg_battery": avg_battery,
+                "avg_signal": avg_signal,
+                "network_distribution": networks,
+                "operator_distribution": operators,
+            })
+
+        return cells
+
+    except Exception as e:
+        logger.error(f"Error getting heatmap cells: {e}")
+        raise
@@ -3,7 +3,9 @@ Servicio para asignar ubicación geográfica (distrito y provincia) a puntos
 """
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+from app.database.postgres_db import prepared
 from app.models.db_models import District, Province
+from typing import Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,29 +24,16 @@ def get_district_and_province_for_point(db: Session, latitude: float, longitude:
         dict con district_id, district_name, province_id, province_name
     """
     try:
-        point_wkt = f'POINT({longitude} {latitude})'
-
-        # Buscar distrito
-        district = db.execute(text(f"""
-            SELECT id, district_number, district_name 
-            FROM districts 
-            WHERE ST_Contains(geometry, ST_GeomFromText('{point_wkt}', 4326))
-            LIMIT 1
-        """)).fetchone()
-
-        # Buscar provincia
-        province = db.execute(text(f"""
-            SELECT id, province_name 
-            FROM provinces 
-            WHERE ST_Contains(geometry, ST_GeomFromText('{point_wkt}', 4326))
-            LIMIT 1
-        """)).fetchone()
+        row = db.execute(
+            prepared(db, 'point_district_province'),
+            {'lon': longitude, 'lat': latitude}
+        ).fetchone()
 
         result = {
-            'district_id': district[0] if district else None,
-            'district_name': district[2] if district else None,
-            'province_id': province[0] if province else None,
-            'province_name': province[1] if province else None,
+            'district_id': row.district_id,
+            'district_name': row.district_name,
+            'province_id': row.province_id,
+            'province_name': row.province_name,
         }
 
         return result
@@ -59,20 +48,100 @@ def get_district_and_province_for_point(db: Session, latitude: float, longitude:
         }
 
 
-def bulk_assign_geographic_location(db: Session, batch_size: int = 1000):
+def get_district_and_province_for_points(
+    db: Session,
+    latitudes: List[float],
+    longitudes: List[float]
+) -> Dict[str, list]:
+    """
+    Resuelve distrito y provincia de muchos puntos en una sola consulta
+
+    Los puntos se envían como dos arreglos y se expanden con unnest; cada uno
+    se cruza con districts/provinces mediante LATERAL + ST_Contains (índice GiST).
+
+    Args:
+        db: Sesión de base de datos
+        latitudes: Latitudes de los puntos
+        longitudes: Longitudes de los puntos (mismo largo que latitudes)
+
+    Returns:
+        dict columnar con district_id, district_number, district_name,
+        province_id y province_name, en el mismo orden que la entrada
+    """
+    if len(latitudes) != len(longitudes):
+        raise ValueError("latitudes and longitudes must have the same length")
+
+    result = {
+        'district_id': [],
+        'district_number': [],
+        'district_name': [],
+        'province_id': [],
+        'province_name': [],
+    }
+    if not latitudes:
+        return result
+
+    rows = db.execute(text("""
+        SELECT d.id, d.district_number, d.district_name, pr.id, pr.province_name
+        FROM unnest(CAST(:lats AS float8[]), CAST(:lons AS float8[]))
+            WITH ORDINALITY AS p(lat, lon, ord)
+        LEFT JOIN LATERAL (
+            SELECT id, district_number, district_name
+            FROM districts
+            WHERE ST_Contains(geometry, ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326))
+            LIMIT 1
+        ) d ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT id, province_name
+            FROM provinces
+            WHERE ST_Contains(geometry, ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326))
+            LIMIT 1
+        ) pr ON TRUE
+        ORDER BY p.ord
+    """), {'lats': list(latitudes), 'lons': list(longitudes)}).fetchall()
+
+    for row in rows:
+        result['district_id'].append(row[0])
+        result['district_number'].append(row[1])
+        result['district_name'].append(row[2])
+        result['province_id'].append(row[3])
+        result['province_name'].append(row[4])
+
+    return result
+
+
+def bulk_assign_geographic_location(
+    db: Session,
+    batch_size: int = 1000,
+    from_id: Optional[int] = None,
+    to_id: Optional[int] = None,
+    commit: bool = True,
+    table: str = "locations"
+):
     """
     Asigna distrito y provincia a todas las ubicaciones que no lo tienen
 
     Args:
         db: Sesión de base de datos
         batch_size: Tamaño del lote para procesar
+        from_id: Solo ids mayores a este (None = sin límite)
+        to_id: Solo ids menores o iguales a este (None = sin límite)
+        commit: False para dejar el UPDATE en la transacción del llamador
+        table: Tabla a actualizar (locations o la tabla sombra del backfill)
     """
     try:
         logger.info("Iniciando asignación masiva de ubicaciones geográficas...")
 
+        # Con rango de ids el UPDATE usa la PK en vez de recorrer toda la tabla
+        id_conditions = ""
+        if from_id is not None:
+            id_conditions += " AND l.id > :from_id"
+        if to_id is not None:
+            id_conditions += " AND l.id <= :to_id"
+
         # Actualizar usando SQL directo para mejor performance
-        sql = text("""
-            UPDATE locations l
+        sql = text(f"""
+            UPDATE {table} l
             SET 
                 district_id = d.id,
                 district_name = d.district_name,
@@ -82,11 +151,12 @@ def bulk_assign_geographic_location(db: Session, batch_size: int = 1000):
             WHERE 
                 ST_Contains(d.geometry, l.location_geom)
                 AND ST_Contains(p.geometry, l.location_geom)
-                AND (l.district_id IS NULL OR l.province_id IS NULL)
+                AND (l.district_id IS NULL OR l.province_id IS NULL){id_conditions}
         """)
 
-        result = db.execute(sql)
-        db.commit()
+        result = db.execute(sql, {"from_id": from_id, "to_id": to_id})
+        if commit:
+            db.commit()
 
         rows_updated = result.rowcount
         logger.info(f"✓ {rows_updated:,} ubicaciones actualizadas con distrito y provincia")
@@ -97,4 +167,3 @@ def bulk_assign_geographic_location(db: Session, batch_size: int = 1000):
         logger.error(f"Error en asignación masiva: {e}")
         db.rollback()
         raise
-
@@ -0,0 +1,156 @@
+"""
+Métricas en formato de texto de Prometheus
+
+Expone la telemetría de la última ejecución del ETL (etl_control y
+etl_stage_metrics) junto con el pool de conexiones y la caché de resultados,
+para alertas de tendencia (ej. una etapa que se vuelve más lenta).
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.database.postgres_db import get_pool_stats
+from app.services.cache_service import get_cache_stats
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = Tuple[Dict[str, str], Optional[float]]
+
+
+class MetricsWriter:
+    """Arma la exposición de texto (HELP/TYPE + muestras) métrica por métrica"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def add(self, name: str, kind: str, help_text: str, samples: List[Sample]):
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            return
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+            value_text = repr(float(value))
+            self.lines.append(f"{name}{{{label_text}}} {value_text}" if label_text
+                              else f"{name} {value_text}")
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    """execution_date se guarda en UTC sin zona (datetime.utcnow)"""
+    return value.replace(tzinfo=timezone.utc).timestamp() if value else None
+
+
+def _etl_metrics(db: Session, writer: MetricsWriter):
+    """Última ejecución con telemetría, su detalle por etapa y totales por estado"""
+    last_run = db.execute(text("""
+        SELECT c.id, c.status, c.execution_date, c.execution_time_seconds,
+               c.records_processed, c.rows_per_second, c.bytes_fetched,
+               c.supabase_retries, c.peak_memory_mb
+        FROM etl_control c
+        WHERE EXISTS (SELECT 1 FROM etl_stage_metrics m WHERE m.etl_control_id = c.id)
+        ORDER BY c.id DESC
+        LIMIT 1
+    """)).mappings().first()
+
+    if last_run:
+        writer.add("etl_last_run_timestamp_seconds", "gauge",
+                   "Inicio de la última ejecución del ETL (epoch)",
+                   [({}, _epoch(last_run["execution_date"]))])
+        writer.add("etl_last_run_success", "gauge",
+                   "1 si la última ejecución del ETL terminó bien",
+                   [({}, 1 if last_run["status"] == 'SUCCESS' else 0)])
+        writer.add("etl_last_run_duration_seconds", "gauge",
+                   "Duración total de la última ejecución",
+                   [({}, last_run["execution_time_seconds"])])
+        writer.add("etl_last_run_records", "gauge",
+                   "Filas cargadas en la última ejecución",
+                   [({}, last_run["records_processed"])])
+        writer.add("etl_last_run_rows_per_second", "gauge",
+                   "Throughput de punta a punta de la última ejecución",
+                   [({}, last_run["rows_per_second"])])
+        writer.add("etl_last_run_supabase_bytes", "gauge",
+                   "Bytes leídos de Supabase en la última ejecución",
+                   [({}, last_run["bytes_fetched"])])
+        writer.add("etl_last_run_supabase_retries", "gauge",
+                   "Reintentos de requests a Supabase en la última ejecución",
+                   [({}, last_run["supabase_retries"])])
+        peak_mb = last_run["peak_memory_mb"]
+        writer.add("etl_last_run_peak_memory_bytes", "gauge",
+                   "Pico de memoria residente del driver Python durante la última ejecución",
+                   [({}, peak_mb * 1024 * 1024 if peak_mb is not None else None)])
+
+        stages = db.execute(text("""
+            SELECT stage, SUM(seconds) AS seconds, SUM(records) AS records
+            FROM etl_stage_metrics
+            WHERE etl_control_id = :run_id
+            GROUP BY stage
+        """), {"run_id": last_run["id"]}).mappings().all()
+
+        writer.add("etl_stage_duration_seconds", "gauge",
+                   "Duración de cada etapa en la última ejecución",
+                   [({"stage": row["stage"]}, row["seconds"]) for row in stages])
+        writer.add("etl_stage_rows_per_second", "gauge",
+                   "Filas por segundo de cada etapa en la última ejecución",
+                   [({"stage": row["stage"]}, row["records"] / row["seconds"])
+                    for row in stages if row["records"] and row["seconds"]])
+
+    last_success = db.execute(text("""
+        SELECT MAX(execution_date) FROM etl_control WHERE status IN ('SUCCESS', 'MICROBATCH')
+    """)).scalar()
+    writer.add("etl_last_success_timestamp_seconds", "gauge",
+               "Última carga exitosa en etl_control (ETL, micro-lotes o backfill)",
+               [({}, _epoch(last_success))])
+
+    totals = db.execute(text("""
+        SELECT status, COUNT(*) AS runs FROM etl_control GROUP BY status
+    """)).all()
+    writer.add("etl_runs_total", "counter",
+               "Filas de etl_control por estado",
+               [({"status": status}, runs) for status, runs in totals])
+
+
+def render_metrics(db: Session) -> str:
+    """
+    Genera la exposición completa de métricas
+
+    Args:
+        db: Sesión de base de datos
+
+    Returns:
+        Texto en formato de exposición de Prometheus (version 0.0.4)
+    """
+    writer = MetricsWriter()
+
+    try:
+        _etl_metrics(db, writer)
+    except Exception as e:
+        # Sin etl_stage_metrics (migración pendiente) igual se exponen el resto
+        logger.error(f"Error reading ETL telemetry: {e}")
+        db.rollback()
+
+    pool = get_pool_stats()
+    writer.add("db_pool_checked_out", "gauge", "Conexiones del pool en uso",
+               [({}, pool["checked_out"])])
+    writer.add("db_pool_checkouts_total", "counter", "Checkouts del pool",
+               [({}, pool["checkouts"])])
+    writer.add("db_pool_timeouts_total", "counter", "Checkouts que agotaron DB_POOL_TIMEOUT",
+               [({}, pool["timeouts"])])
+    writer.add("db_pool_wait_max_seconds", "gauge", "Mayor espera por una conexión",
+               [({}, pool["wait_max_ms"] / 1000)])
+
+    cache = get_cache_stats()
+    writer.add("result_cache_items", "gauge", "Entradas en la caché de resultados",
+               [({}, cache["items"])])
+    writer.add("result_cache_hits_total", "counter", "Aciertos de la caché de resultados",
+               [({}, cache["hits"])])
+    writer.add("result_cache_misses_total", "counter", "Fallos de la caché de resultados",
+               [({}, cache["misses"])])
+
+    return writer.render()
@@ -0,0 +1,186 @@
+"""
+Ingesta continua en micro-lotes (casi tiempo real)
+
+Consulta Supabase cada pocos segundos con el keyset de id, transforma en
+proceso con pandas (sin Spark) y confirma cada lote en una sola transacción:
+COPY a locations, asignación de distrito/provincia del rango, rollups y la
+fila de etl_control (status MICROBATCH, para no invalidar tiles ni la caché
+caliente en cada lote). Como todo se confirma junto, un lote fallido se vuelve
+a traer completo sin contar filas dos veces en los rollups.
+"""
+from app.config import settings
+from app.database.bulk_load import copy_locations
+from app.database.postgres_db import SessionLocal
+from app.database.supabase_utils import get_supabase_client
+from app.models.etl_control import ETLControl
+from app.services.location_service import bulk_assign_geographic_location
+from app.services.rollup_service import update_all_rollups
+from app.services.watermark_service import get_last_processed_id
+from app.spark.local_transformations import transform_records, LOCATION_LOAD_COLUMNS
+from datetime import datetime
+from typing import Dict, List, Optional
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatchIngestor:
+    """
+    Loop de ingesta continua con group commit
+
+    Las páginas leídas se acumulan hasta MICROBATCH_MAX_ROWS filas o
+    MICROBATCH_MAX_WAIT_SECONDS segundos y se confirman juntas; la memoria
+    queda acotada a un lote.
+    """
+
+    def __init__(
+        self,
+        poll_seconds: Optional[float] = None,
+        page_size: Optional[int] = None,
+        max_rows: Optional[int] = None,
+        max_wait_seconds: Optional[float] = None
+    ):
+        self.supabase = get_supabase_client()
+        self.poll_seconds = poll_seconds or settings.MICROBATCH_POLL_SECONDS
+        self.page_size = page_size or settings.MICROBATCH_PAGE_SIZE
+        self.max_rows = max_rows or settings.MICROBATCH_MAX_ROWS
+        self.max_wait_seconds = max_wait_seconds or settings.MICROBATCH_MAX_WAIT_SECONDS
+
+        self.committed_id = self._load_watermark()
+        self.fetched_id = self.committed_id
+        self.last_report: Dict = {}
+
+    @staticmethod
+    def _load_watermark() -> int:
+        db = SessionLocal()
+        try:
+            return get_last_processed_id(db)
+        finally:
+            db.close()
+
+    def poll(self) -> List[Dict]:
+        """Trae la próxima página después del último id leído"""
+        page = self.supabase.fetch_batch(self.fetched_id, self.page_size)
+        if page:
+            self.fetched_id = max(record['id'] for record in page)
+        return page
+
+    def flush(self, records: List[Dict], first_fetch_at: float) -> Dict:
+        """
+        Transforma y confirma un lote en una sola transacción
+
+        Args:
+            records: Registros crudos de Supabase (ids > committed_id)
+            first_fetch_at: time.monotonic() de la primera página del lote
+
+        Returns:
+            Reporte del lote con filas cargadas y lag de punta a punta
+        """
+        start = time.monotonic()
+        from_id = self.committed_id
+        to_id = max(record['id'] for record in records)
+
+        df = transform_records(records)
+
+        db = SessionLocal()
+        try:
+            inserted = copy_locations(db, df, LOCATION_LOAD_COLUMNS)
+            assigned = bulk_assign_geographic_location(db, from_id=from_id, to_id=to_id, commit=False)
+            update_all_rollups(db, from_id=from_id, to_id=to_id, commit=False)
+
+            db.add(ETLControl(
+                execution_date=datetime.utcnow(),
+                last_processed_id=to_id,
+                records_processed=inserted,
+                status='MICROBATCH',
+                execution_time_seconds=int(time.monotonic() - start)
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self.committed_id = to_id
+        committed_at = datetime.utcnow()
+
+        # Lag: timestamp del registro en origen -> fila confirmada en destino
+        if len(df):
+            lag_max = (committed_at - df['timestamp'].min()).total_seconds()
+            lag_min = (committed_at - df['timestamp'].max()).total_seconds()
+        else:
+            lag_max = lag_min = None
+
+        self.last_report = {
+            "from_id": from_id,
+            "to_id": to_id,
+            "fetched": len(records),
+            "inserted": inserted,
+            "assigned": assigned,
+            "commit_seconds": round(time.monotonic() - start, 3),
+            "fetch_to_commit_seconds": round(time.monotonic() - first_fetch_at, 3),
+            "lag_min_seconds": round(lag_min, 1) if lag_min is not None else None,
+            "lag_max_seconds": round(lag_max, 1) if lag_max is not None else None,
+            "committed_at": committed_at.isoformat(),
+        }
+        logger.info(
+            f"✓ Micro-batch ids ({from_id}, {to_id}]: {inserted:,} rows, "
+            f"commit {self.last_report['commit_seconds']}s, "
+            f"lag {self.last_report['lag_min_seconds']}-{self.last_report['lag_max_seconds']}s"
+        )
+        return self.last_report
+
+    def run_forever(self):
+        """Loop principal: poll, acumulación y group commit"""
+        logger.info(f"Continuous ingestion started from id > {self.committed_id}")
+
+        buffer: List[Dict] = []
+        first_fetch_at: Optional[float] = None
+
+        while True:
+            try:
+                page = self.poll()
+            except Exception as e:
+                logger.error(f"Error polling Supabase: {e}")
+                page = []
+                time.sleep(self.poll_seconds)
+
+            if page:
+                buffer.extend(page)
+                first_fetch_at = first_fetch_at or time.monotonic()
+
+            waited = time.monotonic() - first_fetch_at if first_fetch_at else 0.0
+            drained = len(page) < self.page_size
+
+            if buffer and (len(buffer) >= self.max_rows or waited >= self.max_wait_seconds):
+                try:
+                    self.flush(buffer, first_fetch_at)
+                except Exception as e:
+                    # Se descarta el lote y se vuelve a leer desde lo confirmado
+                    logger.error(f"Error committing micro-batch, retrying from id {self.committed_id}: {e}")
+                    self.fetched_id = self.committed_id
+                    time.sleep(self.poll_seconds)
+                buffer, first_fetch_at = [], None
+                continue
+
+            if drained:
+                remaining = self.max_wait_seconds - waited if buffer else self.poll_seconds
+                time.sleep(max(min(self.poll_seconds, remaining), 0.1))
+
+
+def start_continuous(**kwargs):
+    """Inicia la ingesta continua (Ctrl+C para detener)"""
+    logger.info("=" * 70)
+    logger.info("CONTINUOUS MICRO-BATCH INGESTION")
+    logger.info("=" * 70)
+
+    ingestor = MicroBatchIngestor(**kwargs)
+    logger.info(f"Poll: {ingestor.poll_seconds:g}s | Page: {ingestor.page_size:,} rows | "
+                f"Group commit: {ingestor.max_rows:,} rows / {ingestor.max_wait_seconds:g}s")
+
+    try:
+        ingestor.run_forever()
+    except KeyboardInterrupt:
+        logger.info("Continuous ingestion stopped by user")
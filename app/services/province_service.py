@@ -3,9 +3,11 @@ Servicio para gestión de provincias
 """
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from app.models.db_models import Province, Location
+from app.database.postgres_db import prepared
+from app.models.db_models import Province, ProvinceDailyStats
+from app.services.cache_service import cached
 from geoalchemy2.functions import ST_AsGeoJSON, ST_Contains
-from typing import List, Optional
+from typing import Dict, List, Optional
 import json
 
 
@@ -15,25 +17,33 @@ class ProvinceService:
     def get_all_provinces(db: Session) -> List[Province]:
         return db.query(Province).all()
 
+    @staticmethod
+    @cached('provinces')
+    def list_provinces(db: Session) -> List[Dict]:
+        return [
+            {
+                "id": p.id,
+                "province_name": p.province_name,
+                "municipality": p.municipality,
+                "area_km2": p.area_km2,
+            }
+            for p in ProvinceService.get_all_provinces(db)
+        ]
+
     @staticmethod
     def get_province_by_id(db: Session, province_id: int) -> Optional[Province]:
         return db.query(Province).filter(Province.id == province_id).first()
 
     @staticmethod
     def get_province_by_point(db: Session, latitude: float, longitude: float) -> Optional[Province]:
-        from sqlalchemy import text
-        point_wkt = f'POINT({longitude} {latitude})'
-        return db.query(Province).filter(
-            ST_Contains(Province.geometry, text(f"ST_GeomFromText('{point_wkt}', 4326)"))
+        statement = prepared(db, 'province_by_point').columns(*Province.__table__.columns)
+        return db.query(Province).from_statement(statement).params(
+            lon=longitude, lat=latitude
         ).first()
 
     @staticmethod
     def count_locations_by_province(db: Session, province_id: int) -> int:
-        province = ProvinceService.get_province_by_id(db, province_id)
-        if not province:
-            return 0
-        count = db.query(func.count(Location.id)).filter(
-            ST_Contains(province.geometry, Location.location_geom)
+        count = db.query(func.sum(ProvinceDailyStats.point_count)).filter(
+            ProvinceDailyStats.province_id == province_id
         ).scalar()
-        return count or 0
-
+        return int(count or 0)
@@ -0,0 +1,531 @@
+"""
+Servicio para mantener las tablas de rollup de estadísticas
+
+Los rollups guardan sumas y conteos (no promedios) para que cada lote del ETL
+se pueda combinar con lo ya acumulado usando INSERT ... ON CONFLICT.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import Optional, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de celda con el que transform_locations calcula lat_grid/lon_grid
+BASE_GRID_SIZE = 0.01
+
+# dimensión -> (tabla de estadísticas, tabla de dispositivos, columna en locations)
+GEOGRAPHIC_ROLLUPS = {
+    'district': ('district_daily_stats', 'district_daily_devices', 'district_id'),
+    'province': ('province_daily_stats', 'province_daily_devices', 'province_id'),
+}
+
+
+# Dimensiones categóricas de global_daily_distribution: columna -> valor si es NULL
+DISTRIBUTION_DIMENSIONS = {
+    'period': 'SIN DATOS',
+    'altitude_range': 'SIN DATOS',
+    'battery_level': 'SIN DATOS',
+    'network_generation': 'SIN DATOS',
+    'sim_operator': 'SIN SEÑAL',
+}
+
+
+def _id_range_filter(from_id: Optional[int], to_id: Optional[int], column: str = "id") -> str:
+    """Condición SQL para limitar el rollup al lote (from_id, to_id]"""
+    conditions = []
+    if from_id is not None:
+        conditions.append(f"{column} > :from_id")
+    if to_id is not None:
+        conditions.append(f"{column} <= :to_id")
+    return " AND ".join(conditions) if conditions else "TRUE"
+
+
+def update_geographic_rollups(
+    db: Session,
+    from_id: Optional[int] = None,
+    to_id: Optional[int] = None,
+    commit: bool = True
+) -> Dict[str, int]:
+    """
+    Suma un lote de ubicaciones ya asignadas a los rollups de distrito y provincia
+
+    Args:
+        db: Sesión de base de datos
+        from_id: ID exclusivo desde el que empieza el lote (None = sin límite)
+        to_id: ID inclusivo donde termina el lote (None = sin límite)
+        commit: False para dejar el lote en la transacción del llamador
+
+    Returns:
+        dict con la cantidad de filas de rollup afectadas por dimensión
+    """
+    try:
+        id_filter = _id_range_filter(from_id, to_id)
+        params = {'from_id': from_id, 'to_id': to_id}
+        result = {}
+
+        for dimension, (stats_table, devices_table, key) in GEOGRAPHIC_ROLLUPS.items():
+            stats = db.execute(text(f"""
+                INSERT INTO {stats_table} (
+                    {key}, date, point_count,
+                    battery_sum, battery_count,
+                    signal_sum, signal_count,
+                    speed_sum, speed_count,
+                    updated_at
+                )
+                SELECT
+                    {key}, CAST(timestamp AS DATE), COUNT(*),
+                    COALESCE(SUM(battery), 0), COUNT(battery),
+                    COALESCE(SUM(signal), 0), COUNT(signal),
+                    COALESCE(SUM(speed), 0), COUNT(speed),
+                    NOW()
+                FROM locations
+                WHERE {id_filter} AND {key} IS NOT NULL AND timestamp IS NOT NULL
+                GROUP BY {key}, CAST(timestamp AS DATE)
+                ON CONFLICT ({key}, date) DO UPDATE SET
+                    point_count = {stats_table}.point_count + EXCLUDED.point_count,
+                    battery_sum = {stats_table}.battery_sum + EXCLUDED.battery_sum,
+                    battery_count = {stats_table}.battery_count + EXCLUDED.battery_count,
+                    signal_sum = {stats_table}.signal_sum + EXCLUDED.signal_sum,
+                    signal_count = {stats_table}.signal_count + EXCLUDED.signal_count,
+                    speed_sum = {stats_table}.speed_sum + EXCLUDED.speed_sum,
+                    speed_count = {stats_table}.speed_count + EXCLUDED.speed_count,
+                    updated_at = EXCLUDED.updated_at
+            """), params)
+
+            db.execute(text(f"""
+                INSERT INTO {devices_table} ({key}, date, device_id)
+                SELECT DISTINCT {key}, CAST(timestamp AS DATE), device_id
+                FROM locations
+                WHERE {id_filter} AND {key} IS NOT NULL AND device_id IS NOT NULL
+                    AND timestamp IS NOT NULL
+                ON CONFLICT DO NOTHING
+            """), params)
+
+            result[dimension] = stats.rowcount
+
+        if commit:
+            db.commit()
+        logger.info(
+            f"✓ Rollups geográficos actualizados "
+            f"(distritos/día: {result['district']:,}, provincias/día: {result['province']:,})"
+        )
+        return result
+
+    except Exception as e:
+        logger.error(f"Error actualizando rollups geográficos: {e}")
+        db.rollback()
+        raise
+
+
+def rebuild_geographic_rollups(db: Session, commit: bool = True) -> Dict[str, int]:
+    """
+    Reconstruye desde cero los rollups de distrito y provincia
+
+    Se usa tras una carga completa (overwrite) o para poblarlos la primera vez.
+    """
+    try:
+        tables = []
+        for stats_table, devices_table, _ in GEOGRAPHIC_ROLLUPS.values():
+            tables.extend([stats_table, devices_table])
+
+        db.execute(text(f"TRUNCATE {', '.join(tables)}"))
+        logger.info("Rollups geográficos vaciados, recalculando...")
+
+    except Exception as e:
+        logger.error(f"Error vaciando rollups geográficos: {e}")
+        db.rollback()
+        raise
+
+    return update_geographic_rollups(db, commit=commit)
+
+
+def update_grid_rollup(
+    db: Session,
+    from_id: Optional[int] = None,
+    to_id: Optional[int] = None,
+    commit: bool = True
+) -> int:
+    """
+    Suma un lote de ubicaciones a grid_analysis_detail (celda, red, operador, dispositivo)
+
+    Args:
+        db: Sesión de base de datos
+        from_id: ID exclusivo desde el que empieza el lote (None = sin límite)
+        to_id: ID inclusivo donde termina el lote (None = sin límite)
+        commit: False para dejar el lote en la transacción del llamador
+
+    Returns:
+        Cantidad de filas de rollup afectadas
+    """
+    try:
+        id_filter = _id_range_filter(from_id, to_id)
+
+        result = db.execute(text(f"""
+            INSERT INTO grid_analysis_detail (
+                lat_grid, lon_grid, network_generation, sim_operator, device_id,
+                cell_geom, point_count,
+                battery_sum, battery_count,
+                signal_sum, signal_count,
+                updated_at
+            )
+            SELECT
+                lat_grid, lon_grid,
+                COALESCE(network_generation, 'SIN DATOS'),
+                COALESCE(sim_operator, 'SIN SEÑAL'),
+                device_id,
+                ST_MakeEnvelope(lon_grid, lat_grid, lon_grid + :grid_size, lat_grid + :grid_size, 4326),
+                COUNT(*),
+                COALESCE(SUM(battery), 0), COUNT(battery),
+                COALESCE(SUM(signal), 0), COUNT(signal),
+                NOW()
+            FROM locations
+            WHERE {id_filter}
+                AND lat_grid IS NOT NULL AND lon_grid IS NOT NULL
+                AND device_id IS NOT NULL
+            GROUP BY lat_grid, lon_grid,
+                COALESCE(network_generation, 'SIN DATOS'),
+                COALESCE(sim_operator, 'SIN SEÑAL'),
+                device_id
+            ON CONFLICT (lat_grid, lon_grid, network_generation, sim_operator, device_id) DO UPDATE SET
+                point_count = grid_analysis_detail.point_count + EXCLUDED.point_count,
+                battery_sum = grid_analysis_detail.battery_sum + EXCLUDED.battery_sum,
+                battery_count = grid_analysis_detail.battery_count + EXCLUDED.battery_count,
+                signal_sum = grid_analysis_detail.signal_sum + EXCLUDED.signal_sum,
+                signal_count = grid_analysis_detail.signal_count + EXCLUDED.signal_count,
+                updated_at = EXCLUDED.updated_at
+        """), {'from_id': from_id, 'to_id': to_id, 'grid_size': BASE_GRID_SIZE})
+
+        if commit:
+            db.commit()
+        logger.info(f"✓ Rollup de grilla actualizado ({result.rowcount:,} filas)")
+        return result.rowcount
+
+    except Exception as e:
+        logger.error(f"Error actualizando rollup de grilla: {e}")
+        db.rollback()
+        raise
+
+
+def rebuild_grid_rollup(db: Session, commit: bool = True) -> int:
+    """Reconstruye desde cero grid_analysis_detail"""
+    try:
+        db.execute(text("TRUNCATE grid_analysis_detail"))
+    except Exception as e:
+        logger.error(f"Error vaciando rollup de grilla: {e}")
+        db.rollback()
+        raise
+
+    return update_grid_rollup(db, commit=commit)
+
+
+def update_device_rollup(
+    db: Session,
+    from_id: Optional[int] = None,
+    to_id: Optional[int] = None,
+    commit: bool = True
+) -> int:
+    """
+    Suma un lote de ubicaciones a device_daily_stats, device_daily_breakdown
+    y device_daily_cells
+
+    Args:
+        db: Sesión de base de datos
+        from_id: ID exclusivo desde el que empieza el lote (None = sin límite)
+        to_id: ID inclusivo donde termina el lote (None = sin límite)
+        commit: False para dejar el lote en la transacción del llamador
+
+    Returns:
+        Cantidad de filas dispositivo/día afectadas
+    """
+    try:
+        id_filter = _id_range_filter(from_id, to_id)
+        params = {'from_id': from_id, 'to_id': to_id}
+
+        result = db.execute(text(f"""
+            INSERT INTO device_daily_stats (
+                device_id, date, device_name, point_count,
+                battery_sum, battery_count,
+                signal_sum, signal_count,
+                speed_sum, speed_count, max_speed,
+                first_seen, last_seen, updated_at
+            )
+            SELECT
+                device_id, CAST(timestamp AS DATE), MAX(device_name), COUNT(*),
+                COALESCE(SUM(battery), 0), COUNT(battery),
+                COALESCE(SUM(signal), 0), COUNT(signal),
+                COALESCE(SUM(speed), 0), COUNT(speed), MAX(speed),
+                MIN(timestamp), MAX(timestamp), NOW()
+            FROM locations
+            WHERE {id_filter} AND device_id IS NOT NULL AND timestamp IS NOT NULL
+            GROUP BY device_id, CAST(timestamp AS DATE)
+            ON CONFLICT (device_id, date) DO UPDATE SET
+                device_name = COALESCE(EXCLUDED.device_name, device_daily_stats.device_name),
+                point_count = device_daily_stats.point_count + EXCLUDED.point_count,
+                battery_sum = device_daily_stats.battery_sum + EXCLUDED.battery_sum,
+                battery_count = device_daily_stats.battery_count + EXCLUDED.battery_count,
+                signal_sum = device_daily_stats.signal_sum + EXCLUDED.signal_sum,
+                signal_count = device_daily_stats.signal_count + EXCLUDED.signal_count,
+                speed_sum = device_daily_stats.speed_sum + EXCLUDED.speed_sum,
+                speed_count = device_daily_stats.speed_count + EXCLUDED.speed_count,
+                max_speed = GREATEST(device_daily_stats.max_speed, EXCLUDED.max_speed),
+                first_seen = LEAST(device_daily_stats.first_seen, EXCLUDED.first_seen),
+                last_seen = GREATEST(device_daily_stats.last_seen, EXCLUDED.last_seen),
+                updated_at = EXCLUDED.updated_at
+        """), params)
+
+        db.execute(text(f"""
+            INSERT INTO device_daily_breakdown (
+                device_id, date, network_generation, sim_operator, point_count
+            )
+            SELECT
+                device_id, CAST(timestamp AS DATE),
+                COALESCE(network_generation, 'SIN DATOS'),
+                COALESCE(sim_operator, 'SIN SEÑAL'),
+                COUNT(*)
+            FROM locations
+            WHERE {id_filter} AND device_id IS NOT NULL AND timestamp IS NOT NULL
+            GROUP BY device_id, CAST(timestamp AS DATE),
+                COALESCE(network_generation, 'SIN DATOS'),
+                COALESCE(sim_operator, 'SIN SEÑAL')
+            ON CONFLICT (device_id, date, network_generation, sim_operator) DO UPDATE SET
+                point_count = device_daily_breakdown.point_count + EXCLUDED.point_count
+        """), params)
+
+        db.execute(text(f"""
+            INSERT INTO device_daily_cells (device_id, date, lat_grid, lon_grid, point_count)
+            SELECT device_id, CAST(timestamp AS DATE), lat_grid, lon_grid, COUNT(*)
+            FROM locations
+            WHERE {id_filter} AND device_id IS NOT NULL AND timestamp IS NOT NULL
+                AND lat_grid IS NOT NULL AND lon_grid IS NOT NULL
+            GROUP BY device_id, CAST(timestamp AS DATE), lat_grid, lon_grid
+            ON CONFLICT (device_id, date, lat_grid, lon_grid) DO UPDATE SET
+                point_count = device_daily_cells.point_count + EXCLUDED.point_count
+        """), params)
+
+        if commit:
+            db.commit()
+        logger.info(f"✓ Rollup de dispositivos actualizado ({result.rowcount:,} dispositivos/día)")
+        return result.rowcount
+
+    except Exception as e:
+        logger.error(f"Error actualizando rollup de dispositivos: {e}")
+        db.rollback()
+        raise
+
+
+def rebuild_device_rollup(db: Session, commit: bool = True) -> int:
+    """Reconstruye desde cero device_daily_stats, device_daily_breakdown y device_daily_cells"""
+    try:
+        db.execute(text("TRUNCATE device_daily_stats, device_daily_breakdown, device_daily_cells"))
+    except Exception as e:
+        logger.error(f"Error vaciando rollup de dispositivos: {e}")
+        db.rollback()
+        raise
+
+    return update_device_rollup(db, commit=commit)
+
+
+def update_hourly_rollup(
+    db: Session,
+    from_id: Optional[int] = None,
+    to_id: Optional[int] = None,
+    commit: bool = True
+) -> int:
+    """
+    Suma un lote de ubicaciones ya asignadas a district_hourly_stats
+
+    Args:
+        db: Sesión de base de datos
+        from_id: ID exclusivo desde el que empieza el lote (None = sin límite)
+        to_id: ID inclusivo donde termina el lote (None = sin límite)
+        commit: False para dejar el lote en la transacción del llamador
+
+    Returns:
+        Cantidad de filas de rollup afectadas
+    """
+    try:
+        id_filter = _id_range_filter(from_id, to_id)
+
+        result = db.execute(text(f"""
+            INSERT INTO district_hourly_stats (
+                district_id, hour, network_generation, sim_operator, point_count,
+                battery_sum, battery_count,
+                signal_sum, signal_count,
+                speed_sum, speed_count
+            )
+            SELECT
+                district_id, date_trunc('hour', timestamp),
+                COALESCE(network_generation, 'SIN DATOS'),
+                COALESCE(sim_operator, 'SIN SEÑAL'),
+                COUNT(*),
+                COALESCE(SUM(battery), 0), COUNT(battery),
+                COALESCE(SUM(signal), 0), COUNT(signal),
+                COALESCE(SUM(speed), 0), COUNT(speed)
+            FROM locations
+            WHERE {id_filter} AND district_id IS NOT NULL AND timestamp IS NOT NULL
+            GROUP BY district_id, date_trunc('hour', timestamp),
+                COALESCE(network_generation, 'SIN DATOS'),
+                COALESCE(sim_operator, 'SIN SEÑAL')
+            ON CONFLICT (district_id, hour, network_generation, sim_operator) DO UPDATE SET
+                point_count = district_hourly_stats.point_count + EXCLUDED.point_count,
+                battery_sum = district_hourly_stats.battery_sum + EXCLUDED.battery_sum,
+                battery_count = district_hourly_stats.battery_count + EXCLUDED.battery_count,
+                signal_sum = district_hourly_stats.signal_sum + EXCLUDED.signal_sum,
+                signal_count = district_hourly_stats.signal_count + EXCLUDED.signal_count,
+                speed_sum = district_hourly_stats.speed_sum + EXCLUDED.speed_sum,
+                speed_count = district_hourly_stats.speed_count + EXCLUDED.speed_count
+        """), {'from_id': from_id, 'to_id': to_id})
+
+        if commit:
+            db.commit()
+        logger.info(f"✓ Rollup horario actualizado ({result.rowcount:,} filas)")
+        return result.rowcount
+
+    except Exception as e:
+        logger.error(f"Error actualizando rollup horario: {e}")
+        db.rollback()
+        raise
+
+
+def rebuild_hourly_rollup(db: Session, commit: bool = True) -> int:
+    """Reconstruye desde cero district_hourly_stats"""
+    try:
+        db.execute(text("TRUNCATE district_hourly_stats"))
+    except Exception as e:
+        logger.error(f"Error vaciando rollup horario: {e}")
+        db.rollback()
+        raise
+
+    return update_hourly_rollup(db, commit=commit)
+
+
+def update_global_rollup(
+    db: Session,
+    from_id: Optional[int] = None,
+    to_id: Optional[int] = None,
+    commit: bool = True
+) -> int:
+    """
+    Suma un lote de ubicaciones a global_daily_stats y global_daily_distribution
+
+    Args:
+        db: Sesión de base de datos
+        from_id: ID exclusivo desde el que empieza el lote (None = sin límite)
+        to_id: ID inclusivo donde termina el lote (None = sin límite)
+        commit: False para dejar el lote en la transacción del llamador
+
+    Returns:
+        Cantidad de días afectados
+    """
+    try:
+        id_filter = _id_range_filter(from_id, to_id)
+        params = {'from_id': from_id, 'to_id': to_id}
+
+        result = db.execute(text(f"""
+            INSERT INTO global_daily_stats (
+                date, point_count,
+                battery_sum, battery_count,
+                signal_sum, signal_count,
+                speed_sum, speed_count,
+                altitude_sum, altitude_count,
+                first_timestamp, last_timestamp, updated_at
+            )
+            SELECT
+                CAST(timestamp AS DATE), COUNT(*),
+                COALESCE(SUM(battery), 0), COUNT(battery),
+                COALESCE(SUM(signal), 0), COUNT(signal),
+                COALESCE(SUM(speed), 0), COUNT(speed),
+                COALESCE(SUM(altitude), 0), COUNT(altitude),
+                MIN(timestamp), MAX(timestamp), NOW()
+            FROM locations
+            WHERE {id_filter} AND timestamp IS NOT NULL
+            GROUP BY CAST(timestamp AS DATE)
+            ON CONFLICT (date) DO UPDATE SET
+                point_count = global_daily_stats.point_count + EXCLUDED.point_count,
+                battery_sum = global_daily_stats.battery_sum + EXCLUDED.battery_sum,
+                battery_count = global_daily_stats.battery_count + EXCLUDED.battery_count,
+                signal_sum = global_daily_stats.signal_sum + EXCLUDED.signal_sum,
+                signal_count = global_daily_stats.signal_count + EXCLUDED.signal_count,
+                speed_sum = global_daily_stats.speed_sum + EXCLUDED.speed_sum,
+                speed_count = global_daily_stats.speed_count + EXCLUDED.speed_count,
+                altitude_sum = global_daily_stats.altitude_sum + EXCLUDED.altitude_sum,
+                altitude_count = global_daily_stats.altitude_count + EXCLUDED.altitude_count,
+                first_timestamp = LEAST(global_daily_stats.first_timestamp, EXCLUDED.first_timestamp),
+                last_timestamp = GREATEST(global_daily_stats.last_timestamp, EXCLUDED.last_timestamp),
+                updated_at = EXCLUDED.updated_at
+        """), params)
+
+        # Un solo recorrido del lote para todas las dimensiones
+        unpivot = ", ".join(
+            f"('{column}', COALESCE({column}, '{default}'))"
+            for column, default in DISTRIBUTION_DIMENSIONS.items()
+        )
+        db.execute(text(f"""
+            INSERT INTO global_daily_distribution (date, dimension, value, point_count)
+            SELECT CAST(l.timestamp AS DATE), d.dimension, d.value, COUNT(*)
+            FROM locations l
+            CROSS JOIN LATERAL (VALUES {unpivot}) AS d(dimension, value)
+            WHERE {_id_range_filter(from_id, to_id, 'l.id')} AND l.timestamp IS NOT NULL
+            GROUP BY CAST(l.timestamp AS DATE), d.dimension, d.value
+            ON CONFLICT (date, dimension, value) DO UPDATE SET
+                point_count = global_daily_distribution.point_count + EXCLUDED.point_count
+        """), params)
+
+        if commit:
+            db.commit()
+        logger.info(f"✓ Rollup global actualizado ({result.rowcount:,} días)")
+        return result.rowcount
+
+    except Exception as e:
+        logger.error(f"Error actualizando rollup global: {e}")
+        db.rollback()
+        raise
+
+
+def rebuild_global_rollup(db: Session, commit: bool = True) -> int:
+    """Reconstruye desde cero global_daily_stats y global_daily_distribution"""
+    try:
+        db.execute(text("TRUNCATE global_daily_stats, global_daily_distribution"))
+    except Exception as e:
+        logger.error(f"Error vaciando rollup global: {e}")
+        db.rollback()
+        raise
+
+    return update_global_rollup(db, commit=commit)
+
+
+def update_all_rollups(
+    db: Session,
+    from_id: Optional[int] = None,
+    to_id: Optional[int] = None,
+    commit: bool = True
+) -> Dict[str, int]:
+    """
+    Suma el lote (from_id, to_id] a todos los rollups
+
+    Debe llamarse después de la asignación de distrito y provincia. Con
+    commit=False nada se confirma: el llamador hace un solo commit junto con
+    la carga del lote.
+    """
+    result = update_geographic_rollups(db, from_id, to_id, commit)
+    result['grid'] = update_grid_rollup(db, from_id, to_id, commit)
+    result['device'] = update_device_rollup(db, from_id, to_id, commit)
+    result['global'] = update_global_rollup(db, from_id, to_id, commit)
+    result['hourly'] = update_hourly_rollup(db, from_id, to_id, commit)
+    return result
+
+
+def rebuild_all_rollups(db: Session, commit: bool = True) -> Dict[str, int]:
+    """
+    Reconstruye todos los rollups a partir de locations
+
+    Con commit=False los TRUNCATE y la reconstrucción quedan en la transacción
+    del llamador (un fallo no deja rollups a medio reconstruir).
+    """
+    result = rebuild_geographic_rollups(db, commit)
+    result['grid'] = rebuild_grid_rollup(db, commit)
+    result['device'] = rebuild_device_rollup(db, commit)
+    result['global'] = rebuild_global_rollup(db, commit)
+    result['hourly'] = rebuild_hourly_rollup(db, commit)
+    return result
@@ -0,0 +1,112 @@
+"""
+Servicio para estadísticas generales del dataset
+
+Lee solo los rollups global_daily_stats, global_daily_distribution y
+device_daily_stats; nunca recorre locations.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from app.models.db_models import GlobalDailyStats, GlobalDailyDistribution, DeviceDailyStats
+from app.services.cache_service import cached
+from datetime import date
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _average(total, count) -> float:
+    return round(total / count, 2) if count else 0.0
+
+
+def _percentages(counts: Dict[str, int], total: int, key: str):
+    """Lista ordenada de mayor a menor con cantidad y porcentaje"""
+    return [
+        {key: value, "count": count, "percentage": round(count * 100.0 / total, 2) if total else 0.0}
+        for value, count in sorted(counts.items(), key=lambda item: item[1], reverse=True)
+    ]
+
+
+@cached('general_stats')
+def get_general_stats(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Dict:
+    """
+    Estadísticas generales (formato GeneralStats) para un rango de fechas
+
+    Args:
+        db: Sesión de base de datos
+        start_date: Fecha inicial inclusiva (opcional)
+        end_date: Fecha final inclusiva (opcional)
+
+    Returns:
+        Diccionario con totales, promedios y distribuciones
+    """
+    try:
+        stats_filters, distribution_filters, device_filters = [], [], []
+        if start_date:
+            stats_filters.append(GlobalDailyStats.date >= start_date)
+            distribution_filters.append(GlobalDailyDistribution.date >= start_date)
+            device_filters.append(DeviceDailyStats.date >= start_date)
+        if end_date:
+            stats_filters.append(GlobalDailyStats.date <= end_date)
+            distribution_filters.append(GlobalDailyDistribution.date <= end_date)
+            device_filters.append(DeviceDailyStats.date <= end_date)
+
+        totals = db.query(
+            func.sum(GlobalDailyStats.point_count).label('total_points'),
+            func.sum(GlobalDailyStats.battery_sum).label('battery_sum'),
+            func.sum(GlobalDailyStats.battery_count).label('battery_count'),
+            func.sum(GlobalDailyStats.signal_sum).label('signal_sum'),
+            func.sum(GlobalDailyStats.signal_count).label('signal_count'),
+            func.sum(GlobalDailyStats.speed_sum).label('speed_sum'),
+            func.sum(GlobalDailyStats.speed_count).label('speed_count'),
+            func.min(GlobalDailyStats.first_timestamp).label('first_timestamp'),
+            func.max(GlobalDailyStats.last_timestamp).label('last_timestamp'),
+        ).filter(*stats_filters).one()
+
+        unique_devices = db.query(
+            func.count(func.distinct(DeviceDailyStats.device_id))
+        ).filter(*device_filters).scalar()
+
+        rows = db.query(
+            GlobalDailyDistribution.dimension,
+            GlobalDailyDistribution.value,
+            func.sum(GlobalDailyDistribution.point_count),
+        ).filter(*distribution_filters).group_by(
+            GlobalDailyDistribution.dimension,
+            GlobalDailyDistribution.value,
+        ).all()
+
+        distributions: Dict[str, Dict[str, int]] = {}
+        for dimension, value, count in rows:
+            distributions.setdefault(dimension, {})[value] = int(count)
+
+        total_points = int(totals.total_points or 0)
+
+        return {
+            "total_points": total_points,
+            "unique_devices": unique_devices or 0,
+            "avg_battery": _average(totals.battery_sum, totals.battery_count),
+            "avg_signal": _average(totals.signal_sum, totals.signal_count),
+            "avg_speed": _average(totals.speed_sum, totals.speed_count),
+            "network_distribution": _percentages(
+                distributions.get('network_generation', {}), total_points, "network_type"
+            ),
+            "operator_distribution": _percentages(
+                distributions.get('sim_operator', {}), total_points, "operator"
+            ),
+            "period_distribution": distributions.get('period', {}),
+            "altitude_distribution": distributions.get('altitude_range', {}),
+            "battery_distribution": distributions.get('battery_level', {}),
+            "date_range": {
+                "start": totals.first_timestamp.isoformat() if totals.first_timestamp else "",
+                "end": totals.last_timestamp.isoformat() if totals.last_timestamp else "",
+            },
+        }
+
+    except Exception as e:
+        logger.error(f"Error getting general statistics: {e}")
+        raise
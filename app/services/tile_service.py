@@ -0,0 +1,256 @@
+"""
+Servicio para generar tiles vectoriales (Mapbox Vector Tiles) con ST_AsMVT
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from app.config import settings
+from app.services.rollup_service import BASE_GRID_SIZE
+from app.services.watermark_service import get_etl_watermark, ETL_STATUSES
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import math
+import shutil
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Capas disponibles: tabla, columna de geometría, propiedades, zoom mínimo y
+# máximo de features por tile. Los puntos crudos solo se sirven con zoom alto.
+# 'source' reemplaza a la tabla por una subconsulta que puede usar el CTE
+# bounds (el filtro por el índice GiST va antes de agrupar).
+TILE_LAYERS = {
+    'locations': {
+        'table': 'locations',
+        'geom_column': 'location_geom',
+        'properties': 'id, device_id, network_generation, sim_operator, signal, battery, speed_range',
+        'min_zoom': 12,
+        'max_features': 50000,
+    },
+    'grid': {
+        # Rollup acumulado de todas las cargas (grid_analysis solo tiene el último lote)
+        'source': f"""
+            SELECT lat_grid, lon_grid,
+                   ST_MakeEnvelope(lon_grid, lat_grid, lon_grid + {BASE_GRID_SIZE},
+                                   lat_grid + {BASE_GRID_SIZE}, 4326) AS cell_geom,
+                   SUM(point_count) AS point_count,
+                   COUNT(DISTINCT device_id) AS unique_devices,
+                   ROUND((SUM(battery_sum) / NULLIF(SUM(battery_count), 0))::numeric, 2) AS avg_battery,
+                   ROUND((SUM(signal_sum) / NULLIF(SUM(signal_count), 0))::numeric, 2) AS avg_signal
+            FROM grid_analysis_detail, bounds
+            WHERE grid_analysis_detail.cell_geom && bounds.geom_4326
+            GROUP BY lat_grid, lon_grid
+        """,
+        'geom_column': 'cell_geom',
+        'properties': 'lat_grid, lon_grid, point_count, unique_devices, avg_battery, avg_signal',
+        'min_zoom': 0,
+        'max_features': 100000,
+    },
+    'districts': {
+        'table': 'districts',
+        'geom_column': 'geometry',
+        'properties': 'id, district_number, district_name, area_km2',
+        'min_zoom': 0,
+        'max_features': 1000,
+    },
+}
+
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+
+class TileCache:
+    """
+    Caché de tiles en dos niveles: LRU en memoria y archivos en disco
+
+    La clave incluye el watermark del ETL, por lo que un ETL nuevo invalida
+    todos los tiles sin tener que borrarlos uno por uno.
+    """
+
+    def __init__(self, cache_dir: str, max_items: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_items = max_items
+        self._memory: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._watermark: Optional[int] = None
+
+    def _path(self, key: Tuple) -> Path:
+        layer, watermark, z, x, y = key
+        return self.cache_dir / layer / str(watermark) / str(z) / str(x) / f"{y}.mvt"
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        path = self._path(key)
+        if path.exists():
+            tile = path.read_bytes()
+            self._remember(key, tile)
+            return tile
+        return None
+
+    def put(self, key: Tuple, tile: bytes):
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(tile)
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning(f"Could not write tile to disk cache: {e}")
+        self._remember(key, tile)
+
+    def _remember(self, key: Tuple, tile: bytes):
+        with self._lock:
+            self._memory[key] = tile
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def use_watermark(self, watermark: int):
+        """Al ver un watermark nuevo borra del disco los tiles de los anteriores"""
+        with self._lock:
+            if watermark == self._watermark:
+                return
+            self._watermark = watermark
+        for layer in TILE_LAYERS:
+            self.purge_stale(layer, watermark)
+
+    def purge_stale(self, layer: str, watermark: int):
+        """Borra del disco los tiles de watermarks anteriores de una capa"""
+        layer_dir = self.cache_dir / layer
+        if not layer_dir.exists():
+            return
+        for entry in layer_dir.iterdir():
+            if entry.is_dir() and entry.name != str(watermark):
+                shutil.rmtree(entry, ignore_errors=True)
+
+
+_tile_cache = TileCache(settings.TILE_CACHE_DIR, settings.TILE_CACHE_MAX_ITEMS)
+
+
+def _render_tile(db: Session, layer: str, z: int, x: int, y: int) -> bytes:
+    """Genera el tile con ST_AsMVT filtrando por el índice GiST en SRID 4326"""
+    config = TILE_LAYERS[layer]
+    source = f"({config['source']})" if 'source' in config else config['table']
+
+    tile = db.execute(text(f"""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(:z, :x, :y) AS geom_3857,
+                   ST_Transform(ST_TileEnvelope(:z, :x, :y, margin => :margin), 4326) AS geom_4326
+        ),
+        mvtgeom AS (
+            SELECT ST_AsMVTGeom(
+                       ST_Transform(t.{config['geom_column']}, 3857),
+                       bounds.geom_3857, {TILE_EXTENT}, {TILE_BUFFER}, true
+                   ) AS geom,
+                   {', '.join('t.' + p.strip() for p in config['properties'].split(','))}
+            FROM {source} t, bounds
+            WHERE t.{config['geom_column']} && bounds.geom_4326
+            LIMIT :max_features
+        )
+        SELECT ST_AsMVT(mvtgeom.*, :layer, {TILE_EXTENT}, 'geom') FROM mvtgeom
+    """), {
+        "z": z, "x": x, "y": y,
+        "margin": TILE_BUFFER / TILE_EXTENT,
+        "max_features": config['max_features'],
+        "layer": layer,
+    }).scalar()
+
+    return bytes(tile) if tile else b""
+
+
+def get_tile(db: Session, layer: str, z: int, x: int, y: int) -> Tuple[bytes, int]:
+    """
+    Retorna un tile MVT desde la caché o generándolo
+
+    Args:
+        db: Sesión de base de datos
+        layer: Una de TILE_LAYERS
+        z, x, y: Coordenadas del tile (esquema XYZ)
+
+    Returns:
+        (bytes del tile, watermark con el que se generó)
+    """
+    if layer not in TILE_LAYERS:
+        raise ValueError(f"Unknown layer '{layer}'")
+    if not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise ValueError(f"Tile {z}/{x}/{y} out of range")
+
+    watermark = get_etl_watermark(db, ETL_STATUSES)
+
+    _tile_cache.use_watermark(watermark)
+
+    if z < TILE_LAYERS[layer]['min_zoom']:
+        return b"", watermark
+
+    key = (layer, watermark, z, x, y)
+    tile = _tile_cache.get(key)
+    if tile is None:
+        tile = _render_tile(db, layer, z, x, y)
+        _tile_cache.put(key, tile)
+
+    return tile, watermark
+
+
+def _lonlat_to_tile(lon: float, lat: float, z: int) -> Tuple[int, int]:
+    """Convierte lon/lat a coordenadas de tile XYZ"""
+    n = 2 ** z
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def pregenerate_tiles(db: Session, zooms: Optional[List[int]] = None) -> Dict[str, int]:
+    """
+    Genera y guarda en caché los tiles que cubren los distritos
+
+    Se ejecuta al terminar cada ETL para los zooms más usados, así los
+    clientes encuentran los tiles ya listos con el watermark nuevo.
+
+    Args:
+        db: Sesión de base de datos
+        zooms: Niveles de zoom (por defecto settings.TILE_PREGENERATE_ZOOMS)
+
+    Returns:
+        dict con la cantidad de tiles generados por capa
+    """
+    if zooms is None:
+        zooms = [int(z) for z in settings.TILE_PREGENERATE_ZOOMS.split(",") if z.strip()]
+
+    extent = db.execute(text("""
+        SELECT ST_XMin(e), ST_YMin(e), ST_XMax(e), ST_YMax(e)
+        FROM (SELECT ST_Extent(geometry) AS e FROM districts) AS ext
+    """)).fetchone()
+
+    if not extent or extent[0] is None:
+        logger.warning("⚠ No districts loaded, skipping tile pregeneration")
+        return {}
+
+    min_lon, min_lat, max_lon, max_lat = extent
+    watermark = get_etl_watermark(db, ETL_STATUSES)
+    generated = {}
+    _tile_cache.use_watermark(watermark)
+
+    for layer, config in TILE_LAYERS.items():
+        generated[layer] = 0
+
+        for z in zooms:
+            if z < config['min_zoom']:
+                continue
+            x_min, y_min = _lonlat_to_tile(min_lon, max_lat, z)
+            x_max, y_max = _lonlat_to_tile(max_lon, min_lat, z)
+
+            for x in range(x_min, x_max + 1):
+                for y in range(y_min, y_max + 1):
+                    key = (layer, watermark, z, x, y)
+                    if _tile_cache.get(key) is None:
+                        _tile_cache.put(key, _render_tile(db, layer, z, x, y))
+                        generated[layer] += 1
+
+    logger.info(f"✓ Tiles pregenerated (watermark {watermark}): {generated}")
+    return generated
@@ -0,0 +1,94 @@
+"""
+Servicio para series de tiempo
+
+Lee solo district_hourly_stats (agregado por el ETL); los buckets de día y
+semana se arman reagrupando las horas del rollup, nunca recorriendo locations.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from app.models.schemas import TimeseriesRequest
+from datetime import datetime, timedelta
+from typing import Dict, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+TIMESERIES_COLUMNS = ["bucket", "point_count", "avg_battery", "avg_signal", "avg_speed"]
+
+# Rango por defecto cuando no se indica start
+DEFAULT_RANGE = timedelta(days=30)
+
+
+def _build_filters(request: TimeseriesRequest) -> Tuple[str, Dict]:
+    """Arma el WHERE sobre district_hourly_stats (rango sobre idx_district_hourly_hour)"""
+    end = request.end or datetime.utcnow()
+    start = request.start or end - DEFAULT_RANGE
+
+    conditions = ["h.hour >= :start", "h.hour < :end"]
+    params = {"start": start, "end": end}
+
+    if request.district_number is not None:
+        conditions.append("d.district_number = :district_number")
+        params["district_number"] = request.district_number
+    if request.network_type:
+        conditions.append("h.network_generation = :network_type")
+        params["network_type"] = request.network_type
+    if request.operator:
+        conditions.append("h.sim_operator = :operator")
+        params["operator"] = request.operator
+
+    return " AND ".join(conditions), params
+
+
+def get_timeseries(db: Session, request: TimeseriesRequest) -> Dict:
+    """
+    Serie de tiempo compacta: columnas + filas como listas
+
+    Args:
+        db: Sesión de base de datos
+        request: Rango, tamaño de bucket (hour/day/week), filtros y split_by
+
+    Returns:
+        dict con bucket, columnas y series ("all" o una por valor de split_by)
+    """
+    try:
+        where, params = _build_filters(request)
+        params["bucket"] = request.bucket
+        split = f"h.{request.split_by}" if request.split_by else "'all'"
+
+        rows = db.execute(text(f"""
+            SELECT
+                {split} AS series,
+                date_trunc(:bucket, h.hour) AS bucket,
+                SUM(h.point_count) AS point_count,
+                ROUND((SUM(h.battery_sum) / NULLIF(SUM(h.battery_count), 0))::numeric, 2) AS avg_battery,
+                ROUND((SUM(h.signal_sum) / NULLIF(SUM(h.signal_count), 0))::numeric, 2) AS avg_signal,
+                ROUND((SUM(h.speed_sum) / NULLIF(SUM(h.speed_count), 0))::numeric, 2) AS avg_speed
+            FROM district_hourly_stats h
+            JOIN districts d ON d.id = h.district_id
+            WHERE {where}
+            GROUP BY 1, 2
+            ORDER BY 1, 2
+        """), params).fetchall()
+
+        series: Dict[str, list] = {}
+        for row in rows:
+            series.setdefault(row.series, []).append([
+                row.bucket.isoformat(),
+                int(row.point_count),
+                float(row.avg_battery) if row.avg_battery is not None else None,
+                float(row.avg_signal) if row.avg_signal is not None else None,
+                float(row.avg_speed) if row.avg_speed is not None else None,
+            ])
+
+        return {
+            "bucket": request.bucket,
+            "start": params["start"].isoformat(),
+            "end": params["end"].isoformat(),
+            "columns": TIMESERIES_COLUMNS,
+            "series": series,
+        }
+
+    except Exception as e:
+        logger.error(f"Error getting timeseries: {e}")
+        raise
@@ -0,0 +1,51 @@
+"""
+Servicio para consultar la marca de agua (watermark) del ETL
+
+Los datos de destino solo cambian cuando un ETL (o un lote de POST /ingest)
+registra una fila en etl_control, así que el id de esa fila sirve como
+versión de los datos para claves de caché.
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from app.models.etl_control import ETLControl
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Estados de etl_control que avanzan el último id de Supabase cargado
+# (MICROBATCH = lote de la ingesta continua)
+LOAD_STATUSES = ('SUCCESS', 'MICROBATCH')
+
+# Estados de etl_control que significan "hay datos nuevos confirmados"
+# (INGEST = lote recibido por POST /ingest)
+DATA_CHANGE_STATUSES = LOAD_STATUSES + ('INGEST',)
+
+# Solo cargas del ETL o backfill: los micro-lotes y los lotes de /ingest
+# cambian el watermark cada pocos segundos y no conviene versionar por ellos
+# lo que es caro de regenerar (tiles, calentar la caché)
+ETL_STATUSES = ('SUCCESS',)
+
+
+def get_etl_watermark(db: Session, statuses: tuple = DATA_CHANGE_STATUSES) -> int:
+    """
+    Retorna el id de la última carga confirmada (0 si no hay ninguna)
+
+    Args:
+        db: Sesión de base de datos
+        statuses: Estados que cuentan como carga (default: ETL o ingesta)
+    """
+    watermark = db.query(func.max(ETLControl.id)).filter(
+        ETLControl.status.in_(statuses)
+    ).scalar()
+    return watermark or 0
+
+
+def get_last_processed_id(db: Session) -> int:
+    """
+    Retorna el último id de Supabase cargado por un ETL o micro-lote exitoso (0 si no hay ninguno)
+    """
+    last_run = db.query(ETLControl).filter(
+        ETLControl.status.in_(LOAD_STATUSES)
+    ).order_by(ETLControl.execution_date.desc()).first()
+    return (last_run.last_processed_id or 0) if last_run else 0
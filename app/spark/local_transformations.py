@@ -0,0 +1,164 @@
+# app/spark/local_transformations.py
+"""
+Versión en pandas (vectorizada, en proceso) de transform_locations
+
+Aplica las mismas reglas que la transformación de Spark, pensada para
+micro-lotes chicos donde levantar una sesión de Spark no se justifica.
+"""
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+GRID_SIZE = 0.01
+
+# Columnas de locations que produce la transformación, en orden de carga
+LOCATION_LOAD_COLUMNS = [
+    "id", "device_name", "device_id", "latitude", "longitude",
+    "altitude", "speed", "battery", "signal",
+    "network_type", "network_generation", "sim_operator",
+    "period", "altitude_range", "battery_level", "signal_quality", "speed_range",
+    "timestamp", "date", "location_geom", "lat_grid", "lon_grid", "processed_at",
+]
+
+_RAW_COLUMNS = [
+    "id", "device_name", "device_id", "latitude", "longitude", "altitude",
+    "speed", "battery", "signal", "network_type", "sim_operator", "timestamp",
+]
+
+
+def _classify_network(network_type: pd.Series) -> pd.Series:
+    """Mismas reglas (y orden) que el when/rlike de transform_locations"""
+    text = network_type.fillna("")
+    return pd.Series(np.select(
+        [
+            network_type.isna(),
+            text.str.contains("wifi|wi-fi", case=False, regex=True),
+            text.str.contains("5G", case=False, regex=False),
+            text.str.contains("4G|LTE|mobile", case=False, regex=True),
+            text.str.contains("3G|HSDPA|HSPA|UMTS|WCDMA", case=False, regex=True),
+            text.str.contains("2G|EDGE|GPRS|GSM", case=False, regex=True),
+        ],
+        ["SIN DATOS", "WiFi", "5G", "4G", "3G", "2G"],
+        default="SIN DATOS",
+    ), index=network_type.index)
+
+
+def _normalize_operator(operator: pd.Series) -> pd.Series:
+    """Mismas reglas (y orden) que el when/rlike de transform_locations"""
+    text = operator.fillna("")
+    return pd.Series(np.select(
+        [
+            operator.isna() | (text == ""),
+            text.str.contains("unknown|sin señ|sin seal|n/a", case=False, regex=True),
+            text.str.contains("entel|bomov|18vacunate|distancia|movil gsm|t-mobile", case=False, regex=True),
+            text.str.contains("tigo", case=False, regex=False),
+            text.str.contains("viva", case=False, regex=False),
+        ],
+        ["SIN SEÑAL", "SIN SEÑAL", "ENTEL", "TIGO", "VIVA"],
+        default=text,
+    ), index=operator.index)
+
+
+def _bins(values: pd.Series, edges: List[float], labels: List[str], right: bool) -> pd.Series:
+    """Clasifica valores en rangos; NULL se mantiene como None"""
+    categories = pd.cut(values, [-np.inf, *edges, np.inf], labels=labels, right=right)
+    return categories.astype(object).where(values.notna(), None)
+
+
+def transform_records(records: List[Dict]) -> pd.DataFrame:
+    """
+    Transforma registros crudos de Supabase a filas de locations
+
+    Args:
+        records: Lista de dicts tal como los devuelve PostgREST
+
+    Returns:
+        DataFrame con las columnas de LOCATION_LOAD_COLUMNS
+    """
+    return transform_frame(pd.DataFrame.from_records(records))
+
+
+def transform_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Igual que transform_records pero a partir de un DataFrame con las columnas
+    crudas (las que falten se toman como NULL)
+    """
+    df = df.copy()
+    for column in _RAW_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+    df = df[_RAW_COLUMNS]
+
+    for column in ("latitude", "longitude", "altitude", "speed", "battery", "signal"):
+        df[column] = pd.to_numeric(df[column], errors="coerce").astype("float64")
+    df["id"] = pd.to_numeric(df["id"], errors="coerce").astype("Int64")
+    # PostgREST omite la fracción de segundo cuando es cero: sin format="ISO8601"
+    # pandas infiere el formato de la primera fila y el resto queda NaT
+    df["timestamp"] = pd.to_datetime(
+        df["timestamp"], errors="coerce", utc=True, format="ISO8601"
+    ).dt.tz_localize(None)
+
+    # 1. Filtrar coordenadas inválidas y timestamps NULL o no parseables
+    # (locations.timestamp es NOT NULL: una fila así haría fallar todo el COPY)
+    missing_timestamp = df["timestamp"].isna()
+    if missing_timestamp.any():
+        logger.warning(f"Dropping {int(missing_timestamp.sum()):,} records without a valid timestamp")
+    valid = (
+        df["id"].notna() & ~missing_timestamp
+        & df["latitude"].between(-90, 90) & df["longitude"].between(-180, 180)
+    )
+    df = df[valid].copy()
+
+    # 2. Período del día
+    hour = df["timestamp"].dt.hour
+    df["period"] = np.select(
+        [(hour >= 6) & (hour < 12), (hour >= 12) & (hour < 19)],
+        ["MAÑANA", "TARDE"],
+        default="NOCHE",
+    )
+
+    # 3-4. Altitud y batería (antes de reemplazar NULL por 0)
+    df["altitude_range"] = _bins(df["altitude"], [400, 500], ["BAJA", "MEDIA", "ALTA"], right=True)
+    df["battery_level"] = _bins(df["battery"], [25, 50, 75], ["CRITICO", "BAJO", "MEDIO", "ALTO"], right=False)
+
+    # 5. Red
+    df["network_type"] = _classify_network(df["network_type"])
+    df["network_generation"] = df["network_type"]
+
+    # 6. Calidad de señal
+    df["signal_quality"] = _bins(df["signal"], [-80, -70, -60], ["POBRE", "REGULAR", "BUENA", "EXCELENTE"], right=False)
+
+    # 7. Geometría EWKT para PostGIS
+    df["location_geom"] = (
+        "SRID=4326;POINT(" + df["longitude"].astype(str) + " " + df["latitude"].astype(str) + ")"
+    )
+
+    # 8. Fecha sin hora
+    df["date"] = df["timestamp"].dt.normalize()
+
+    # 9. NULL -> 0 en campos numéricos
+    for column in ("altitude", "speed", "battery", "signal"):
+        df[column] = df[column].fillna(0.0)
+
+    # 10. Operador
+    df["sim_operator"] = _normalize_operator(df["sim_operator"])
+
+    # 11. Rango de velocidad (m/s -> km/h)
+    speed_kmh = df["speed"] * 3.6
+    df["speed_range"] = np.select(
+        [df["speed"] == 0, speed_kmh <= 5, speed_kmh <= 10, speed_kmh <= 60],
+        ["DETENIDO", "CAMINANDO", "CORRIENDO", "TRANSPORTE PÚBLICO"],
+        default="VEHÍCULO",
+    )
+
+    # 12. Grilla para heatmap
+    df["lat_grid"] = np.floor(df["latitude"] / GRID_SIZE) * GRID_SIZE
+    df["lon_grid"] = np.floor(df["longitude"] / GRID_SIZE) * GRID_SIZE
+
+    df["processed_at"] = datetime.utcnow()
+
+    return df[LOCATION_LOAD_COLUMNS]
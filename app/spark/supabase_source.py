@@ -0,0 +1,265 @@
+# app/spark/supabase_source.py
+"""
+Extracción distribuida desde Supabase en los executors de Spark
+
+- read_supabase: PostgREST. El driver solo consulta el id máximo y reparte el
+  rango (last_id, max_id] en particiones; cada tarea pagina su propio tramo
+  con keyset por id. Ningún registro pasa por el driver.
+- read_supabase_jdbc: lectura directa del Postgres de Supabase por JDBC,
+  particionada por id y con el watermark empujado al WHERE de cada partición.
+"""
+from pyspark.sql import DataFrame, SparkSession
+from pyspark.sql.functions import col
+from pyspark.sql.types import (
+    StructType, StructField, LongType, DoubleType, IntegerType, StringType, TimestampType
+)
+from app.config import settings
+from app.database.supabase_utils import get_supabase_client
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columnas crudas que consume transform_locations
+SOURCE_SCHEMA = StructType([
+    StructField("id", LongType(), False),
+    StructField("device_name", StringType(), True),
+    StructField("device_id", StringType(), True),
+    StructField("latitude", DoubleType(), True),
+    StructField("longitude", DoubleType(), True),
+    StructField("altitude", DoubleType(), True),
+    StructField("speed", DoubleType(), True),
+    StructField("battery", IntegerType(), True),
+    StructField("signal", IntegerType(), True),
+    StructField("network_type", StringType(), True),
+    StructField("sim_operator", StringType(), True),
+    StructField("timestamp", TimestampType(), True),
+])
+
+_CASTS = {
+    LongType: int,
+    IntegerType: lambda value: int(float(value)),
+    DoubleType: float,
+    StringType: str,
+    TimestampType: lambda value: datetime.fromisoformat(value.replace("Z", "+00:00")),
+}
+
+
+def plan_id_partitions(low_id: int, high_id: int, num_partitions: int) -> List[Tuple[int, int]]:
+    """
+    Divide (low_id, high_id] en hasta num_partitions tramos (inicio, fin] contiguos
+
+    Returns:
+        Lista de tuplas (inicio, fin); vacía si high_id <= low_id
+    """
+    if high_id <= low_id:
+        return []
+    span = high_id - low_id
+    num_partitions = max(1, min(num_partitions, span))
+    step = -(-span // num_partitions)  # ceil
+    return [
+        (start, min(start + step, high_id))
+        for start in range(low_id, high_id, step)
+    ]
+
+
+def _make_partition_reader(source: Dict):
+    """
+    Crea la función que corre en cada tarea
+
+    Solo captura valores simples (url, key, filtros) para que la closure se
+    serialice sin arrastrar settings ni clientes del driver.
+    """
+    fields = [(field.name, _CASTS[type(field.dataType)]) for field in SOURCE_SCHEMA.fields]
+
+    def read_partition(bounds: Iterator[Tuple[int, int]]) -> Iterator[Tuple]:
+        import time
+        import requests
+
+        session = requests.Session()
+        session.headers.update(source["headers"])
+        url = f"{source['base_url']}/rest/v1/{source['table']}"
+
+        for low_id, high_id in bounds:
+            current_id = low_id
+            while current_id < high_id:
+                conditions = [f"id.gt.{current_id}", f"id.lte.{high_id}", *source["conditions"]]
+                params = {
+                    "select": source["select"],
+                    "and": f"({','.join(conditions)})",
+                    "order": "id.asc",
+                    "limit": str(source["page_size"]),
+                }
+
+                for retry in range(source["max_retries"]):
+                    try:
+                        resp = session.get(url, params=params, timeout=source["timeout"])
+                        resp.raise_for_status()
+                        page = resp.json()
+                        break
+                    except requests.exceptions.RequestException:
+                        if retry == source["max_retries"] - 1:
+                            raise
+                        time.sleep(2 ** retry)  # Backoff exponencial
+
+                for record in page:
+                    yield tuple(
+                        None if record.get(name) is None else cast(record[name])
+                        for name, cast in fields
+                    )
+
+                if len(page) < source["page_size"]:
+                    break
+                current_id = page[-1]["id"]
+
+        session.close()
+
+    return read_partition
+
+
+def read_supabase(
+    spark: SparkSession,
+    last_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    num_partitions: Optional[int] = None,
+    page_size: Optional[int] = None
+) -> DataFrame:
+    """
+    Lee la tabla de Supabase como DataFrame con la extracción en los executors
+
+    Args:
+        spark: Sesión de Spark
+        last_id: Solo ids mayores a este (None = desde el principio)
+        start_date: Filtro timestamp >= start_date
+        end_date: Filtro timestamp <= end_date
+        num_partitions: Tareas de extracción (default: SUPABASE_SPARK_PARTITIONS)
+        page_size: Filas por request de cada tarea
+
+    Returns:
+        DataFrame con el esquema SOURCE_SCHEMA (sin materializar)
+    """
+    client = get_supabase_client()
+    num_partitions = num_partitions or settings.SUPABASE_SPARK_PARTITIONS
+    page_size = page_size or min(settings.SUPABASE_FETCH_LIMIT, 10000)
+
+    low_id = last_id or 0
+    high_id = client.get_max_id()
+    partitions = plan_id_partitions(low_id, high_id, num_partitions)
+
+    if not partitions:
+        logger.info(f"No records in Supabase after id {low_id}")
+        return spark.createDataFrame([], SOURCE_SCHEMA)
+
+    conditions = []
+    if start_date:
+        conditions.append(f"timestamp.gte.{start_date}")
+    if end_date:
+        conditions.append(f"timestamp.lte.{end_date}")
+
+    source = {
+        "base_url": client.base_url,
+        "table": client.table,
+        "headers": client.headers,
+        "select": ",".join(field.name for field in SOURCE_SCHEMA.fields),
+        "conditions": conditions,
+        "page_size": page_size,
+        "timeout": 120,
+        "max_retries": 3,
+    }
+
+    logger.info(f"Distributed extraction of ids ({low_id:,}, {high_id:,}] "
+                f"in {len(partitions)} partitions ({page_size:,} rows per request)")
+
+    rdd = spark.sparkContext \
+        .parallelize(partitions, len(partitions)) \
+        .mapPartitions(_make_partition_reader(source))
+
+    return spark.createDataFrame(rdd, SOURCE_SCHEMA)
+
+
+def _jdbc_options(connection: Optional[Dict]) -> Dict[str, str]:
+    """Opciones JDBC del origen (settings SOURCE_PG_*), sobrescribibles para pruebas"""
+    options = {
+        "url": settings.source_jdbc_url,
+        "user": settings.SOURCE_PG_USER,
+        "password": settings.SOURCE_PG_PASSWORD,
+        "driver": "org.postgresql.Driver",
+    }
+    options.update(connection or {})
+    return options
+
+
+def read_supabase_jdbc(
+    spark: SparkSession,
+    last_id: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    num_partitions: Optional[int] = None,
+    table: Optional[str] = None,
+    connection: Optional[Dict] = None
+) -> DataFrame:
+    """
+    Lee la tabla origen directamente del Postgres de Supabase con Spark JDBC
+
+    Los límites de id se consultan con un agregado (una fila); la lectura se
+    particiona por id en num_partitions rangos y los filtros de watermark y
+    fecha se empujan al WHERE de cada partición.
+
+    Args:
+        spark: Sesión de Spark
+        last_id: Solo ids mayores a este (None = desde el principio)
+        start_date: Filtro timestamp >= start_date
+        end_date: Filtro timestamp <= end_date
+        num_partitions: Lecturas en paralelo (default: SOURCE_JDBC_PARTITIONS)
+        table: Tabla origen (default: SUPABASE_TABLE)
+        connection: Opciones JDBC que reemplazan a las de settings (url, user, password)
+
+    Returns:
+        DataFrame con el esquema SOURCE_SCHEMA (sin materializar)
+    """
+    options = _jdbc_options(connection)
+    table = table or settings.SUPABASE_TABLE
+    num_partitions = num_partitions or settings.SOURCE_JDBC_PARTITIONS
+    low_id = last_id or 0
+
+    bounds = spark.read \
+        .format("jdbc") \
+        .options(**options) \
+        .option("dbtable", f"(SELECT min(id) AS low, max(id) AS high FROM {table} WHERE id > {low_id}) AS bounds") \
+        .load() \
+        .first()
+
+    if bounds is None or bounds["high"] is None:
+        logger.info(f"No records in source table after id {low_id}")
+        return spark.createDataFrame([], SOURCE_SCHEMA)
+
+    low, high = int(bounds["low"]), int(bounds["high"])
+    num_partitions = max(1, min(num_partitions, high - low + 1))
+
+    logger.info(f"JDBC extraction of ids [{low:,}, {high:,}] from {table} "
+                f"in {num_partitions} partitions")
+
+    df = spark.read \
+        .format("jdbc") \
+        .options(**options) \
+        .option("dbtable", table) \
+        .option("partitionColumn", "id") \
+        .option("lowerBound", str(low)) \
+        .option("upperBound", str(high + 1)) \
+        .option("numPartitions", str(num_partitions)) \
+        .option("fetchsize", str(settings.SOURCE_JDBC_FETCH_SIZE)) \
+        .load()
+
+    # Filtros simples: Spark los agrega al WHERE de cada partición (pushdown)
+    df = df.filter(col("id") > low_id)
+    if start_date:
+        df = df.filter(col("timestamp") >= start_date)
+    if end_date:
+        df = df.filter(col("timestamp") <= end_date)
+
+    return df.select(*[
+        col(field.name).cast(field.dataType).alias(field.name)
+        for field in SOURCE_SCHEMA.fields
+    ])
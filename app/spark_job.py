@@ -2,10 +2,10 @@
 import json
 import os
 import sys
-from app.db_utils import SPARK_APP_NAME, SPARK_MASTER, DEST_PG_HOST, DEST_PG_PORT, DEST_PG_DB, DEST_PG_USER, DEST_PG_PASSWORD
+from app.db_utils import SPARK_APP_NAME, SPARK_MASTER
+from app.database.postgres_db import pooled_connection
 from app.database.supabase_utils import fetch_all_supabase
 from pyspark.sql import SparkSession, functions as F, types as T
-import psycopg2
 from psycopg2.extras import execute_values
 
 def create_spark():
@@ -72,13 +72,9 @@ def ensure_tables_created():
     """
     Crea las tablas destino si no existen (simple SQL).
     """
-    conn = psycopg2.connect(host=DEST_PG_HOST,
-                            port=DEST_PG_PORT,
-                            dbname=DEST_PG_DB,
-                            user=DEST_PG_USER,
-                            password=DEST_PG_PASSWORD)
-    cur = conn.cursor()
-    cur.execute("""
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
     CREATE TABLE IF NOT EXISTS public.devices_summary_by_device_day (
       device_id TEXT,
       device_name TEXT,
@@ -89,7 +85,7 @@ def ensure_tables_created():
       avg_battery DOUBLE PRECISION
     );
     """)
-    cur.execute("""
+        cur.execute("""
     CREATE TABLE IF NOT EXISTS public.devices_positions_clean (
       id TEXT PRIMARY KEY,
       device_name TEXT,
@@ -105,9 +101,7 @@ def ensure_tables_created():
       timestamp TIMESTAMP
     );
     """)
-    conn.commit()
-    cur.close()
-    conn.close()
+        cur.close()
 
 def write_summary_to_postgres(df_summary):
     """
@@ -120,43 +114,33 @@ def write_summary_to_postgres(df_summary):
 
     pdf = df_summary.toPandas()
 
-    # Conexión
-    conn = psycopg2.connect(host=DEST_PG_HOST,
-                            port=DEST_PG_PORT,
-                            dbname=DEST_PG_DB,
-                            user=DEST_PG_USER,
-                            password=DEST_PG_PASSWORD)
-    cur = conn.cursor()
-
-    # Si quieres truncar la tabla antes:
-    # cur.execute("TRUNCATE TABLE public.devices_summary_by_device_day;")
-    # conn.commit()
-
-    # Usaremos INSERT ... ON CONFLICT (si tienes PK), pero aquí no definimos PK.
-    # Para simplicidad haremos DELETE de las filas de las fechas presentes y luego INSERT.
-    # Obtener fechas únicas
-    dates = pdf['date'].dropna().astype(str).unique().tolist()
-    if dates:
-        # delete las filas de esas fechas para evitar duplicados (ajusta según tu política)
-        cur.execute("DELETE FROM public.devices_summary_by_device_day WHERE date = ANY(%s);", (dates,))
-
-    # Preparar tuplas
-    tuples = list(pdf[['device_id','device_name','date','points_count','avg_speed','max_speed','avg_battery']].itertuples(index=False, name=None))
-
-    sql = """
-    INSERT INTO public.devices_summary_by_device_day
-    (device_id, device_name, date, points_count, avg_speed, max_speed, avg_battery)
-    VALUES (%s)
-    """
-    if tuples:
-        execute_values(cur, sql, tuples)
-        conn.commit()
-        print(f"Wrote {len(tuples)} summary rows to Postgres.")
-    else:
-        print("No tuples to insert.")
-
-    cur.close()
-    conn.close()
+    # Conexión tomada del pool compartido (pooled_connection hace commit al salir)
+    with pooled_connection() as conn:
+        cur = conn.cursor()
+
+        # Usaremos INSERT ... ON CONFLICT (si tienes PK), pero aquí no definimos PK.
+        # Para simplicidad haremos DELETE de las filas de las fechas presentes y luego INSERT.
+        # Obtener fechas únicas
+        dates = pdf['date'].dropna().astype(str).unique().tolist()
+        if dates:
+            # delete las filas de esas fechas para evitar duplicados (ajusta según tu política)
+            cur.execute("DELETE FROM public.devices_summary_by_device_day WHERE date = ANY(%s);", (dates,))
+
+        # Preparar tuplas
+        tuples = list(pdf[['device_id','device_name','date','points_count','avg_speed','max_speed','avg_battery']].itertuples(index=False, name=None))
+
+        sql = """
+        INSERT INTO public.devices_summary_by_device_day
+        (device_id, device_name, date, points_count, avg_speed, max_speed, avg_battery)
+        VALUES %s
+        """
+        if tuples:
+            execute_values(cur, sql, tuples)
+            print(f"Wrote {len(tuples)} summary rows to Postgres.")
+        else:
+            print("No tuples to insert.")
+
+        cur.close()
 
 
 def main():
@@ -0,0 +1,29 @@
+"""
+Utilidades para paginación por keyset (cursor opaco)
+"""
+import base64
+from typing import Optional
+
+
+def encode_cursor(last_id: int) -> str:
+    """Codifica el último id de una página como token opaco"""
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """
+    Decodifica un token generado por encode_cursor
+
+    Raises:
+        ValueError: si el token no es válido
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        prefix, value = base64.urlsafe_b64decode(padded.encode()).decode().split(":", 1)
+        if prefix != "id":
+            raise ValueError
+        return int(value)
+    except Exception:
+        raise ValueError(f"Invalid cursor '{cursor}'")
@@ -0,0 +1,40 @@
+"""
+Respuestas JSON rápidas basadas en orjson y validación de ETags
+"""
+from decimal import Decimal
+from fastapi.responses import JSONResponse
+from typing import Any, Optional
+import orjson
+
+
+def _default(value: Any):
+    """Tipos que orjson no serializa por sí mismo"""
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serializa a JSON (datetime, date y UUID se manejan de forma nativa)"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSONResponse que serializa con orjson
+
+    Si la ruta retorna una instancia de esta clase directamente, FastAPI no
+    pasa el contenido por jsonable_encoder; conviene para listas grandes de
+    dicts que ya contienen solo tipos simples.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara el header If-None-Match (puede traer varios ETags o W/) con el ETag actual"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates or "*" in candidates
@@ -0,0 +1,94 @@
+"""
+Utilidades para respuestas en streaming (NDJSON, Arrow IPC y Parquet)
+
+Reciben lotes de filas (por ejemplo result.partitions() de un cursor del
+servidor) y emiten bytes lote por lote, sin armar la respuesta completa.
+"""
+from app.utils.responses import dumps
+from typing import Iterable, Iterator, List, Sequence
+import io
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+
+def ndjson_stream(batches: Iterable[Sequence], columns: List[str]) -> Iterator[bytes]:
+    """Emite un objeto JSON por fila, un bloque de bytes por lote"""
+    for batch in batches:
+        chunk = b"".join(
+            dumps(dict(zip(columns, row))) + b"\n"
+            for row in batch
+        )
+        if chunk:
+            yield chunk
+
+
+def arrow_ipc_stream(batches: Iterable[Sequence], schema) -> Iterator[bytes]:
+    """
+    Emite un stream Arrow IPC con un RecordBatch por lote
+
+    Args:
+        batches: Lotes de filas (tuplas en el orden de schema)
+        schema: pyarrow.Schema
+    """
+    import pyarrow as pa
+
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+
+    yield _drain(sink)  # schema
+
+    for batch in batches:
+        if not batch:
+            continue
+        writer.write_batch(to_record_batch(batch, schema))
+        yield _drain(sink)
+
+    writer.close()
+    yield _drain(sink)
+
+
+def parquet_stream(batches: Iterable[Sequence], schema) -> Iterator[bytes]:
+    """
+    Emite un archivo Parquet con un row group por lote
+
+    El writer solo agrega bytes al final (el footer va al cerrar), así que
+    cada row group se puede enviar apenas se escribe.
+
+    Args:
+        batches: Lotes de filas (tuplas en el orden de schema)
+        schema: pyarrow.Schema
+    """
+    import pyarrow.parquet as pq
+
+    sink = io.BytesIO()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+
+    for batch in batches:
+        if not batch:
+            continue
+        writer.write_batch(to_record_batch(batch, schema))
+        chunk = _drain(sink)
+        if chunk:
+            yield chunk
+
+    writer.close()
+    yield _drain(sink)
+
+
+def to_record_batch(batch: Sequence, schema):
+    """Convierte un lote de tuplas en un pyarrow.RecordBatch columnar"""
+    import pyarrow as pa
+
+    columns = list(zip(*batch))
+    arrays = [pa.array(column, type=field.type) for column, field in zip(columns, schema)]
+    return pa.record_batch(arrays, schema=schema)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    """Retorna lo escrito en el buffer y lo vacía"""
+    chunk = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return chunk
@@ -0,0 +1,103 @@
+"""
+Telemetría de etapas del ETL (duración, filas/s y memoria pico)
+
+Spark evalúa en forma perezosa: cada etapa mide el tiempo de pared del paso
+en el driver, que incluye las acciones (count, write) que dispara.
+
+La memoria pico es la del proceso Python del driver. En Linux el pico (VmHWM)
+se reinicia al empezar cada ejecución, así que un scheduler o la API que
+corren varios ETL en el mismo proceso reportan el pico de cada ejecución.
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+import sys
+import time
+
+try:
+    import resource  # Solo Unix
+except ImportError:
+    resource = None
+
+
+PROC_STATUS = "/proc/self/status"
+PROC_CLEAR_REFS = "/proc/self/clear_refs"
+
+
+def reset_peak_memory() -> bool:
+    """
+    Reinicia el pico de memoria residente del proceso (Linux >= 4.0)
+
+    Returns:
+        True si se pudo reiniciar; False donde no hay /proc o no está permitido
+    """
+    try:
+        with open(PROC_CLEAR_REFS, "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_memory_mb() -> Optional[float]:
+    """
+    Pico de memoria residente del proceso en MB
+
+    En Linux lee VmHWM (respeta reset_peak_memory); en otros Unix usa
+    ru_maxrss, que es el pico de toda la vida del proceso. None en Windows.
+    """
+    try:
+        with open(PROC_STATUS) as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en bytes en macOS y en KB en Linux
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+class ETLTelemetry:
+    """Acumula las etapas medidas de una ejecución"""
+
+    def __init__(self):
+        self.stages: List[Dict] = []
+        self.started = time.monotonic()
+        self._peak_memory_reset = reset_peak_memory()
+
+    @contextmanager
+    def stage(self, name: str, records: Optional[int] = None):
+        """
+        Mide una etapa; las filas pueden pasarse al entrar o asignarse
+        dentro del bloque con entry["records"] = n
+        """
+        entry = {"stage": name, "started_at": datetime.utcnow(), "records": records}
+        start = time.monotonic()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] = round(time.monotonic() - start, 3)
+            entry["rows_per_second"] = (
+                round(entry["records"] / entry["seconds"], 1)
+                if entry["records"] and entry["seconds"] > 0 else None
+            )
+            self.stages.append(entry)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def peak_memory_mb(self) -> Optional[float]:
+        """Pico de memoria desde el inicio de la ejecución (None si no se pudo reiniciar el pico)"""
+        return peak_memory_mb() if self._peak_memory_reset else None
+
+    def summary(self) -> Dict[str, float]:
+        """Segundos por etapa (la misma etapa repetida se suma)"""
+        totals: Dict[str, float] = {}
+        for entry in self.stages:
+            totals[entry["stage"]] = round(totals.get(entry["stage"], 0.0) + entry["seconds"], 3)
+        return totals
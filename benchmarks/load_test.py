@@ -0,0 +1,386 @@
+"""
+Prueba de carga de la API HTTP (/districts/* y /provinces/*)
+
+Siembra un PostGIS local con el dataset sintético (transformación pandas +
+COPY, sin Spark), levanta la app con uvicorn y genera tráfico mixto con N
+clientes concurrentes durante un tiempo fijo. Reporta latencia p50/p95/p99,
+throughput y tasa de errores por ruta en un JSON en benchmarks/results/;
+--compare contrasta dos corridas.
+
+Uso:
+    python benchmarks/load_test.py --seed-rows 1M --reset --concurrency 32 --duration 60
+    python benchmarks/load_test.py --skip-seed --concurrency 64
+    python benchmarks/load_test.py --compare results/a.json results/b.json
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import json
+import random
+import subprocess
+import threading
+import time
+
+import numpy as np
+import requests
+
+from synthetic_data import SyntheticLocations, parse_size
+from run_etl_benchmark import RESULTS_DIR, environment, git_commit, reset_destination
+
+ROOT = Path(__file__).parent.parent
+
+SEED_CHUNK_ROWS = 100_000
+
+# Peso relativo de cada ruta en el tráfico mixto
+DEFAULT_MIX = {
+    "GET /districts/": 5,
+    "GET /districts/geojson": 5,
+    "GET /districts/{n}": 10,
+    "GET /districts/{n}/statistics": 15,
+    "GET /districts/statistics/all": 10,
+    "GET /districts/point/find": 20,
+    "POST /districts/point/batch": 5,
+    "GET /districts/{n}/locations": 15,
+    "GET /provinces/": 5,
+    "GET /provinces/{id}": 10,
+}
+
+
+def seed_database(rows: int, seed: int) -> Dict:
+    """
+    Vacía la base destino y carga `rows` ubicaciones sintéticas
+
+    Cada bloque se transforma con transform_records, se carga con COPY y se
+    asigna a distrito/provincia en la misma transacción; al final se
+    reconstruyen los rollups y se registra el watermark en etl_control.
+    """
+    from app.database.bulk_load import copy_locations
+    from app.database.postgres_db import SessionLocal
+    from app.models.etl_control import ETLControl
+    from app.services.location_service import bulk_assign_geographic_location
+    from app.services.rollup_service import rebuild_all_rollups
+    from app.spark.local_transformations import transform_records, LOCATION_LOAD_COLUMNS
+
+    start = time.monotonic()
+    reset_destination()
+    dataset = SyntheticLocations(rows, seed=seed)
+
+    db = SessionLocal()
+    try:
+        loaded = 0
+        for from_id in range(0, dataset.max_id, SEED_CHUNK_ROWS):
+            to_id = min(from_id + SEED_CHUNK_ROWS, dataset.max_id)
+            df = transform_records(dataset.page(from_id, to_id - from_id, to_id))
+            loaded += copy_locations(db, df, LOCATION_LOAD_COLUMNS)
+            bulk_assign_geographic_location(db, from_id=from_id, to_id=to_id, commit=False)
+            db.commit()
+            print(f"  • Sembradas {loaded:,}/{rows:,} filas", end="\r")
+        print()
+
+        rebuild_all_rollups(db)
+        # El poller de la caché de resultados ve un watermark nuevo
+        db.add(ETLControl(
+            execution_date=datetime.utcnow(),
+            last_processed_id=dataset.max_id,
+            records_processed=loaded,
+            status='SUCCESS',
+            execution_time_seconds=int(time.monotonic() - start)
+        ))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return {"rows": loaded, "seconds": round(time.monotonic() - start, 1)}
+
+
+def start_server(port: int, workers: int, timeout: float = 60) -> subprocess.Popen:
+    """Levanta uvicorn con app.main:app y espera a que responda"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn terminó con código {process.returncode}")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/provinces/", timeout=2)
+            return process
+        except requests.ConnectionError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"uvicorn no respondió en {timeout}s")
+
+
+class TrafficMix:
+    """
+    Elige requests al azar según los pesos de la mezcla
+
+    Los parámetros (números de distrito, ids de provincia, puntos) salen de
+    la propia API y del dataset sintético, así que las consultas encuentran filas.
+    """
+
+    def __init__(self, base_url: str, mix: Dict[str, int], dataset: SyntheticLocations, seed: int):
+        self.base_url = base_url
+        self.routes = list(mix)
+        self.weights = [mix[route] for route in self.routes]
+        self.seed = seed
+
+        districts = requests.get(f"{base_url}/districts/", timeout=30).json()
+        provinces = requests.get(f"{base_url}/provinces/", timeout=30).json()
+        self.district_numbers = [d["district_number"] for d in districts] or [1]
+        self.province_ids = [p["id"] for p in provinces] or [1]
+
+        sample = dataset.page(0, 5000)
+        self.points = [(r["latitude"], r["longitude"]) for r in sample
+                       if r["latitude"] is not None and r["longitude"] is not None]
+
+        self.builders: Dict[str, Callable[[random.Random], Tuple[str, str, Dict]]] = {
+            "GET /districts/": lambda rnd: ("GET", "/districts/", {}),
+            "GET /districts/geojson": lambda rnd: ("GET", "/districts/geojson",
+                                                   {"params": {"zoom": rnd.choice([10, 12, 14])}}),
+            "GET /districts/{n}": lambda rnd: ("GET", f"/districts/{rnd.choice(self.district_numbers)}", {}),
+            "GET /districts/{n}/statistics": lambda rnd: (
+                "GET", f"/districts/{rnd.choice(self.district_numbers)}/statistics", {}),
+            "GET /districts/statistics/all": lambda rnd: ("GET", "/districts/statistics/all", {}),
+            "GET /districts/point/find": self._point_find,
+            "POST /districts/point/batch": self._point_batch,
+            "GET /districts/{n}/locations": lambda rnd: (
+                "GET", f"/districts/{rnd.choice(self.district_numbers)}/locations",
+                {"params": {"limit": rnd.choice([100, 500])}}),
+            "GET /provinces/": lambda rnd: ("GET", "/provinces/", {}),
+            "GET /provinces/{id}": lambda rnd: ("GET", f"/provinces/{rnd.choice(self.province_ids)}", {}),
+        }
+        unknown = set(self.routes) - set(self.builders)
+        if unknown:
+            raise ValueError(f"Rutas desconocidas en la mezcla: {', '.join(sorted(unknown))}")
+
+    def _point_find(self, rnd: random.Random):
+        lat, lon = rnd.choice(self.points)
+        return "GET", "/districts/point/find", {"params": {"lat": lat, "lon": lon}}
+
+    def _point_batch(self, rnd: random.Random):
+        points = rnd.sample(self.points, min(1000, len(self.points)))
+        return "POST", "/districts/point/batch", {"json": {
+            "latitudes": [lat for lat, _ in points],
+            "longitudes": [lon for _, lon in points],
+        }}
+
+    def next(self, rnd: random.Random) -> Tuple[str, str, str, Dict]:
+        route = rnd.choices(self.routes, self.weights)[0]
+        method, path, kwargs = self.builders[route](rnd)
+        return route, method, path, kwargs
+
+
+def drive(mix: TrafficMix, concurrency: int, duration: float, warmup: float) -> List[Tuple]:
+    """
+    Corre `concurrency` clientes en hilos durante warmup + duration segundos
+
+    Returns:
+        Muestras (ruta, status, latencia en segundos, bytes) fuera del warmup
+    """
+    samples: List[Tuple] = []
+    lock = threading.Lock()
+    measure_from = time.monotonic() + warmup
+    deadline = measure_from + duration
+
+    def client(index: int):
+        rnd = random.Random(mix.seed * 1000 + index)
+        session = requests.Session()
+        local: List[Tuple] = []
+        while True:
+            route, method, path, kwargs = mix.next(rnd)
+            started = time.monotonic()
+            if started >= deadline:
+                break
+            try:
+                response = session.request(method, mix.base_url + path, timeout=60, **kwargs)
+                status, size = response.status_code, len(response.content)
+            except requests.RequestException:
+                status, size = 0, 0
+            if started >= measure_from:
+                local.append((route, status, time.monotonic() - started, size))
+        session.close()
+        with lock:
+            samples.extend(local)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    return samples
+
+
+def summarize(samples: List[Tuple], duration: float) -> Dict[str, Dict]:
+    """Latencias (ms), throughput y errores por ruta y en total"""
+    groups: Dict[str, List[Tuple]] = {}
+    for sample in samples:
+        groups.setdefault(sample[0], []).append(sample)
+    groups["TOTAL"] = samples
+
+    report = {}
+    for route, rows in sorted(groups.items()):
+        if not rows:
+            continue
+        latencies = np.array([row[2] for row in rows]) * 1000
+        errors = sum(1 for row in rows if row[1] == 0 or row[1] >= 400)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        report[route] = {
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate": round(errors / len(rows), 4),
+            "throughput_rps": round(len(rows) / duration, 1),
+            "mean_ms": round(float(latencies.mean()), 2),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "max_ms": round(float(latencies.max()), 2),
+            "bytes": sum(row[3] for row in rows),
+        }
+    return report
+
+
+def print_report(report: Dict[str, Dict]):
+    print(f"\n  {'ruta':<32} {'req':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6}")
+    for route, stats in report.items():
+        print(f"  {route:<32} {stats['requests']:>7,} {stats['throughput_rps']:>8.1f} "
+              f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} "
+              f"{stats['error_rate'] * 100:>6.2f}")
+
+
+def compare(base_path: Path, new_path: Path, threshold: float) -> bool:
+    """
+    Compara p95/p99, throughput y errores por ruta
+
+    Returns:
+        True si alguna ruta empeoró más que threshold (%) o sumó errores
+    """
+    base = json.loads(base_path.read_text())
+    new = json.loads(new_path.read_text())
+    regressed = False
+
+    print("\n" + "="*70)
+    print(f"COMPARACIÓN: {base['environment']['git_commit']} -> {new['environment']['git_commit']}")
+    print(f"  concurrencia {base['config']['concurrency']} -> {new['config']['concurrency']}, "
+          f"filas {base['config']['seed_rows']} -> {new['config']['seed_rows']}")
+    print("="*70)
+
+    for route, stats in new["routes"].items():
+        old = base["routes"].get(route)
+        if not old:
+            print(f"\n{route}: sin datos en la corrida base")
+            continue
+        print(f"\n{route}")
+        for metric, higher_is_worse in (("p50_ms", True), ("p95_ms", True), ("p99_ms", True),
+                                        ("throughput_rps", False)):
+            before, after = old[metric], stats[metric]
+            change = (after - before) / before * 100 if before else 0.0
+            worse = change > threshold if higher_is_worse else change < -threshold
+            flag = "  ⚠ REGRESIÓN" if worse else ""
+            regressed |= worse
+            print(f"  {metric:<15} {before:>10.1f} -> {after:>10.1f}  ({change:+6.1f}%){flag}")
+        if stats["error_rate"] > old["error_rate"]:
+            regressed = True
+            print(f"  {'error_rate':<15} {old['error_rate']:>10.4f} -> {stats['error_rate']:>10.4f}  ⚠ REGRESIÓN")
+
+    print()
+    return regressed
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """'GET /provinces/=5,GET /districts/{n}=10' -> pesos por ruta"""
+    mix = {}
+    for item in value.split(","):
+        route, _, weight = item.rpartition("=")
+        mix[route.strip()] = int(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga de /districts y /provinces')
+    parser.add_argument('--seed-rows', type=parse_size, default=100_000, help='Filas sintéticas (ej. 1M)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--skip-seed', action='store_true', help='Usar los datos ya cargados')
+    parser.add_argument('--reset', action='store_true',
+                        help='Confirmar que se puede vaciar la base destino (local)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30, help='Segundos medidos')
+    parser.add_argument('--warmup', type=float, default=5, help='Segundos descartados al inicio')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--server-workers', type=int, default=1, help='Workers de uvicorn')
+    parser.add_argument('--url', default=None, help='Usar una API ya levantada en vez de iniciar uvicorn')
+    parser.add_argument('--mix', type=parse_mix, default=None,
+                        help='Pesos por ruta, ej. "GET /provinces/=5,GET /districts/{n}=10"')
+    parser.add_argument('--output', type=Path, default=None)
+    parser.add_argument('--compare', nargs=2, type=Path, metavar=('BASE', 'NEW'))
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Porcentaje de empeoramiento que se marca como regresión')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, threshold=args.threshold) else 0)
+
+    if not args.skip_seed and not args.reset:
+        parser.error("sembrar vacía la base destino: confirmar con --reset o usar --skip-seed")
+
+    print("\n" + "="*70)
+    print("PRUEBA DE CARGA DE LA API")
+    print("="*70)
+
+    seeding: Optional[Dict] = None
+    if not args.skip_seed:
+        print(f"\nSembrando {args.seed_rows:,} filas (semilla {args.seed})...")
+        seeding = seed_database(args.seed_rows, args.seed)
+        print(f"✓ {seeding['rows']:,} filas en {seeding['seconds']}s")
+
+    server = None
+    base_url = args.url
+    if not base_url:
+        server = start_server(args.port, args.server_workers)
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        mix = TrafficMix(base_url, args.mix or DEFAULT_MIX,
+                         SyntheticLocations(args.seed_rows, seed=args.seed), args.seed)
+        print(f"\n{args.concurrency} clientes, {args.duration}s (+{args.warmup}s de warmup) contra {base_url}")
+        samples = drive(mix, args.concurrency, args.duration, args.warmup)
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+    routes = summarize(samples, args.duration)
+    print_report(routes)
+
+    report = {
+        "benchmark": "load",
+        "created_at": datetime.utcnow().isoformat(),
+        "environment": environment(),
+        "config": {
+            "seed_rows": args.seed_rows,
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "server_workers": args.server_workers,
+            "mix": args.mix or DEFAULT_MIX,
+        },
+        "seeding": seeding,
+        "routes": routes,
+    }
+    output = args.output or RESULTS_DIR / f"load_{git_commit()}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"\n✓ Resultados: {output}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Stub local de PostgREST que sirve el dataset sintético
+
+Implementa lo que usa SupabaseClient y los extractores: GET/HEAD sobre
+/rest/v1/<tabla> con select, filtros de id (gt/gte/lt/lte/eq), and=(...),
+filtros de timestamp (gte/lte, comparación de texto ISO), order=id.asc|desc,
+limit y Prefer: count=exact. Opcionalmente inyecta errores 500 y latencia
+para ejercitar los reintentos.
+
+Uso:
+    python benchmarks/postgrest_stub.py --rows 1M --port 54321
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+import argparse
+import random
+import threading
+import time
+
+import orjson
+
+from synthetic_data import SyntheticLocations, parse_size
+
+
+def _parse_condition(column: str, expression: str, bounds: Dict):
+    """Aplica un filtro op.valor de PostgREST sobre las cotas de id y timestamp"""
+    op, _, value = expression.partition(".")
+    if column == "id":
+        value = int(value)
+        if op == "gt":
+            bounds["low"] = max(bounds["low"], value)
+        elif op == "gte":
+            bounds["low"] = max(bounds["low"], value - 1)
+        elif op == "lt":
+            bounds["high"] = min(bounds["high"], value - 1)
+        elif op == "lte":
+            bounds["high"] = min(bounds["high"], value)
+        elif op == "eq":
+            bounds["low"], bounds["high"] = max(bounds["low"], value - 1), min(bounds["high"], value)
+    elif column == "timestamp":
+        if op == "gte":
+            bounds["ts_gte"] = value
+        elif op == "lte":
+            bounds["ts_lte"] = value
+
+
+def parse_query(query: Dict[str, List[str]], total_rows: int) -> Dict:
+    """Traduce los parámetros de PostgREST a cotas (low, high], timestamps, orden y límite"""
+    bounds = {"low": 0, "high": total_rows, "ts_gte": None, "ts_lte": None}
+    for column in ("id", "timestamp"):
+        for expression in query.get(column, []):
+            _parse_condition(column, expression, bounds)
+    for expression in query.get("and", []):
+        for condition in expression.strip("()").split(","):
+            column, _, rest = condition.partition(".")
+            _parse_condition(column, rest, bounds)
+
+    select = query.get("select", ["*"])[0]
+    return {
+        **bounds,
+        "columns": None if select == "*" else select.split(","),
+        "descending": query.get("order", ["id.asc"])[0] == "id.desc",
+        "limit": int(query.get("limit", [str(total_rows)])[0]),
+    }
+
+
+class PostgRESTStub:
+    """
+    Servidor HTTP en un hilo sobre un SyntheticLocations
+
+    Args:
+        dataset: Dataset a servir
+        port: Puerto local (0 = libre)
+        error_rate: Fracción de requests GET que responden 500
+        latency_ms: Latencia agregada por request
+    """
+
+    def __init__(self, dataset: SyntheticLocations, port: int = 0,
+                 error_rate: float = 0.0, latency_ms: float = 0.0, seed: int = 0):
+        self.dataset = dataset
+        self.error_rate = error_rate
+        self.latency_ms = latency_ms
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "rows": 0, "bytes": 0, "errors_injected": 0}
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self) -> "PostgRESTStub":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def select_rows(self, params: Dict) -> List[Dict]:
+        """Filas que cumplen los filtros, en el orden y límite pedidos"""
+        low, high, limit = params["low"], params["high"], params["limit"]
+        ts_gte, ts_lte = params["ts_gte"], params["ts_lte"]
+        rows: List[Dict] = []
+
+        if params["descending"]:
+            # Solo se usa para el id máximo (limit chico)
+            cursor = high
+            while cursor > low and len(rows) < limit:
+                start = max(low, cursor - max(limit, 1000))
+                page = self.dataset.page(start, cursor - start, cursor)
+                rows.extend(r for r in reversed(page)
+                            if (not ts_gte or r["timestamp"] >= ts_gte) and (not ts_lte or r["timestamp"] <= ts_lte))
+                cursor = start
+            rows = rows[:limit]
+        else:
+            cursor = low
+            while cursor < high and len(rows) < limit:
+                page = self.dataset.page(cursor, max(limit - len(rows), 1000), high)
+                if not page:
+                    break
+                rows.extend(r for r in page
+                            if (not ts_gte or r["timestamp"] >= ts_gte) and (not ts_lte or r["timestamp"] <= ts_lte))
+                cursor = page[-1]["id"]
+            rows = rows[:limit]
+
+        if params["columns"]:
+            rows = [{column: row.get(column) for column in params["columns"]} for row in rows]
+        return rows
+
+    def _record(self, rows: int = 0, size: int = 0, error: bool = False):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["rows"] += rows
+            self.stats["bytes"] += size
+            self.stats["errors_injected"] += int(error)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _respond(self, status: int, body: bytes = b"", headers: Optional[Dict] = None):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def _parse(self) -> Optional[Tuple[Dict, Dict]]:
+                url = urlparse(self.path)
+                if not url.path.startswith("/rest/v1/"):
+                    self._respond(404, b'{"message":"not found"}')
+                    return None
+                params = parse_query(parse_qs(url.query), stub.dataset.total_rows)
+                headers = {}
+                if "count=exact" in self.headers.get("Prefer", ""):
+                    # El conteo ignora los filtros de timestamp
+                    total = max(0, params["high"] - params["low"])
+                    headers["Content-Range"] = f"0-{max(total - 1, 0)}/{total}"
+                return params, headers
+
+            def do_HEAD(self):
+                parsed = self._parse()
+                if parsed:
+                    stub._record()
+                    self._respond(200, b"", parsed[1])
+
+            def do_GET(self):
+                if stub.latency_ms:
+                    time.sleep(stub.latency_ms / 1000)
+                if stub.error_rate and stub._random.random() < stub.error_rate:
+                    stub._record(error=True)
+                    self._respond(500, b'{"message":"injected error"}')
+                    return
+
+                parsed = self._parse()
+                if not parsed:
+                    return
+                params, headers = parsed
+                rows = stub.select_rows(params)
+                body = orjson.dumps(rows)
+                stub._record(len(rows), len(body))
+                self._respond(200, body, headers)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stub local de PostgREST con datos sintéticos')
+    parser.add_argument('--rows', type=parse_size, default=100_000, help='Filas (ej. 100k, 1M, 10M)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fracción de GET que responden 500')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Latencia agregada por request')
+    args = parser.parse_args()
+
+    stub = PostgRESTStub(SyntheticLocations(args.rows, seed=args.seed), port=args.port,
+                         error_rate=args.error_rate, latency_ms=args.latency_ms)
+
+    print("\n" + "="*70)
+    print("POSTGREST STUB")
+    print("="*70)
+    print(f"  • URL: {stub.url}  (SUPABASE_URL={stub.url})")
+    print(f"  • Filas: {args.rows:,} (semilla {args.seed})")
+    print("  • Ctrl+C para detener")
+    print("="*70 + "\n")
+
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nStub detenido: {stub.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,498 @@
+"""
+Captura de planes de ejecución del SQL de los servicios
+
+Ejecuta cada consulta registrada (DistrictService, ProvinceService y la
+asignación masiva de distrito/provincia) dentro de una transacción que se
+descarta. Mientras corre, un listener before_cursor_execute hace
+EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) de cada sentencia que emite el
+servicio, con los mismos parámetros.
+
+De cada plan se guarda la forma (nodos, tablas e índices), estimadas contra
+filas reales y buffers. Contra una línea base marca como regresión un Seq Scan
+sobre locations o un salto grande de buffers, y avisa si cambió la forma.
+
+Uso:
+    python benchmarks/query_plans.py --seed-rows 1M --reset --update-baseline
+    python benchmarks/query_plans.py                  # compara con la línea base
+    python benchmarks/query_plans.py --only bulk_assign_geographic_location
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import argparse
+import json
+import re
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.database.postgres_db import SessionLocal, engine, PREPARED_STATEMENTS
+from app.services.district_service import DistrictService
+from app.services.province_service import ProvinceService
+from app.services.location_service import (
+    bulk_assign_geographic_location, get_district_and_province_for_point,
+    get_district_and_province_for_points
+)
+from run_etl_benchmark import RESULTS_DIR, environment, git_commit
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "query_plans.json"
+
+# Sentencias a las que se les puede hacer EXPLAIN (no PREPARE, SET, SAVEPOINT...)
+EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|UPDATE|INSERT|DELETE|EXECUTE)\b", re.IGNORECASE)
+
+# Filas que se desasignan para medir la asignación masiva
+ASSIGN_SAMPLE_ROWS = 10000
+
+
+# =============================================================================
+# Planes
+# =============================================================================
+
+def _walk(node: Dict, depth: int = 0) -> Iterator[Tuple[int, Dict]]:
+    yield depth, node
+    for child in node.get("Plans", []):
+        yield from _walk(child, depth + 1)
+
+
+def _node_label(node: Dict) -> str:
+    label = node["Node Type"]
+    if node.get("Index Name"):
+        label += f" using {node['Index Name']}"
+    if node.get("Relation Name"):
+        label += f" on {node['Relation Name']}"
+    return label
+
+
+def summarize_plan(explain: List[Dict]) -> Dict:
+    """
+    Resume la salida de EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)
+
+    Los buffers del nodo raíz ya incluyen los de sus hijos.
+    """
+    root = explain[0]
+    plan = root["Plan"]
+    nodes = []
+    worst_estimate = 1.0
+    for depth, node in _walk(plan):
+        planned, actual = node.get("Plan Rows", 0), node.get("Actual Rows", 0)
+        # Las filas reales son por loop, igual que las estimadas
+        ratio = max(planned, 1) / max(actual, 1)
+        worst_estimate = max(worst_estimate, ratio, 1 / ratio)
+        nodes.append({
+            "depth": depth,
+            "label": _node_label(node),
+            "node_type": node["Node Type"],
+            "relation": node.get("Relation Name"),
+            "index": node.get("Index Name"),
+            "plan_rows": planned,
+            "actual_rows": actual,
+            "loops": node.get("Actual Loops"),
+            "shared_hit": node.get("Shared Hit Blocks", 0),
+            "shared_read": node.get("Shared Read Blocks", 0),
+        })
+
+    shared_hit = plan.get("Shared Hit Blocks", 0)
+    shared_read = plan.get("Shared Read Blocks", 0)
+    return {
+        "shape": ["  " * node["depth"] + node["label"] for node in nodes],
+        "nodes": nodes,
+        "buffers": shared_hit + shared_read,
+        "shared_hit": shared_hit,
+        "shared_read": shared_read,
+        "worst_estimate_ratio": round(worst_estimate, 1),
+        "planning_ms": round(root.get("Planning Time", 0), 3),
+        "execution_ms": round(root.get("Execution Time", 0), 3),
+    }
+
+
+class PlanCapture:
+    """
+    Listener de before_cursor_execute que hace EXPLAIN ANALYZE de cada
+    sentencia mientras está activo (with capture: ...)
+
+    El EXPLAIN corre en otro cursor de la misma conexión, antes que la
+    sentencia original, así el servicio sigue recibiendo sus resultados.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.plans: List[Dict] = []
+
+    def __enter__(self) -> "PlanCapture":
+        self.active = True
+        return self
+
+    def __exit__(self, *exc):
+        self.active = False
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not self.active or executemany or not EXPLAINABLE.match(statement):
+            return
+
+        sql = " ".join(statement.split())
+        match = re.match(r"EXECUTE (\w+)", sql, re.IGNORECASE)
+        if match and match.group(1) in PREPARED_STATEMENTS:
+            sql = f"{sql} -- {' '.join(PREPARED_STATEMENTS[match.group(1)][1].split())}"
+
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters)
+            explain = explain_cursor.fetchone()[0]
+            if isinstance(explain, str):
+                explain = json.loads(explain)
+            self.plans.append({"sql": sql, **summarize_plan(explain)})
+        except Exception as e:
+            self.plans.append({"sql": sql, "error": str(e).strip()})
+            raise
+        finally:
+            explain_cursor.close()
+
+
+# =============================================================================
+# Consultas registradas
+# =============================================================================
+
+QUERY_CASES: Dict[str, Callable[[Session, PlanCapture, Dict], None]] = {}
+
+
+def query_case(name: str):
+    """Registra una función (db, capture, sample) que llama al servicio dentro de `with capture`"""
+    def decorator(func):
+        QUERY_CASES[name] = func
+        return func
+    return decorator
+
+
+@query_case("district_list")
+def _district_list(db, capture, sample):
+    # __wrapped__ evita la caché de resultados (un acierto no emite SQL)
+    with capture:
+        DistrictService.list_districts.__wrapped__(db)
+
+
+@query_case("district_by_number")
+def _district_by_number(db, capture, sample):
+    with capture:
+        DistrictService.get_district_by_number(db, sample["district_number"])
+
+
+@query_case("district_by_point")
+def _district_by_point(db, capture, sample):
+    with capture:
+        DistrictService.get_district_by_point(db, sample["lat"], sample["lon"])
+
+
+@query_case("district_count_locations")
+def _district_count_locations(db, capture, sample):
+    with capture:
+        DistrictService.count_locations_by_district(db, sample["district_number"])
+
+
+@query_case("district_locations_page")
+def _district_locations_page(db, capture, sample):
+    with capture:
+        DistrictService.get_locations_in_district(db, sample["district_number"], 100)
+
+
+@query_case("district_locations_deep_page")
+def _district_locations_deep_page(db, capture, sample):
+    with capture:
+        DistrictService.get_locations_in_district(
+            db, sample["district_number"], 100, after_id=sample["deep_after_id"]
+        )
+
+
+@query_case("district_statistics")
+def _district_statistics(db, capture, sample):
+    # __wrapped__ evita la caché de resultados (un acierto no emite SQL)
+    with capture:
+        DistrictService.get_district_statistics.__wrapped__(db, sample["district_number"])
+
+
+@query_case("district_statistics_all")
+def _district_statistics_all(db, capture, sample):
+    with capture:
+        DistrictService.get_all_districts_statistics.__wrapped__(db)
+
+
+@query_case("province_list")
+def _province_list(db, capture, sample):
+    with capture:
+        ProvinceService.list_provinces.__wrapped__(db)
+
+
+@query_case("province_by_id")
+def _province_by_id(db, capture, sample):
+    with capture:
+        ProvinceService.get_province_by_id(db, sample["province_id"])
+
+
+@query_case("province_by_point")
+def _province_by_point(db, capture, sample):
+    with capture:
+        ProvinceService.get_province_by_point(db, sample["lat"], sample["lon"])
+
+
+@query_case("province_count_locations")
+def _province_count_locations(db, capture, sample):
+    with capture:
+        ProvinceService.count_locations_by_province(db, sample["province_id"])
+
+
+@query_case("point_district_province")
+def _point_district_province(db, capture, sample):
+    with capture:
+        get_district_and_province_for_point(db, sample["lat"], sample["lon"])
+
+
+@query_case("points_district_province_batch")
+def _points_district_province_batch(db, capture, sample):
+    with capture:
+        get_district_and_province_for_points(db, sample["latitudes"], sample["longitudes"])
+
+
+@query_case("bulk_assign_geographic_location")
+def _bulk_assign(db, capture, sample):
+    # Se desasigna un rango (la transacción se descarta) para que el UPDATE tenga trabajo
+    db.execute(text("""
+        UPDATE locations SET district_id = NULL, province_id = NULL
+        WHERE id > :from_id AND id <= :to_id
+    """), {"from_id": sample["assign_from_id"], "to_id": sample["assign_to_id"]})
+    with capture:
+        bulk_assign_geographic_location(
+            db, from_id=sample["assign_from_id"], to_id=sample["assign_to_id"], commit=False
+        )
+
+
+def collect_sample(db: Session) -> Dict:
+    """Parámetros de las consultas tomados de la base sembrada"""
+    location = db.execute(text("""
+        SELECT l.latitude, l.longitude, d.district_number, l.province_id
+        FROM locations l JOIN districts d ON d.id = l.district_id
+        WHERE l.province_id IS NOT NULL
+        ORDER BY l.id
+        LIMIT 1
+    """)).first()
+    if not location:
+        raise RuntimeError("locations no tiene filas asignadas a distrito: sembrar con --seed-rows N --reset")
+
+    max_id = db.execute(text("SELECT MAX(id) FROM locations")).scalar()
+    median_id = db.execute(text("""
+        SELECT id FROM locations WHERE district_id = (
+            SELECT id FROM districts WHERE district_number = :number
+        ) ORDER BY id OFFSET (
+            SELECT COUNT(*) / 2 FROM locations WHERE district_id = (
+                SELECT id FROM districts WHERE district_number = :number
+            )
+        ) LIMIT 1
+    """), {"number": location.district_number}).scalar()
+    points = db.execute(text("""
+        SELECT latitude, longitude FROM locations
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+        ORDER BY id LIMIT 1000
+    """)).all()
+
+    return {
+        "locations": db.execute(text("SELECT COUNT(*) FROM locations")).scalar(),
+        "district_number": location.district_number,
+        "province_id": location.province_id,
+        "lat": location.latitude,
+        "lon": location.longitude,
+        "deep_after_id": median_id or 0,
+        "latitudes": [point.latitude for point in points],
+        "longitudes": [point.longitude for point in points],
+        "assign_from_id": max(0, max_id - ASSIGN_SAMPLE_ROWS),
+        "assign_to_id": max_id,
+    }
+
+
+def capture_plans(only: Optional[List[str]] = None) -> Dict:
+    """
+    Corre cada consulta registrada y captura sus planes
+
+    Cada caso usa su propia sesión y termina con rollback: ni la asignación
+    masiva ni el EXPLAIN ANALYZE de un UPDATE dejan cambios.
+    """
+    db = SessionLocal()
+    try:
+        sample = collect_sample(db)
+    finally:
+        db.close()
+
+    capture = PlanCapture()
+    event.listen(engine, "before_cursor_execute", capture.before_cursor_execute)
+    cases = {}
+    try:
+        for name, case in QUERY_CASES.items():
+            if only and name not in only:
+                continue
+            capture.plans = []
+            error = None
+            db = SessionLocal()
+            try:
+                case(db, capture, sample)
+            except Exception as e:
+                error = str(e).strip()
+            finally:
+                db.rollback()
+                db.close()
+            errors = [plan["error"] for plan in capture.plans if "error" in plan]
+            cases[name] = {"plans": capture.plans, "error": error or (errors[0] if errors else None)}
+            status = "✗" if cases[name]["error"] else "✓"
+            print(f"  {status} {name}: {len(capture.plans)} sentencias")
+    finally:
+        event.remove(engine, "before_cursor_execute", capture.before_cursor_execute)
+
+    return {
+        "benchmark": "query_plans",
+        "created_at": datetime.utcnow().isoformat(),
+        "environment": environment(),
+        "sample": {key: value for key, value in sample.items() if key not in ("latitudes", "longitudes")},
+        "cases": cases,
+    }
+
+
+# =============================================================================
+# Comparación
+# =============================================================================
+
+def find_regressions(report: Dict, baseline: Optional[Dict], watched_tables: List[str],
+                     buffer_factor: float, min_buffer_blocks: int) -> List[Dict]:
+    """
+    Hallazgos por consulta: level "regression" (falla el chequeo) o "warning"
+
+    - Seq Scan sobre una tabla vigilada (siempre es regresión)
+    - buffers > buffer_factor × línea base y al menos min_buffer_blocks más
+    - Forma del plan distinta a la línea base (aviso)
+    - Error al ejecutar o explicar la consulta
+    """
+    findings = []
+    base_cases = (baseline or {}).get("cases", {})
+
+    for name, case in report["cases"].items():
+        if case["error"]:
+            findings.append({"case": name, "level": "regression", "issue": f"error: {case['error']}"})
+            continue
+
+        base_plans = base_cases.get(name, {}).get("plans", [])
+        for position, plan in enumerate(case["plans"]):
+            for node in plan["nodes"]:
+                if node["node_type"] == "Seq Scan" and node["relation"] in watched_tables:
+                    findings.append({"case": name, "statement": position, "level": "regression",
+                                     "issue": f"Seq Scan on {node['relation']}"})
+
+            if position >= len(base_plans) or "error" in base_plans[position]:
+                continue
+            base_plan = base_plans[position]
+
+            if (plan["buffers"] > base_plan["buffers"] * buffer_factor
+                    and plan["buffers"] - base_plan["buffers"] >= min_buffer_blocks):
+                findings.append({"case": name, "statement": position, "level": "regression",
+                                 "issue": f"buffers {base_plan['buffers']:,} -> {plan['buffers']:,}"})
+            if plan["shape"] != base_plan["shape"]:
+                findings.append({"case": name, "statement": position, "level": "warning",
+                                 "issue": "plan shape changed",
+                                 "before": base_plan["shape"], "after": plan["shape"]})
+
+        if base_plans and len(base_plans) != len(case["plans"]):
+            findings.append({"case": name, "level": "warning",
+                             "issue": f"statements {len(base_plans)} -> {len(case['plans'])}"})
+
+    return findings
+
+
+def print_report(report: Dict, findings: List[Dict]):
+    for name, case in report["cases"].items():
+        print(f"\n{name}")
+        for position, plan in enumerate(case["plans"]):
+            if "error" in plan:
+                print(f"  [{position}] error: {plan['error']}")
+                continue
+            print(f"  [{position}] {plan['execution_ms']:.2f} ms, {plan['buffers']:,} buffers "
+                  f"(hit {plan['shared_hit']:,}, read {plan['shared_read']:,}), "
+                  f"estimación x{plan['worst_estimate_ratio']}")
+            for line in plan["shape"]:
+                print(f"      {line}")
+
+    print("\n" + "="*70)
+    if not findings:
+        print("✓ Sin regresiones")
+    for finding in findings:
+        marker = "✗" if finding["level"] == "regression" else "⚠"
+        statement = f" [{finding['statement']}]" if "statement" in finding else ""
+        print(f"{marker} {finding['case']}{statement}: {finding['issue']}")
+        if "before" in finding:
+            print("    antes:   " + " / ".join(line.strip() for line in finding["before"]))
+            print("    ahora:   " + " / ".join(line.strip() for line in finding["after"]))
+    print("="*70 + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Captura y chequeo de planes del SQL de los servicios')
+    parser.add_argument('--seed-rows', type=str, default=None,
+                        help='Sembrar antes con N filas sintéticas (ej. 1M); requiere --reset')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true',
+                        help='Confirmar que se puede vaciar la base destino (local)')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Guardar esta captura como nueva línea base')
+    parser.add_argument('--only', nargs='+', choices=sorted(QUERY_CASES), help='Consultas a capturar')
+    parser.add_argument('--watch-tables', nargs='+', default=['locations'],
+                        help='Tablas en las que un Seq Scan es regresión')
+    parser.add_argument('--buffer-factor', type=float, default=2.0,
+                        help='Múltiplo de buffers respecto a la línea base que es regresión')
+    parser.add_argument('--min-buffer-blocks', type=int, default=100,
+                        help='Aumento mínimo de buffers (bloques de 8 KB) para marcar regresión')
+    parser.add_argument('--output', type=Path, default=None)
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("PLANES DE EJECUCIÓN DEL SQL DE LOS SERVICIOS")
+    print("="*70)
+
+    if args.seed_rows:
+        if not args.reset:
+            parser.error("sembrar vacía la base destino: confirmar con --reset")
+        from load_test import seed_database
+        from synthetic_data import parse_size
+        rows = parse_size(args.seed_rows)
+        print(f"\nSembrando {rows:,} filas (semilla {args.seed})...")
+        seeding = seed_database(rows, args.seed)
+        print(f"✓ {seeding['rows']:,} filas en {seeding['seconds']}s")
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE locations"))
+
+    print()
+    report = capture_plans(args.only)
+
+    baseline = None
+    if args.baseline.exists() and not args.update_baseline:
+        baseline = json.loads(args.baseline.read_text())
+        print(f"\nLínea base: {args.baseline} ({baseline['environment']['git_commit']}, "
+              f"{baseline['sample']['locations']:,} filas)")
+
+    findings = find_regressions(report, baseline, args.watch_tables,
+                                args.buffer_factor, args.min_buffer_blocks)
+    report["findings"] = findings
+    print_report(report, findings)
+
+    output = args.output or RESULTS_DIR / f"plans_{git_commit()}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+    print(f"✓ Resultados: {output}")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+        print(f"✓ Línea base actualizada: {args.baseline}")
+
+    sys.exit(1 if any(f["level"] == "regression" for f in findings) else 0)
+
+
+if __name__ == "__main__":
+    main()
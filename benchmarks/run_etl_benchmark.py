@@ -0,0 +1,262 @@
+"""
+Benchmark de punta a punta del ETL con datos sintéticos
+
+Para cada tamaño levanta el stub de PostgREST con el dataset sintético,
+vacía la base destino (PostGIS local), ejecuta ETLService.run_full_etl y
+guarda la telemetría por etapa (ver etl_stage_metrics) en un JSON en
+benchmarks/results/. Cada tamaño corre en un proceso nuevo para que la
+memoria pico y la sesión de Spark no se arrastren entre corridas.
+
+La base destino se VACÍA (locations, grid_analysis, etl_control y rollups):
+solo se permite con --reset y contra un host local.
+
+Uso:
+    python benchmarks/run_etl_benchmark.py --reset --sizes 100k,1M
+    python benchmarks/run_etl_benchmark.py --compare results/a.json results/b.json
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from datetime import datetime
+from typing import Dict, List
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import tempfile
+
+from synthetic_data import SyntheticLocations, parse_size
+
+RESULTS_DIR = Path(__file__).parent / "results"
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", "postgres", "db"}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=Path(__file__).parent, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def environment() -> Dict:
+    from app.config import settings
+    try:
+        import pyspark
+        spark_version = pyspark.__version__
+    except ImportError:
+        spark_version = None
+    return {
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pyspark": spark_version,
+        "spark_master": settings.SPARK_MASTER,
+        "extractor": settings.ETL_EXTRACTOR,
+    }
+
+
+def reset_destination():
+    """Vacía las tablas que llena el ETL (solo contra un PostGIS local)"""
+    from sqlalchemy import text
+    from app.config import settings
+    from app.database.postgres_db import SessionLocal, init_db
+    from app.services.rollup_service import rebuild_all_rollups
+
+    if settings.DEST_PG_HOST not in LOCAL_HOSTS:
+        raise RuntimeError(f"DEST_PG_HOST={settings.DEST_PG_HOST} no es local; el benchmark vacía la base")
+
+    init_db()
+    db = SessionLocal()
+    try:
+        districts = db.execute(text("SELECT COUNT(*) FROM districts")).scalar()
+        if not districts:
+            print("⚠ La tabla districts está vacía: cargar con python scripts/load_districts_auto.py")
+        db.execute(text("TRUNCATE locations, grid_analysis, etl_control CASCADE"))
+        db.commit()
+        # Con locations vacía, reconstruir equivale a vaciar los rollups
+        rebuild_all_rollups(db)
+    finally:
+        db.close()
+
+
+def run_single(rows: int, seed: int, error_rate: float) -> Dict:
+    """Una corrida completa del ETL contra el stub (en el proceso actual)"""
+    from postgrest_stub import PostgRESTStub
+    from app.config import settings
+    from app.database import supabase_utils
+
+    stub = PostgRESTStub(SyntheticLocations(rows, seed=seed), error_rate=error_rate, seed=seed).start()
+    try:
+        # El ETL lee de SUPABASE_URL a través del singleton del cliente
+        settings.SUPABASE_URL = stub.url
+        supabase_utils._supabase_client = None
+
+        reset_destination()
+
+        from app.services.etl_service import ETLService
+        etl_service = ETLService()
+        try:
+            result = asyncio.run(etl_service.run_full_etl(incremental=True))
+            stages = [
+                {key: entry[key] for key in ("stage", "seconds", "records", "rows_per_second")}
+                for entry in etl_service.telemetry.stages
+            ]
+            peak_mb = etl_service.telemetry.peak_memory_mb()
+            client = etl_service.supabase
+            supabase = {"bytes": client.bytes_fetched, "retries": client.retries,
+                        "requests": stub.stats["requests"], "errors_injected": stub.stats["errors_injected"]}
+        finally:
+            etl_service.cleanup()
+    finally:
+        stub.stop()
+
+    execution_time = result.get("execution_time") or 0
+    return {
+        "rows": rows,
+        "seed": seed,
+        "status": result["status"],
+        "message": result.get("message"),
+        "execution_time": execution_time,
+        "records_inserted": result.get("records_inserted"),
+        "rows_per_second": round(rows / execution_time, 1) if execution_time else None,
+        "stages": stages,
+        "supabase": supabase,
+        "peak_memory_mb": peak_mb,
+    }
+
+
+def run_benchmark(sizes: List[int], seed: int, error_rate: float, output: Path) -> Dict:
+    """Corre cada tamaño en un proceso nuevo y junta los resultados"""
+    report = {
+        "benchmark": "etl",
+        "created_at": datetime.utcnow().isoformat(),
+        "environment": environment(),
+        "runs": [],
+    }
+
+    for rows in sizes:
+        print("\n" + "-"*70)
+        print(f"ETL con {rows:,} filas")
+        print("-"*70)
+        with tempfile.TemporaryDirectory() as tmp:
+            run_file = Path(tmp) / "run.json"
+            subprocess.run([
+                sys.executable, __file__, "--single", str(rows), "--seed", str(seed),
+                "--error-rate", str(error_rate), "--run-output", str(run_file)
+            ], check=False)
+            if not run_file.exists():
+                report["runs"].append({"rows": rows, "seed": seed, "status": "crashed"})
+                print(f"✗ La corrida de {rows:,} filas terminó sin resultado")
+                continue
+            run = json.loads(run_file.read_text())
+        report["runs"].append(run)
+        print_run(run)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"\n✓ Resultados: {output}\n")
+    return report
+
+
+def print_run(run: Dict):
+    print(f"\n  Estado: {run['status']}  |  {run.get('execution_time')}s  |  "
+          f"{run.get('rows_per_second')} filas/s  |  pico {run.get('peak_memory_mb')} MB")
+    for stage in run.get("stages", []):
+        rate = f"{stage['rows_per_second']:>12,.0f} filas/s" if stage.get("rows_per_second") else ""
+        print(f"    {stage['stage']:<10} {stage['seconds']:>9.2f}s  {rate}")
+
+
+def compare(base_path: Path, new_path: Path, threshold: float) -> bool:
+    """
+    Compara dos resultados por tamaño y etapa
+
+    Returns:
+        True si alguna etapa empeoró más que threshold (%)
+    """
+    base = json.loads(base_path.read_text())
+    new = json.loads(new_path.read_text())
+    base_runs = {run["rows"]: run for run in base["runs"]}
+    regressed = False
+
+    print("\n" + "="*70)
+    print(f"COMPARACIÓN: {base['environment']['git_commit']} -> {new['environment']['git_commit']}")
+    print("="*70)
+
+    for run in new["runs"]:
+        old = base_runs.get(run["rows"])
+        if not old or old.get("status") != "success" or run.get("status") != "success":
+            print(f"\n{run['rows']:,} filas: sin corrida comparable")
+            continue
+
+        print(f"\n{run['rows']:,} filas")
+        old_stages = _stage_seconds(old)
+        for stage, seconds in [("total", run["execution_time"])] + list(_stage_seconds(run).items()):
+            before = old["execution_time"] if stage == "total" else old_stages.get(stage)
+            if not before:
+                print(f"  {stage:<10} {'-':>9}  -> {seconds:>9.2f}s")
+                continue
+            change = (seconds - before) / before * 100
+            flag = ""
+            if change > threshold:
+                flag = "  ⚠ REGRESIÓN"
+                regressed = True
+            print(f"  {stage:<10} {before:>9.2f}s -> {seconds:>9.2f}s  ({change:+6.1f}%){flag}")
+
+    print()
+    return regressed
+
+
+def _stage_seconds(run: Dict) -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for stage in run.get("stages", []):
+        totals[stage["stage"]] = totals.get(stage["stage"], 0.0) + stage["seconds"]
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de punta a punta del ETL')
+    parser.add_argument('--sizes', default='100k,1M,10M', help='Tamaños separados por coma')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fracción de requests con error 500 en el stub')
+    parser.add_argument('--reset', action='store_true',
+                        help='Confirmar que se puede vaciar la base destino (local)')
+    parser.add_argument('--output', type=Path, default=None)
+    parser.add_argument('--compare', nargs=2, type=Path, metavar=('BASE', 'NEW'))
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Porcentaje de empeoramiento que se marca como regresión')
+    parser.add_argument('--single', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--run-output', type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, threshold=args.threshold) else 0)
+
+    if args.single:
+        run = run_single(args.single, args.seed, args.error_rate)
+        args.run_output.write_text(json.dumps(run, default=str))
+        return
+
+    if not args.reset:
+        parser.error("el benchmark vacía la base destino: confirmar con --reset")
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    output = args.output or RESULTS_DIR / f"etl_{git_commit()}_{datetime.now():%Y%m%d_%H%M%S}.json"
+
+    print("\n" + "="*70)
+    print("BENCHMARK ETL (datos sintéticos + stub de PostgREST)")
+    print("="*70)
+    print(f"  • Tamaños: {', '.join(f'{size:,}' for size in sizes)}")
+    print(f"  • Semilla: {args.seed}")
+
+    run_benchmark(sizes, args.seed, args.error_rate, output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Generador determinístico de registros de ubicación sintéticos
+
+Produce filas con el mismo formato que la tabla de Supabase (las columnas que
+consume el ETL): trayectorias de dispositivos que arrancan en puntos dentro de
+los distritos de santa-cruz-distritos.geojson (ponderados por población), con
+mezclas de operador y tipo de red con las variantes de texto que normaliza la
+transformación.
+
+Los ids se generan por bloques de BLOCK_SIZE filas, cada uno con su propia
+semilla, así cualquier página se arma sin generar las anteriores y un
+dataset chico es prefijo exacto de uno más grande con la misma semilla.
+
+Uso:
+    python benchmarks/synthetic_data.py --rows 100000 --out synthetic.ndjson
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+import argparse
+import json
+import math
+
+import numpy as np
+
+DEFAULT_GEOJSON = Path(__file__).parent.parent / "santa-cruz-distritos.geojson"
+
+BLOCK_SIZE = 10000
+POINTS_PER_TRAJECTORY = 400
+DEVICE_POOL_MIN = 50
+ROWS_PER_DEVICE = 20000  # Tamaño del pool de dispositivos: filas / ROWS_PER_DEVICE
+START_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+BLOCK_SPAN_HOURS = 6  # Cada bloque arranca trayectorias en una ventana de 6 h posterior a la anterior
+
+METERS_PER_DEGREE = 111320.0
+MAX_WANDER_DEGREES = 0.04  # ~4.5 km: más lejos del origen la trayectoria gira de vuelta
+
+# Valores crudos tal como llegan de los teléfonos (con variantes y basura)
+OPERATORS = ["ENTEL", "Entel S.A.", "BOMOV", "TIGO", "Tigo", "VIVA", "NuevaTel VIVA", "", None, "unknown"]
+OPERATOR_WEIGHTS = [0.22, 0.10, 0.05, 0.20, 0.12, 0.10, 0.05, 0.06, 0.06, 0.04]
+
+NETWORKS = ["LTE", "4G", "5G", "WIFI", "Wi-Fi", "3G", "HSPA+", "EDGE", None]
+NETWORK_WEIGHTS = [0.30, 0.18, 0.04, 0.18, 0.06, 0.10, 0.05, 0.04, 0.05]
+
+DEVICE_MODELS = ["Samsung Galaxy A14", "Samsung Galaxy A34", "Xiaomi Redmi Note 12", "Motorola Moto G54",
+                 "Huawei Y9", "Apple iPhone 12", "Xiaomi Poco X5", "Tecno Spark 10", "Honor X8"]
+
+# Velocidades típicas (m/s): detenido, caminando, corriendo, micro, auto
+SPEED_MODES = np.array([0.0, 1.3, 3.0, 7.0, 13.0])
+SPEED_MODE_WEIGHTS = np.array([0.15, 0.35, 0.05, 0.25, 0.20])
+
+RAW_COLUMNS = ["id", "device_name", "device_id", "latitude", "longitude", "altitude",
+               "speed", "battery", "signal", "network_type", "sim_operator", "timestamp"]
+
+
+def _points_in_rings(lon: np.ndarray, lat: np.ndarray, rings: List[np.ndarray]) -> np.ndarray:
+    """Par-impar sobre todos los anillos de un polígono (los huecos restan)"""
+    inside = np.zeros(len(lon), dtype=bool)
+    for ring in rings:
+        x1, y1 = ring[:-1, 0], ring[:-1, 1]
+        x2, y2 = ring[1:, 0], ring[1:, 1]
+        crosses = (y1[None, :] > lat[:, None]) != (y2[None, :] > lat[:, None])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_at = x1 + (lat[:, None] - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= (np.count_nonzero(crosses & (lon[:, None] < x_at), axis=1) % 2).astype(bool)
+    return inside
+
+
+class District:
+    """Polígonos de un distrito con su caja y peso (población)"""
+
+    def __init__(self, feature: Dict):
+        props = feature["properties"]
+        self.number = props.get("distrito")
+        self.weight = float(props.get("poblacion") or 1)
+        self.polygons = [
+            [np.asarray(ring, dtype=float) for ring in polygon]
+            for polygon in feature["geometry"]["coordinates"]
+        ]
+        coords = np.vstack([ring for polygon in self.polygons for ring in polygon])
+        self.min_lon, self.min_lat = coords.min(axis=0)
+        self.max_lon, self.max_lat = coords.max(axis=0)
+
+    def contains(self, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+        inside = np.zeros(len(lon), dtype=bool)
+        for rings in self.polygons:
+            inside |= _points_in_rings(lon, lat, rings)
+        return inside
+
+    def sample_point(self, rng: np.random.Generator) -> tuple:
+        """Muestreo por rechazo dentro de la caja del distrito"""
+        while True:
+            lon = rng.uniform(self.min_lon, self.max_lon, 64)
+            lat = rng.uniform(self.min_lat, self.max_lat, 64)
+            hits = np.flatnonzero(self.contains(lon, lat))
+            if len(hits):
+                return float(lon[hits[0]]), float(lat[hits[0]])
+
+
+class SyntheticLocations:
+    """
+    Dataset sintético direccionable por id (1..total_rows)
+
+    Args:
+        total_rows: Cantidad de filas del dataset
+        seed: Semilla; misma semilla = mismas filas
+        geojson_path: Distritos de donde se muestrean los puntos de partida
+    """
+
+    def __init__(self, total_rows: int, seed: int = 42, geojson_path: Path = DEFAULT_GEOJSON):
+        self.total_rows = total_rows
+        self.seed = seed
+        with open(geojson_path, encoding="utf-8") as f:
+            self.districts = [District(feature) for feature in json.load(f)["features"]]
+        weights = np.array([d.weight for d in self.districts])
+        self.district_weights = weights / weights.sum()
+        self.device_pool = max(DEVICE_POOL_MIN, total_rows // ROWS_PER_DEVICE)
+        self.block = lru_cache(maxsize=8)(self._generate_block)
+
+    @property
+    def max_id(self) -> int:
+        return self.total_rows
+
+    def _device(self, index: int) -> Dict:
+        """Atributos fijos de un dispositivo (modelo, operador, red habitual)"""
+        rng = np.random.default_rng([self.seed, 1_000_000_000 + index])
+        return {
+            "device_id": f"dev-{index:06d}",
+            "device_name": f"{DEVICE_MODELS[rng.integers(len(DEVICE_MODELS))]} #{index}",
+            "operator": OPERATORS[rng.choice(len(OPERATORS), p=OPERATOR_WEIGHTS)],
+            "network": int(rng.choice(len(NETWORKS), p=NETWORK_WEIGHTS)),
+            "home": int(rng.choice(len(self.districts), p=self.district_weights)),
+        }
+
+    def _trajectory(self, rng: np.random.Generator, n: int, window_start: float) -> Dict[str, np.ndarray]:
+        """Una trayectoria de n puntos de un dispositivo del pool, iniciada en la ventana del bloque"""
+        device = self._device(int(rng.integers(self.device_pool)))
+        district = self.districts[device["home"]] if rng.random() < 0.7 else \
+            self.districts[rng.choice(len(self.districts), p=self.district_weights)]
+        lon0, lat0 = district.sample_point(rng)
+
+        # Modo de movimiento con persistencia (cambia ~1 de cada 20 puntos),
+        # rumbo como caminata aleatoria que vuelve hacia el origen al alejarse
+        modes = rng.choice(len(SPEED_MODES), size=n, p=SPEED_MODE_WEIGHTS)
+        switch = rng.random(n) < 0.05
+        switch[0] = True
+        mode_speed = SPEED_MODES[modes[np.maximum.accumulate(np.where(switch, np.arange(n), 0))]]
+        speed = np.clip(rng.normal(mode_speed, mode_speed * 0.25 + 0.05), 0, None)
+        speed[speed < 0.2] = 0.0
+        dt = rng.integers(15, 120, n)
+        turn = rng.normal(0, 0.3, n)
+        step = speed * dt / METERS_PER_DEGREE
+        lon_scale = 1 / math.cos(math.radians(lat0))
+
+        lat = [0.0] * n
+        lon = [0.0] * n
+        y, x, heading = lat0, lon0, float(rng.uniform(0, 2 * math.pi))
+        max_wander = MAX_WANDER_DEGREES ** 2
+        for k, (step_k, turn_k) in enumerate(zip(step.tolist(), turn.tolist())):
+            dy, dx = lat0 - y, (lon0 - x) / lon_scale
+            if dy * dy + dx * dx > max_wander:
+                heading = math.atan2(dx, dy)
+            heading += turn_k
+            y += step_k * math.cos(heading)
+            x += step_k * math.sin(heading) * lon_scale
+            lat[k], lon[k] = y, x
+        lat, lon = np.array(lat), np.array(lon)
+
+        start = window_start + rng.uniform(0, BLOCK_SPAN_HOURS * 3600)
+        epoch = start + np.cumsum(dt)
+
+        battery = np.clip(rng.integers(20, 101) - np.cumsum(dt) / 600, 1, 100).round()
+        signal = np.clip(rng.normal(-85, 12, n), -120, -45).round()
+        altitude = rng.normal(420, 18, n).round(1)
+
+        # La red habitual del dispositivo con cambios ocasionales
+        network = np.where(rng.random(n) < 0.85, device["network"],
+                           rng.choice(len(NETWORKS), size=n, p=NETWORK_WEIGHTS))
+
+        return {
+            "device_id": np.full(n, device["device_id"], dtype=object),
+            "device_name": np.full(n, device["device_name"], dtype=object),
+            "sim_operator": np.full(n, device["operator"], dtype=object),
+            "network_type": np.array(NETWORKS, dtype=object)[network],
+            "latitude": lat.round(7),
+            "longitude": lon.round(7),
+            "altitude": np.where(rng.random(n) < 0.02, np.nan, altitude),
+            "speed": speed.round(2),
+            "battery": np.where(rng.random(n) < 0.02, np.nan, battery),
+            "signal": np.where(rng.random(n) < 0.03, np.nan, signal),
+            "epoch": epoch,
+        }
+
+    def _generate_block(self, index: int) -> List[Dict]:
+        """Filas del bloque index (ids index*BLOCK_SIZE+1 ...), ordenadas por tiempo"""
+        first_id = index * BLOCK_SIZE + 1
+        if first_id > self.total_rows:
+            return []
+
+        rng = np.random.default_rng([self.seed, index])
+        window_start = START_TIME.timestamp() + index * BLOCK_SPAN_HOURS * 3600
+        parts = [self._trajectory(rng, POINTS_PER_TRAJECTORY, window_start)
+                 for _ in range(BLOCK_SIZE // POINTS_PER_TRAJECTORY)]
+        block = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+        # Los ids de origen siguen el orden de llegada (aprox. temporal)
+        order = np.argsort(block["epoch"], kind="stable")
+        rows = min(BLOCK_SIZE, self.total_rows - first_id + 1)
+        order = order[:rows]
+
+        columns = {key: values[order] for key, values in block.items()}
+
+        def nullable(values: np.ndarray, cast) -> List:
+            return [None if value != value else cast(value) for value in values.tolist()]
+
+        timestamps = np.datetime_as_string(
+            (columns["epoch"] * 1e6).astype("datetime64[us]"), unit="us"
+        )
+        fields = zip(
+            range(first_id, first_id + rows),
+            columns["device_name"].tolist(),
+            columns["device_id"].tolist(),
+            columns["latitude"].tolist(),
+            columns["longitude"].tolist(),
+            nullable(columns["altitude"], float),
+            columns["speed"].tolist(),
+            nullable(columns["battery"], int),
+            nullable(columns["signal"], int),
+            columns["network_type"].tolist(),
+            columns["sim_operator"].tolist(),
+            [f"{value}+00:00" for value in timestamps.tolist()],
+        )
+        records = [dict(zip(RAW_COLUMNS, values)) for values in fields]
+        return records
+
+    def page(self, after_id: int, limit: int, max_id: Optional[int] = None) -> List[Dict]:
+        """
+        Filas con after_id < id <= max_id, en orden de id, hasta limit
+
+        Args:
+            after_id: Último id ya leído (keyset)
+            limit: Máximo de filas
+            max_id: Cota superior inclusiva (default: total_rows)
+        """
+        high = min(max_id if max_id is not None else self.total_rows, self.total_rows)
+        low = max(after_id, 0)
+        records: List[Dict] = []
+        while low < high and len(records) < limit:
+            index = low // BLOCK_SIZE
+            block = self.block(index)
+            start = low - index * BLOCK_SIZE
+            take = min(limit - len(records), high - low, len(block) - start)
+            records.extend(block[start:start + take])
+            low += take
+        return records
+
+    def iter_records(self, batch_size: int = BLOCK_SIZE) -> Iterator[List[Dict]]:
+        """Recorre todo el dataset en lotes"""
+        last_id = 0
+        while last_id < self.total_rows:
+            batch = self.page(last_id, batch_size)
+            yield batch
+            last_id = batch[-1]["id"]
+
+
+def parse_size(value: str) -> int:
+    """100k -> 100000, 1M -> 1000000, 10M -> 10000000"""
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generador de ubicaciones sintéticas')
+    parser.add_argument('--rows', type=parse_size, default=100_000, help='Filas (ej. 100k, 1M, 10M)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', type=Path, default=None, help='Archivo NDJSON de salida')
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print(f"DATOS SINTÉTICOS: {args.rows:,} filas (semilla {args.seed})")
+    print("="*70)
+
+    dataset = SyntheticLocations(args.rows, seed=args.seed)
+    print(f"  • Distritos: {len(dataset.districts)}")
+    print(f"  • Dispositivos: {dataset.device_pool:,}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            for batch in dataset.iter_records():
+                for record in batch:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"\n✓ Escrito {args.out}\n")
+    else:
+        for record in dataset.page(0, 3):
+            print(f"  {record}")
+
+
+if __name__ == "__main__":
+    main()
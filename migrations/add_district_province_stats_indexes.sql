@@ -0,0 +1,14 @@
+-- Índices cubrientes para estadísticas por distrito y provincia
+-- Descripción: Permite agrupar por district_id/province_id (asignados por el ETL)
+--              sin recorrer la tabla ni evaluar ST_Contains por cada punto
+-- Fecha: 2026-10-19
+
+CREATE INDEX IF NOT EXISTS idx_location_district_stats
+    ON locations (district_id, id)
+    INCLUDE (device_id, battery, signal, speed);
+
+CREATE INDEX IF NOT EXISTS idx_location_province_stats
+    ON locations (province_id, id)
+    INCLUDE (device_id, battery, signal, speed);
+
+ANALYZE locations;
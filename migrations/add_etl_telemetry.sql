@@ -0,0 +1,22 @@
+-- Migración: Telemetría por etapa del ETL
+-- Descripción: Columnas de resumen en etl_control y detalle por etapa en etl_stage_metrics
+-- Fecha: 2026-10-19
+
+-- Resumen de la ejecución
+ALTER TABLE etl_control ADD COLUMN IF NOT EXISTS rows_per_second DOUBLE PRECISION;
+ALTER TABLE etl_control ADD COLUMN IF NOT EXISTS bytes_fetched BIGINT;
+ALTER TABLE etl_control ADD COLUMN IF NOT EXISTS supabase_retries INTEGER;
+ALTER TABLE etl_control ADD COLUMN IF NOT EXISTS peak_memory_mb DOUBLE PRECISION;
+
+-- Detalle por etapa (extract, normalize, transform, grid, stats, load, assign, rollups, control)
+CREATE TABLE IF NOT EXISTS etl_stage_metrics (
+    id SERIAL PRIMARY KEY,
+    etl_control_id INTEGER NOT NULL REFERENCES etl_control(id) ON DELETE CASCADE,
+    stage VARCHAR(20) NOT NULL,
+    started_at TIMESTAMP NOT NULL,
+    seconds DOUBLE PRECISION NOT NULL,
+    records BIGINT,
+    rows_per_second DOUBLE PRECISION
+);
+
+CREATE INDEX IF NOT EXISTS ix_etl_stage_metrics_etl_control_id ON etl_stage_metrics(etl_control_id);
@@ -7,6 +7,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.database.postgres_db import SessionLocal, init_db
 from app.services.location_service import bulk_assign_geographic_location
+from app.services.rollup_service import rebuild_all_rollups
 from app.models.db_models import Location
 import logging
 
@@ -49,6 +50,9 @@ def main():
         # Asignar ubicaciones
         rows_updated = bulk_assign_geographic_location(db)
 
+        # Recalcular rollups de estadísticas con las nuevas asignaciones
+        rebuild_all_rollups(db)
+
         print("\n" + "="*70)
         print("RESULTADOS")
         print("="*70)
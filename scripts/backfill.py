@@ -0,0 +1,76 @@
+"""
+Backfill histórico en paralelo (reemplaza al ETL completo con overwrite)
+
+Divide los ids de Supabase en rangos, los carga en paralelo en una tabla
+sombra con checkpoints por rango y al final la intercambia por locations en
+una sola transacción. locations sigue disponible para lectura mientras tanto.
+
+Uso:
+    python scripts/backfill.py --workers 8 --range-size 100000
+    python scripts/backfill.py --resume 20250101120000
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.database.postgres_db import init_db
+from app.services.backfill_service import run_backfill
+import argparse
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill histórico en paralelo')
+    parser.add_argument('--workers', type=int, default=settings.BACKFILL_WORKERS,
+                        help='Procesos en paralelo')
+    parser.add_argument('--range-size', type=int, default=settings.BACKFILL_RANGE_SIZE,
+                        help='Ids por rango (checkpoint)')
+    parser.add_argument('--resume', metavar='RUN_ID', default=None,
+                        help='Retomar un backfill anterior salteando los rangos completos')
+    args = parser.parse_args()
+
+    print("\n" + "="*70)
+    print("BACKFILL HISTÓRICO EN PARALELO")
+    print("="*70)
+    print(f"  • Workers: {args.workers}")
+    print(f"  • Ids por rango: {args.range_size:,}")
+    print(f"  • Tabla sombra: {settings.BACKFILL_SHADOW_TABLE}")
+    if args.resume:
+        print(f"  • Retomando: {args.resume}")
+
+    # Crea backfill_checkpoints si no existe
+    print("\nInicializando base de datos...")
+    init_db()
+
+    try:
+        result = run_backfill(workers=args.workers, range_size=args.range_size, run_id=args.resume)
+
+        print("\n" + "="*70)
+        print("RESULTADOS")
+        print("="*70)
+        if result['status'] != 'success':
+            print(f"  Rangos fallidos: {len(result['failed_ranges'])}")
+            print(f"\n✗ BACKFILL INCOMPLETO - retomar con: python scripts/backfill.py --resume {result['run_id']}\n")
+            sys.exit(1)
+
+        print(f"  Run: {result['run_id']}")
+        print(f"  Rangos: {result['ranges']} (hasta id {result['max_id']:,})")
+        print(f"  Filas cargadas: {result['records_loaded']:,}")
+        for dimension, rows in result['rollups'].items():
+            print(f"  Rollup {dimension}: {rows:,} filas")
+        print(f"  Tiempo: {result['execution_time']}s")
+        print("\n✓ PROCESO COMPLETADO\n")
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Reconstruye las tablas de rollup de estadísticas a partir de locations
+Útil la primera vez o después de corregir asignaciones de distrito/provincia
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database.postgres_db import SessionLocal, init_db
+from app.services.rollup_service import rebuild_all_rollups
+import logging
+
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    print("\n" + "="*70)
+    print("RECONSTRUCCIÓN DE ROLLUPS DE ESTADÍSTICAS")
+    print("="*70)
+
+    # Crea las tablas de rollup si no existen
+    print("\nInicializando base de datos...")
+    init_db()
+
+    db = SessionLocal()
+    try:
+        result = rebuild_all_rollups(db)
+
+        print("\n" + "="*70)
+        print("RESULTADOS")
+        print("="*70)
+        for dimension, rows in result.items():
+            print(f"  {dimension}: {rows:,} filas de rollup")
+        print("\n✓ PROCESO COMPLETADO\n")
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Ejecuta un archivo de migración SQL de la carpeta migrations/
+
+Uso:
+    python scripts/run_migration.py add_district_province_stats_indexes.sql
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database.postgres_db import engine
+from sqlalchemy import text
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "migrations"
+
+
+def split_statements(sql: str) -> list:
+    """Separa el archivo en sentencias, descartando líneas de comentario"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [s.strip() for s in "\n".join(lines).split(';') if s.strip()]
+
+
+def run_migration(filename: str):
+    print("\n" + "="*70)
+    print(f"EJECUTANDO MIGRACIÓN: {filename}")
+    print("="*70 + "\n")
+
+    migration_file = MIGRATIONS_DIR / filename
+
+    try:
+        sql = migration_file.read_text(encoding='utf-8')
+        statements = split_statements(sql)
+
+        with engine.connect() as conn:
+            for statement in statements:
+                print(f"Ejecutando: {statement.splitlines()[0]}...")
+                conn.execute(text(statement))
+                conn.commit()
+
+        print(f"\n✓ Migración ejecutada exitosamente ({len(statements)} sentencias)")
+        print("\n" + "="*70 + "\n")
+
+    except Exception as e:
+        print(f"\n✗ Error ejecutando migración: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python scripts/run_migration.py <archivo.sql>")
+        sys.exit(1)
+
+    run_migration(sys.argv[1])
@@ -9,22 +9,49 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 import platform
 print(f"Python version: {platform.python_version()}")
 
-from app.scheduler.etl_scheduler import start_scheduler
+from app.scheduler.etl_scheduler import start_scheduler, request_run_now
+from app.config import settings
+import argparse
 
 if __name__ == "__main__":
-    # Ejecutar ETL cada 30 minutos por defecto
-    # Cambiar el valor para ajustar la frecuencia
+    # Intervalo base por defecto: settings.ETL_INTERVAL_MINUTES (30 minutos)
+    # Se acorta si hay mucho backlog y se alarga si no hay datos nuevos
+
+    parser = argparse.ArgumentParser(description='ETL Scheduler')
+    parser.add_argument('--interval', type=float, default=None,
+                        help='Intervalo base en minutos')
+    parser.add_argument('--run-now', action='store_true',
+                        help='Pedir al scheduler en marcha que ejecute el ETL ya')
+    parser.add_argument('--continuous', action='store_true',
+                        help='Ingesta continua en micro-lotes (sin Spark) en lugar del scheduler')
+    args = parser.parse_args()
+
+    if args.continuous:
+        from app.services.microbatch_service import start_continuous
+        start_continuous()
+        sys.exit(0)
+
+    if args.run_now:
+        request_run_now()
+        print("Ejecución inmediata solicitada al scheduler.")
+        sys.exit(0)
+
+    interval = args.interval or settings.ETL_INTERVAL_MINUTES
 
     print("\n" + "="*70)
     print("ETL SCHEDULER - MODO INCREMENTAL")
     print("="*70)
     print("\nConfiguración:")
     print("  • Modo: Incremental (solo datos nuevos)")
-    print("  • Intervalo: 30 minutos")
+    print(f"  • Intervalo base: {interval:g} minutos (adaptativo según backlog)")
     print("  • Sin eliminación de datos")
+    print("  • Si Supabase no tiene registros nuevos no se inicia Spark")
     print("\nPara cambiar el intervalo:")
     print("  python start_scheduler.py --interval 60  (cada hora)")
+    print("Para ejecutar ya (con el scheduler corriendo):")
+    print("  python start_scheduler.py --run-now")
+    print("Para ingesta continua (casi tiempo real, sin Spark):")
+    print("  python start_scheduler.py --continuous")
     print("="*70 + "\n")
 
-    start_scheduler(interval_minutes=30)
-
+    start_scheduler(interval_minutes=interval)
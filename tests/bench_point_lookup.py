@@ -0,0 +1,83 @@
+"""
+Micro-benchmark: búsqueda de distrito/provincia por punto
+
+Compara la consulta anterior (SQL armado con f-string, dos consultas por punto)
+contra la sentencia preparada combinada de location_service.
+"""
+import sys
+import random
+import statistics
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from app.database.postgres_db import SessionLocal
+from app.services.location_service import get_district_and_province_for_point
+
+# Área aproximada de Santa Cruz de la Sierra
+MIN_LAT, MAX_LAT = -17.88, -17.70
+MIN_LON, MAX_LON = -63.28, -63.08
+
+
+def lookup_fstring(db, latitude, longitude):
+    """Implementación anterior: un statement distinto por punto"""
+    point_wkt = f'POINT({longitude} {latitude})'
+    db.execute(text(f"""
+        SELECT id, district_number, district_name
+        FROM districts
+        WHERE ST_Contains(geometry, ST_GeomFromText('{point_wkt}', 4326))
+        LIMIT 1
+    """)).fetchone()
+    db.execute(text(f"""
+        SELECT id, province_name
+        FROM provinces
+        WHERE ST_Contains(geometry, ST_GeomFromText('{point_wkt}', 4326))
+        LIMIT 1
+    """)).fetchone()
+
+
+def lookup_prepared(db, latitude, longitude):
+    get_district_and_province_for_point(db, latitude, longitude)
+
+
+def run(name, fn, db, points):
+    # Calentamiento (incluye el PREPARE de la primera llamada)
+    for lat, lon in points[:20]:
+        fn(db, lat, lon)
+
+    timings = []
+    for lat, lon in points:
+        start = time.perf_counter()
+        fn(db, lat, lon)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:<12} media: {statistics.mean(timings):7.3f} ms   "
+          f"p50: {statistics.median(timings):7.3f} ms   p95: {p95:7.3f} ms")
+    return statistics.mean(timings)
+
+
+def bench_point_lookup(n_points: int = 2000):
+    print("\n" + "="*70)
+    print(f"BENCHMARK: búsqueda por punto ({n_points:,} puntos)")
+    print("="*70 + "\n")
+
+    random.seed(42)
+    points = [
+        (random.uniform(MIN_LAT, MAX_LAT), random.uniform(MIN_LON, MAX_LON))
+        for _ in range(n_points)
+    ]
+
+    db = SessionLocal()
+    try:
+        before = run("f-string", lookup_fstring, db, points)
+        after = run("preparada", lookup_prepared, db, points)
+        print(f"\nMejora: {before / after:.2f}x por búsqueda\n")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    bench_point_lookup(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,44 @@
+"""
+Test de la validación vectorizada de POST /ingest
+
+No necesita base de datos: un lote que mezcla timestamps con Z, con offset,
+con y sin fracción de segundo debe validar completo y quedar en UTC.
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from app.services.ingest_service import validate_locations
+
+
+def test_mixed_iso_timestamps_are_valid():
+    timestamps = [
+        "2025-01-01T10:00:00.123456Z",
+        "2025-01-01T10:00:01Z",
+        "2025-01-01T10:00:02+00:00",
+        "2025-01-01T06:00:03.5-04:00",
+    ]
+    records = [
+        {"device_id": "dev1", "latitude": -17.78, "longitude": -63.18, "timestamp": timestamp}
+        for timestamp in timestamps
+    ]
+
+    df, errors = validate_locations(records)
+
+    assert errors == [], f"Timestamps válidos rechazados: {errors}"
+    assert list(df["timestamp"]) == [
+        pd.Timestamp("2025-01-01 10:00:00.123456", tz="UTC"),
+        pd.Timestamp("2025-01-01 10:00:01", tz="UTC"),
+        pd.Timestamp("2025-01-01 10:00:02", tz="UTC"),
+        pd.Timestamp("2025-01-01 10:00:03.5", tz="UTC"),
+    ]
+
+    _, errors = validate_locations([{**records[0], "timestamp": "not a date"}])
+    assert errors == [{"index": 0, "errors": ["timestamp is not a valid datetime"]}]
+    print("✓ Timestamps ISO 8601 mixtos aceptados; inválidos rechazados")
+
+
+if __name__ == "__main__":
+    test_mixed_iso_timestamps_are_valid()
@@ -0,0 +1,48 @@
+"""
+Test de la transformación en pandas (micro-lotes, /ingest, backfill)
+
+No necesita base de datos: verifica que timestamps ISO 8601 con y sin
+fracción de segundo, con Z o con offset, se conviertan todos a UTC y que las
+filas con timestamp NULL o inválido se descarten (locations.timestamp es NOT NULL).
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pandas as pd
+
+from app.spark.local_transformations import transform_records
+
+
+def _record(id: int, timestamp):
+    return {
+        "id": id, "device_name": "device-1", "device_id": "dev1",
+        "latitude": -17.78, "longitude": -63.18, "altitude": 420,
+        "speed": 1.2, "battery": 80, "signal": -65,
+        "network_type": "4G", "sim_operator": "Entel", "timestamp": timestamp,
+    }
+
+
+def test_mixed_iso_timestamps():
+    records = [
+        _record(1, "2025-01-01T10:00:00.123456+00:00"),
+        _record(2, "2025-01-01T10:00:01+00:00"),
+        _record(3, "2025-01-01T10:00:02Z"),
+        _record(4, "2025-01-01T06:00:03.5-04:00"),
+        _record(5, None),
+        _record(6, "not a date"),
+    ]
+
+    df = transform_records(records).set_index("id")
+
+    assert list(df.index) == [1, 2, 3, 4], "Se perdieron filas al parsear timestamps"
+    assert df.loc[1, "timestamp"] == pd.Timestamp("2025-01-01 10:00:00.123456")
+    assert df.loc[2, "timestamp"] == pd.Timestamp("2025-01-01 10:00:01")
+    assert df.loc[3, "timestamp"] == pd.Timestamp("2025-01-01 10:00:02")
+    assert df.loc[4, "timestamp"] == pd.Timestamp("2025-01-01 10:00:03.5")
+    assert df["timestamp"].notna().all() and df["date"].notna().all()
+    print("✓ Timestamps ISO 8601 mixtos convertidos a UTC; NULL e inválidos descartados")
+
+
+if __name__ == "__main__":
+    test_mixed_iso_timestamps()
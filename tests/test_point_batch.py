@@ -0,0 +1,61 @@
+"""
+Test de la búsqueda de distrito/provincia por lote (POST /districts/point/batch)
+
+Compara el resultado de una sola consulta para todos los puntos contra la
+búsqueda punto por punto de DistrictService y ProvinceService.
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.database.postgres_db import SessionLocal
+from app.services.district_service import DistrictService
+from app.services.province_service import ProvinceService
+from app.services.location_service import get_district_and_province_for_points
+
+
+def test_point_batch():
+    print("\n" + "="*70)
+    print("TEST: Distrito y provincia por lote vs. punto por punto")
+    print("="*70)
+
+    db = SessionLocal()
+
+    puntos = [
+        (-17.7833, -63.1821, "Plaza 24 de Septiembre"),
+        (-17.7500, -63.1800, "Zona Norte - Las Brisas"),
+        (-17.8200, -63.1800, "Zona Sur - Plan 3000"),
+        (-17.7800, -63.2200, "Zona Oeste - Pampa de la Isla"),
+        (-17.6448, -63.1358, "Aeropuerto Viru Viru"),
+        (0.0, 0.0, "Fuera de Santa Cruz"),
+    ]
+
+    try:
+        ubicaciones = get_district_and_province_for_points(
+            db,
+            [lat for lat, _, _ in puntos],
+            [lon for _, lon, _ in puntos],
+        )
+
+        assert len(ubicaciones['district_name']) == len(puntos), "El lote no conserva la cantidad de puntos"
+
+        for i, (lat, lon, nombre) in enumerate(puntos):
+            district = DistrictService.get_district_by_point(db, lat, lon)
+            province = ProvinceService.get_province_by_point(db, lat, lon)
+
+            assert ubicaciones['district_id'][i] == (district.id if district else None), nombre
+            assert ubicaciones['province_id'][i] == (province.id if province else None), nombre
+
+            print(f"✓ {nombre}: {ubicaciones['district_name'][i] or 'Fuera de distritos'}"
+                  f" / {ubicaciones['province_name'][i] or 'Fuera de provincias'}")
+
+        vacio = get_district_and_province_for_points(db, [], [])
+        assert all(values == [] for values in vacio.values()), "Un lote vacío debe retornar listas vacías"
+    finally:
+        db.close()
+
+    print("\n✓ Test completado\n")
+
+
+if __name__ == "__main__":
+    test_point_batch()